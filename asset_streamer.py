@@ -0,0 +1,183 @@
+import ctypes
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from OpenGL.GL import *
+from glb_loader import GLBLoader
+from tracing import tracer
+from render_state import gl_state
+
+class PlaceholderSphere:
+    """Untextured UV sphere drawn in a body's config color until its real model is ready"""
+    
+    def __init__(self, sectors=32, stacks=16):
+        self.VAO = None
+        self.VBO = None
+        self.EBO = None
+        self.texture_id = None
+        self.index_count = 0
+        
+        vertices, indices = self._generate_mesh(sectors, stacks)
+        self._setup_opengl_buffers(vertices, indices)
+    
+    def _generate_mesh(self, sectors, stacks):
+        phi = np.linspace(0, np.pi, stacks + 1)
+        theta = np.linspace(0, 2 * np.pi, sectors + 1)
+        phi, theta = np.meshgrid(phi, theta, indexing='ij')
+        
+        x = np.sin(phi) * np.cos(theta)
+        y = np.cos(phi)
+        z = np.sin(phi) * np.sin(theta)
+        
+        # Texcoords sample texel centers; the placeholder is drawn untextured in the body's color
+        u = (np.arange(sectors + 1) + 0.5) / (sectors + 1)
+        v = (np.arange(stacks + 1) + 0.5) / (stacks + 1)
+        v, u = np.meshgrid(v, u, indexing='ij')
+        
+        positions = np.stack([x, y, z], axis=-1).reshape(-1, 3)
+        # Position, normal (identical on a unit sphere), texcoord
+        vertices = np.hstack([positions, positions, np.stack([u, v], axis=-1).reshape(-1, 2)]).astype(np.float32)
+        
+        first = (np.arange(stacks)[:, None] * (sectors + 1) + np.arange(sectors)[None, :]).reshape(-1)
+        second = first + sectors + 1
+        indices = np.stack([first, second, first + 1, second, second + 1, first + 1], axis=1)
+        return vertices, indices.astype(np.uint32).reshape(-1)
+    
+    def _setup_opengl_buffers(self, vertices, indices):
+        stride = 8 * 4
+        
+        self.VAO = glGenVertexArrays(1)
+        self.VBO = glGenBuffers(1)
+        self.EBO = glGenBuffers(1)
+        
+        glBindVertexArray(self.VAO)
+        
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(3 * 4))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(6 * 4))
+        glEnableVertexAttribArray(2)
+        
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+        self.index_count = len(indices)
+        
+        glBindVertexArray(0)
+        
+        # A fully transparent texel makes the fragment shader fall back to objectColor
+        self.texture_id = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture_id)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, 1, 1, 0, GL_RGBA, GL_UNSIGNED_BYTE, np.zeros(4, dtype=np.uint8))
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    
+    def render(self, shader):
+        gl_state.bind_texture(0, GL_TEXTURE_2D, self.texture_id)
+        gl_state.bind_vertex_array(self.VAO)
+        glDrawElements(GL_TRIANGLES, self.index_count, GL_UNSIGNED_INT, None)
+        gl_state.count()
+    
+    def cleanup(self):
+        try:
+            if self.VAO:
+                glDeleteVertexArrays(1, [self.VAO])
+            if self.VBO:
+                glDeleteBuffers(1, [self.VBO])
+            if self.EBO:
+                glDeleteBuffers(1, [self.EBO])
+            if self.texture_id:
+                glDeleteTextures([self.texture_id])
+        except Exception as e:
+            pass
+
+class _StreamJob:
+    __slots__ = ('planet', 'loader', 'future', 'steps')
+    
+    def __init__(self, planet, loader, future):
+        self.planet = planet
+        self.loader = loader
+        self.future = future
+        self.steps = None
+
+class AssetStreamer:
+    """Decodes models on worker threads and spreads their GL upload across frames under a time budget"""
+    
+    def __init__(self, base_path, frame_budget_ms=2.0, max_workers=2, on_loaded=None, on_failed=None):
+        self.base_path = base_path
+        self.frame_budget = frame_budget_ms / 1000.0
+        self.on_loaded = on_loaded
+        self.on_failed = on_failed
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asset-decode")
+        self._jobs = []
+        self._active = None
+    
+    def submit(self, planet):
+        """Queue a planet's model for background decoding; jobs are uploaded in submission order"""
+        loader = GLBLoader(self.base_path)
+        future = self._executor.submit(loader.decode, planet.config.model_file)
+        self._jobs.append(_StreamJob(planet, loader, future))
+    
+    @property
+    def pending(self):
+        return len(self._jobs) + (1 if self._active else 0)
+    
+    def _next_decoded_job(self):
+        for job in self._jobs:
+            if not job.future.done():
+                continue
+            
+            self._jobs.remove(job)
+            if job.future.exception() is not None:
+                self._fail(job)
+                continue
+            
+            job.steps = job.loader.upload_steps()
+            return job
+        return None
+    
+    def _fail(self, job):
+        job.loader.cleanup()
+        if self.on_failed:
+            self.on_failed(job.planet)
+    
+    def pump(self):
+        """Run upload steps on the GL thread until this frame's budget is spent"""
+        deadline = time.perf_counter() + self.frame_budget
+        
+        with tracer.span("upload_steps", "loader"):
+            while True:
+                if self._active is None:
+                    self._active = self._next_decoded_job()
+                    if self._active is None:
+                        return
+                
+                try:
+                    next(self._active.steps)
+                except StopIteration:
+                    job = self._active
+                    self._active = None
+                    job.planet.loader = job.loader
+                    if self.on_loaded:
+                        self.on_loaded(job.planet)
+                except Exception as e:
+                    job = self._active
+                    self._active = None
+                    self._fail(job)
+                
+                if time.perf_counter() >= deadline:
+                    return
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._active is not None:
+            self._active.steps.close()
+            self._active.loader.cleanup()
+            self._active = None
+        for job in self._jobs:
+            if job.future.done() and job.future.exception() is None:
+                job.loader.cleanup()
+        self._jobs = []
@@ -0,0 +1,219 @@
+import csv
+import json
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+DEFAULT_CATALOG = Path(__file__).parent / "data" / "bodies.json"
+
+@dataclass
+class PlanetConfig:
+    name: str
+    model_file: str
+    diameter: float         # in km
+    distance: float         # in million km
+    mass: float             # in 10^24 kg
+    orbit_speed: float      # km/s
+    rotation_period: float  # hours
+    color: Tuple[float, float, float]
+    moons: int
+    has_rings: bool
+
+# Numeric columns and their dtypes; name, model_file and color are stored separately
+NUMERIC_COLUMNS = {
+    'diameter': np.float64,
+    'distance': np.float64,
+    'mass': np.float64,
+    'orbit_speed': np.float64,
+    'rotation_period': np.float64,
+    'moons': np.int32,
+    'has_rings': np.bool_,
+    'is_star': np.bool_,
+    'visual_size': np.float64,
+    'ring_brightness': np.float64
+}
+
+DEFAULT_VISUAL_SIZE = 1.0
+
+# Values used when a record leaves a column out; anything not listed defaults to zero
+COLUMN_DEFAULTS = {
+    'visual_size': DEFAULT_VISUAL_SIZE,
+    'ring_brightness': 1.0
+}
+
+# Per-body flag bits, derived once from the catalog columns
+BODY_STAR = 1 << 0
+BODY_CUSTOM_PIVOT = 1 << 1
+BODY_RINGED = 1 << 2
+
+# Set on moons, which are generated at startup rather than read from the catalog
+BODY_MOON = 1 << 3
+
+# Closest an orbit may come to the star or the orbit inside it: the sun's visual radius (20) plus a buffer (150)
+MIN_ORBIT_SEPARATION = 170.0
+
+def stacked_orbit_radii(distances, stars, max_distance, min_separation=MIN_ORBIT_SEPARATION):
+    """Orbit radius in scene units for bodies given in orbit order.
+    
+    Distances are scaled so max_distance maps to 4000 units, and each orbit is pushed out to at least
+    min_separation beyond the previous one. Stars stay at the origin.
+    """
+    distance_scale = 4000.0 / max_distance
+    radii = np.zeros(len(distances), dtype=np.float64)
+    last_position = min_separation
+    for i, (distance, star) in enumerate(zip(np.asarray(distances).tolist(), np.asarray(stars).tolist())):
+        if star:
+            continue
+        radii[i] = max(distance * distance_scale, last_position + min_separation)
+        last_position = radii[i]
+    return radii
+
+class BodyCatalog:
+    """Immutable, name-indexed columnar store of the original body data.
+    
+    Loaded once from JSON, CSV or a columnar .npz file; lookups by name are O(1).
+    """
+    
+    def __init__(self, names, model_files, colors, columns, pivot_offsets=None):
+        self.names = tuple(names)
+        self.model_files = tuple(model_files)
+        self.colors = self._freeze(np.asarray(colors, dtype=np.float64).reshape(-1, 3))
+        self.columns = {
+            field: self._freeze(np.asarray(columns[field], dtype=dtype))
+            for field, dtype in NUMERIC_COLUMNS.items()
+        }
+        
+        # Offset from a model's origin to its true center, for models with a misplaced pivot
+        if pivot_offsets is None:
+            pivot_offsets = np.zeros((len(self.names), 3))
+        self.pivot_offsets = self._freeze(np.asarray(pivot_offsets, dtype=np.float64).reshape(-1, 3))
+        
+        flags = np.zeros(len(self.names), dtype=np.uint32)
+        flags[self.columns['is_star']] |= BODY_STAR
+        flags[self.pivot_offsets.any(axis=1)] |= BODY_CUSTOM_PIVOT
+        flags[self.columns['has_rings']] |= BODY_RINGED
+        self.flags = self._freeze(flags)
+        self.index = {name: row for row, name in enumerate(self.names)}
+        
+        if len(self.index) != len(self.names):
+            raise ValueError("Body names in the catalog must be unique")
+        
+        # Largest orbital distance, used to scale orbits into scene units
+        distances = self.columns['distance']
+        self.max_distance = float(distances[distances > 0].max()) if (distances > 0).any() else 1.0
+    
+    @staticmethod
+    def _freeze(array):
+        array.flags.writeable = False
+        return array
+    
+    @classmethod
+    def from_records(cls, records):
+        records = list(records)
+        columns = {
+            field: [record.get(field, COLUMN_DEFAULTS.get(field, 0)) for record in records]
+            for field in NUMERIC_COLUMNS
+        }
+        return cls(
+            [record['name'] for record in records],
+            [record.get('model_file', f"{record['name']}.glb") for record in records],
+            [record.get('color', (1.0, 1.0, 1.0)) for record in records],
+            columns,
+            [record.get('pivot_offset', (0.0, 0.0, 0.0)) for record in records]
+        )
+    
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG):
+        """Load a catalog from .json, .csv or .npz"""
+        path = Path(path)
+        suffix = path.suffix.lower()
+        
+        if suffix == '.json':
+            with open(path, 'r') as f:
+                data = json.load(f)
+            return cls.from_records(data['bodies'] if isinstance(data, dict) else data)
+        
+        if suffix == '.csv':
+            return cls.from_records(cls._read_csv(path))
+        
+        if suffix == '.npz':
+            with np.load(path, allow_pickle=False) as data:
+                columns = {field: data[field] for field in NUMERIC_COLUMNS if field in data}
+                count = len(data['name'])
+                for field in NUMERIC_COLUMNS:
+                    columns.setdefault(field, np.full(count, COLUMN_DEFAULTS.get(field, 0)))
+                pivot_offsets = data['pivot_offset'] if 'pivot_offset' in data else None
+                return cls(data['name'].tolist(), data['model_file'].tolist(), data['color'], columns, pivot_offsets)
+        
+        raise ValueError(f"Unsupported catalog format: {path.suffix}")
+    
+    @staticmethod
+    def _read_csv(path):
+        """CSV rows use color_r/g/b columns for the color and optional pivot_x/y/z columns for the pivot offset"""
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                record = {
+                    'name': row['name'],
+                    'model_file': row.get('model_file') or f"{row['name']}.glb",
+                    'color': (float(row['color_r']), float(row['color_g']), float(row['color_b']))
+                }
+                if row.get('pivot_x') not in (None, ''):
+                    record['pivot_offset'] = (float(row['pivot_x']), float(row['pivot_y']), float(row['pivot_z']))
+                for field in NUMERIC_COLUMNS:
+                    if row.get(field) not in (None, ''):
+                        value = row[field]
+                        if field in ('has_rings', 'is_star'):
+                            record[field] = value.strip().lower() in ('1', 'true', 'yes')
+                        else:
+                            record[field] = float(value)
+                yield record
+    
+    def save_npz(self, path):
+        """Write the catalog as a columnar binary file that loads without parsing"""
+        np.savez(
+            path,
+            name=np.array(self.names),
+            model_file=np.array(self.model_files),
+            color=self.colors,
+            pivot_offset=self.pivot_offsets,
+            **self.columns
+        )
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __contains__(self, name):
+        return name in self.index
+    
+    def row(self, name):
+        return self.index[name]
+    
+    def value(self, name, field):
+        """Original value of a numeric field, e.g. value('earth', 'diameter')"""
+        return self.columns[field][self.index[name]].item()
+    
+    def visual_size(self, name):
+        return float(self.columns['visual_size'][self.index[name]])
+    
+    def config_at(self, row) -> PlanetConfig:
+        """Build a fresh, mutable PlanetConfig from a catalog row"""
+        columns = self.columns
+        return PlanetConfig(
+            name=self.names[row],
+            model_file=self.model_files[row],
+            diameter=columns['diameter'][row].item(),
+            distance=columns['distance'][row].item(),
+            mass=columns['mass'][row].item(),
+            orbit_speed=columns['orbit_speed'][row].item(),
+            rotation_period=columns['rotation_period'][row].item(),
+            color=tuple(self.colors[row].tolist()),
+            moons=columns['moons'][row].item(),
+            has_rings=columns['has_rings'][row].item()
+        )
+    
+    def config(self, name) -> PlanetConfig:
+        return self.config_at(self.index[name])
+    
+    def configs(self) -> List[PlanetConfig]:
+        return [self.config_at(row) for row in range(len(self.names))]
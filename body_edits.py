@@ -0,0 +1,107 @@
+import numpy as np
+from body_catalog import BODY_STAR, MIN_ORBIT_SEPARATION
+
+# Binary operations an edit combines the current column values with
+EDIT_OPERATIONS = {
+    'set': lambda current, value: np.full_like(current, value),
+    'add': np.add,
+    'multiply': np.multiply,
+}
+
+class BodyEditor:
+    """Property edits applied to sets of bodies at once, as operations on BodyState columns.
+    
+    Each editable property has a handler in a dispatch table. A group edit costs a few array
+    operations whatever the number of bodies, and physical properties (diameter, distance)
+    recompute the state derived from them (scale, orbit radius) for the whole group too.
+    """
+    
+    def __init__(self, registry, catalog):
+        self.registry = registry
+        self.catalog = catalog
+        self.handlers = {
+            'orbit_speed': self._edit_column,
+            'rotation_speed': self._edit_column,
+            'orbit_angle': self._edit_column,
+            'rotation_angle': self._edit_column,
+            'scale': self._edit_column,
+            'diameter': self._edit_diameter,
+            'distance': self._edit_distance,
+        }
+    
+    def select(self, names=None, flags=0, exclude_flags=0, where=None):
+        """Ids of live bodies matching every given filter.
+        
+        names is an iterable of body names; flags/exclude_flags require or reject any of those flag
+        bits; where is a boolean mask over the state rows, e.g. state.scale[:state.count] > 5.
+        """
+        state = self.registry.state
+        n = state.count
+        mask = state.alive[:n].copy()
+        if names is not None:
+            named = np.zeros(n, dtype=np.bool_)
+            named[[self.registry.id_of(name) for name in names if name in self.registry]] = True
+            mask &= named
+        if flags:
+            mask &= (state.flags[:n] & flags) != 0
+        if exclude_flags:
+            mask &= (state.flags[:n] & exclude_flags) == 0
+        if where is not None:
+            mask &= np.asarray(where, dtype=np.bool_)[:n]
+        return np.flatnonzero(mask)
+    
+    def apply(self, property_name, value, ids, operation='set'):
+        """Combine property_name of the bodies in ids with value; returns the number of bodies edited"""
+        handler = self.handlers.get(property_name)
+        if handler is None:
+            raise KeyError(f"Unknown property '{property_name}'")
+        combine = EDIT_OPERATIONS[operation]
+        
+        ids = np.asarray(ids, dtype=np.intp).reshape(-1)
+        if len(ids) == 0:
+            return 0
+        handler(property_name, ids, value, combine)
+        return len(ids)
+    
+    def _edit_column(self, property_name, ids, value, combine):
+        column = getattr(self.registry.state, property_name)
+        column[ids] = combine(column[ids], value)
+    
+    def _edit_diameter(self, property_name, ids, value, combine):
+        """Set diameters and rescale the bodies proportionally to their catalog size.
+        
+        Moons have no catalog entry and are rescaled relative to their diameter before the edit.
+        """
+        state = self.registry.state
+        previous_diameter = state.diameter[ids]
+        previous_scale = state.scale[ids]
+        self._edit_column(property_name, ids, value, combine)
+        
+        rows = state.catalog_row[ids]
+        catalogued = rows >= 0
+        original_diameter = np.where(catalogued, self.catalog.columns['diameter'][rows], previous_diameter)
+        original_scale = np.where(catalogued, self.catalog.columns['visual_size'][rows], previous_scale)
+        
+        # Bodies without a diameter to scale against keep their current size
+        scale = np.divide(original_scale * state.diameter[ids], original_diameter, out=previous_scale,
+                          where=original_diameter > 0)
+        
+        # Apply reasonable limits to prevent extreme sizes
+        stars = (state.flags[ids] & BODY_STAR) != 0
+        state.scale[ids] = np.where(stars, np.clip(scale, 1.0, 500.0), np.clip(scale, 0.1, 100.0))
+    
+    def _edit_distance(self, property_name, ids, value, combine):
+        """Set distances and move the orbits to match, keeping stars at the origin.
+        
+        Moons orbit their parent on a scale of its own, so their orbit radius changes in proportion instead.
+        """
+        state = self.registry.state
+        previous_distance = state.distance[ids]
+        self._edit_column(property_name, ids, value, combine)
+        
+        distance_scale = 4000.0 / self.catalog.max_distance
+        radius = np.maximum(state.distance[ids] * distance_scale, MIN_ORBIT_SEPARATION)
+        moon_radius = np.divide(state.orbit_radius[ids] * state.distance[ids], previous_distance,
+                                out=state.orbit_radius[ids], where=previous_distance > 0)
+        radius = np.where(state.parent[ids] >= 0, moon_radius, radius)
+        state.orbit_radius[ids] = np.where((state.flags[ids] & BODY_STAR) != 0, 0.0, radius)
@@ -0,0 +1,110 @@
+import numpy as np
+from body_state import BodyState
+
+def _name_hashes(names, width):
+    """64-bit hash of each name, computed over its characters as whole columns"""
+    codes = np.ascontiguousarray(names, dtype=f'<U{width}').view(np.uint32).reshape(len(names), width)
+    hashes = np.zeros(len(names), dtype=np.uint64)
+    for column in codes.T:
+        hashes = hashes * np.uint64(1000003) + column
+    return hashes
+
+class BodyRegistry:
+    """Integer ids, a name index and flag bits for the bodies in the scene.
+    
+    Ids are assigned once when a body is added and stay stable when others are removed,
+    so per-frame code can test flags and index arrays instead of comparing names. A body's id
+    is also its row in the shared BodyState.
+    """
+    
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.bodies = []
+        self.index = {}
+        self.state = BodyState()
+        self._name_array = None
+        self._name_order = None
+    
+    def add(self, planet):
+        """Assign the next id to a planet, record its catalog row (-1 for moons) and move its state into the shared arrays"""
+        body_id = self.state.allocate()
+        self.state.copy_row(planet.state, planet.state_index, body_id)
+        planet.state = self.state
+        planet.state_index = body_id
+        
+        planet.body_id = body_id
+        planet.catalog_row = self.catalog.index.get(planet.config.name, -1)
+        self.state.catalog_row[body_id] = planet.catalog_row
+        
+        self.bodies.append(planet)
+        self.index[planet.config.name] = body_id
+        self._name_array = None
+        self._name_order = None
+        return body_id
+    
+    def remove(self, planet):
+        """Drop a planet; its id is not reused"""
+        if self.bodies[planet.body_id] is planet:
+            self.bodies[planet.body_id] = None
+            self.state.alive[planet.body_id] = False
+            del self.index[planet.config.name]
+            self._name_array = None
+            self._name_order = None
+    
+    def get(self, name):
+        body_id = self.index.get(name)
+        return None if body_id is None else self.bodies[body_id]
+    
+    def by_id(self, body_id):
+        return self.bodies[body_id]
+    
+    def id_of(self, name):
+        return self.index.get(name, -1)
+    
+    def names(self):
+        """Body names in id order, '' for removed bodies"""
+        return [body.config.name if body else '' for body in self.bodies]
+    
+    def name_array(self):
+        """names() as a read-only NumPy string array, built once per change to the registry"""
+        if self._name_array is None:
+            self._name_array = np.array(self.names(), dtype=np.str_)
+            self._name_array.flags.writeable = False
+        return self._name_array
+    
+    def ids_of(self, names):
+        """Ids for an array of names, -1 for names not in the registry"""
+        current = self.name_array()
+        names = np.asarray(names, dtype=np.str_)
+        ids = np.full(len(names), -1, dtype=np.intp)
+        if len(current) == 0 or len(names) == 0:
+            return ids
+        
+        # Names are matched by hash, and each match checked against the name itself
+        width = max(current.dtype.itemsize, names.dtype.itemsize) // 4
+        if self._name_order is None or self._name_order[2] < width:
+            hashes = _name_hashes(current, width)
+            order = np.argsort(hashes)
+            self._name_order = (order, hashes[order], width)
+        order, ordered, width = self._name_order
+        
+        # Searching in sorted order keeps the lookups cache friendly
+        hashes = _name_hashes(names, width)
+        query_order = np.argsort(hashes)
+        positions = np.empty(len(names), dtype=np.intp)
+        positions[query_order] = np.searchsorted(ordered, hashes[query_order])
+        positions = np.minimum(positions, len(current) - 1)
+        candidates = order[positions]
+        found = (current[candidates] == names) & (names != '')
+        ids[found] = candidates[found]
+        
+        # Names whose hash collides with another body's are looked up one by one
+        for row in np.flatnonzero(~found & (names != '')).tolist():
+            ids[row] = self.index.get(str(names[row]), -1)
+        return ids
+    
+    def __contains__(self, name):
+        return name in self.index
+    
+    def __len__(self):
+        return len(self.index)
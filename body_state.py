@@ -0,0 +1,155 @@
+import numpy as np
+
+def hierarchy_levels(parents):
+    """Rows of a parent/child tree grouped by depth, roots first; parents[i] is -1 for a root"""
+    parents = np.asarray(parents, dtype=np.int64)
+    count = len(parents)
+    
+    depth = np.zeros(count, dtype=np.int64)
+    has_parent = parents >= 0
+    for _ in range(count):
+        updated = np.where(has_parent, depth[parents] + 1, 0)
+        if np.array_equal(updated, depth):
+            break
+        depth = updated
+    else:
+        if count:
+            raise ValueError("Body hierarchy contains a cycle")
+    
+    return [np.flatnonzero(depth == level) for level in range(int(depth.max(initial=0)) + 1)]
+
+def incline(vectors, inclinations):
+    """Tilt (N, 3) vectors in the xz plane about the x axis by (N,) angles in degrees, in place.
+    
+    Only inclined rows are touched, so flat orbits cost nothing.
+    """
+    inclined = np.flatnonzero(inclinations)
+    if len(inclined):
+        angles = np.radians(inclinations[inclined]).astype(vectors.dtype)
+        along = vectors[inclined, 2]
+        vectors[inclined, 1] = -along * np.sin(angles)
+        vectors[inclined, 2] = along * np.cos(angles)
+    return vectors
+
+class BodyState:
+    """Structure-of-arrays simulation state for every body, indexed by body id.
+    
+    Planets read and write their row through StateField attributes, while per-frame work
+    (stepping orbits, building transforms) runs over whole columns at once.
+    
+    A body with a parent (a moon) orbits its parent's position instead of the origin. Positions
+    are composed over the hierarchy one level at a time, gathering each level's parents by index.
+    """
+    
+    FIELDS = ('orbit_radius', 'orbit_angle', 'orbit_speed', 'orbit_inclination', 'rotation_angle', 'rotation_speed',
+              'scale', 'diameter', 'distance', 'mass', 'rotation_period')
+    
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.capacity = 0
+        self.orbit_radius = None
+        self.orbit_angle = None
+        self.orbit_speed = None
+        self.orbit_inclination = None
+        self.rotation_angle = None
+        self.rotation_speed = None
+        self.scale = None
+        self.diameter = None
+        self.distance = None
+        self.mass = None
+        self.rotation_period = None
+        self.pivot_offset = None
+        self.flags = None
+        self.parent = None
+        self.catalog_row = None
+        self.alive = None
+        self._levels = None
+        self._grow(max(1, capacity))
+    
+    def _grow(self, capacity):
+        def resized(array, shape, dtype):
+            grown = np.zeros(shape, dtype=dtype)
+            if array is not None:
+                grown[:self.count] = array[:self.count]
+            return grown
+        
+        for field in self.FIELDS:
+            setattr(self, field, resized(getattr(self, field), capacity, np.float64))
+        self.pivot_offset = resized(self.pivot_offset, (capacity, 3), np.float64)
+        self.flags = resized(self.flags, capacity, np.uint32)
+        self.parent = resized(self.parent, capacity, np.int32)
+        self.catalog_row = resized(self.catalog_row, capacity, np.int32)
+        self.alive = resized(self.alive, capacity, np.bool_)
+        self.capacity = capacity
+    
+    def allocate(self):
+        """Append a zeroed row and return its index"""
+        if self.count == self.capacity:
+            self._grow(self.capacity * 2)
+        index = self.count
+        self.count += 1
+        self.alive[index] = True
+        self.parent[index] = -1
+        self._levels = None
+        return index
+    
+    def copy_row(self, source, source_index, index):
+        for field in self.FIELDS:
+            getattr(self, field)[index] = getattr(source, field)[source_index]
+        self.pivot_offset[index] = source.pivot_offset[source_index]
+        self.flags[index] = source.flags[source_index]
+        self.parent[index] = source.parent[source_index]
+        self._levels = None
+        self.catalog_row[index] = source.catalog_row[source_index]
+        self.alive[index] = source.alive[source_index]
+    
+    def set_parents(self, ids, parents):
+        """Make the bodies in ids orbit the bodies in parents (-1 for the origin)"""
+        self.parent[ids] = parents
+        self._levels = None
+    
+    def levels(self):
+        """hierarchy_levels of the current rows, rebuilt only after rows or parents change"""
+        levels = self._levels
+        if levels is None:
+            levels = self._levels = hierarchy_levels(self.parent[:self.count])
+        return levels
+    
+    def compose(self, local):
+        """Add each body's parent's value to its own, level by level: (count, ...) offsets become world values"""
+        parent = self.parent
+        for nodes in self.levels()[1:]:
+            local[nodes] += local[parent[nodes]]
+        return local
+    
+    def step(self, dt):
+        """Advance every live body's orbit and spin by dt seconds"""
+        n = self.count
+        alive = self.alive[:n]
+        self.orbit_angle[:n] = np.where(alive, (self.orbit_angle[:n] + self.orbit_speed[:n] * dt) % 360, self.orbit_angle[:n])
+        self.rotation_angle[:n] = np.where(alive, (self.rotation_angle[:n] + self.rotation_speed[:n] * dt) % 360, self.rotation_angle[:n])
+    
+    def positions(self, star_mask=0):
+        """(count, 3) world positions; bodies with any of star_mask's flag bits stay at their orbit's center"""
+        n = self.count
+        angles = np.radians(self.orbit_angle[:n])
+        radii = np.where(self.flags[:n] & star_mask, 0.0, self.orbit_radius[:n])
+        positions = np.zeros((n, 3), dtype=np.float64)
+        positions[:, 0] = radii * np.cos(angles)
+        positions[:, 2] = radii * np.sin(angles)
+        incline(positions, self.orbit_inclination[:n])
+        return self.compose(positions)
+
+class StateField:
+    """Attribute stored in a BodyState column at the owner's state_index"""
+    
+    def __set_name__(self, owner, name):
+        self.name = name
+    
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance.state, self.name)[instance.state_index].item()
+    
+    def __set__(self, instance, value):
+        getattr(instance.state, self.name)[instance.state_index] = value
@@ -0,0 +1,122 @@
+import json
+import os
+import struct
+import threading
+import numpy as np
+from pathlib import Path
+from tracing import tracer
+
+DEFAULT_CHECKPOINT = Path(__file__).parent / "checkpoints" / "quicksave.ckpt"
+
+CHECKPOINT_MAGIC = b'SSCHKPT\0'
+CHECKPOINT_VERSION = 1
+
+# magic, format version, length of the JSON header that follows
+PREAMBLE = struct.Struct('<8sII')
+
+# Arrays start on this boundary, so each one can be viewed in place from the memory map
+ALIGNMENT = 64
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def save(path, arrays, metadata):
+    """Write named arrays and a JSON-serializable metadata dict as one checkpoint file.
+    
+    The file is a fixed preamble, a JSON header describing every array, then the raw array
+    bytes. It is written to a temporary file and renamed, so a crash never leaves a torn checkpoint.
+    """
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    
+    directory = {}
+    offset = 0
+    for name, array in arrays.items():
+        directory[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({'metadata': metadata, 'arrays': directory}).encode('utf-8')
+    data_start = _aligned(PREAMBLE.size + len(header))
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_suffix(path.suffix + ".tmp")
+    with tracer.span("save_checkpoint", "checkpoint"):
+        with open(temporary, 'wb') as f:
+            f.write(PREAMBLE.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + directory[name]['offset'])
+                f.write(memoryview(array).cast('B'))
+            f.truncate(data_start + offset)
+        os.replace(temporary, path)
+
+def load(path):
+    """(metadata, arrays) from a checkpoint; arrays are read-only views into a memory map of the file"""
+    with open(path, 'rb') as f:
+        magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f"Not a checkpoint file: {path}")
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}: {path}")
+        header = json.loads(f.read(header_length).decode('utf-8'))
+    
+    data_start = _aligned(PREAMBLE.size + header_length)
+    mapped = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        start = data_start + entry['offset']
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        arrays[name] = mapped[start:start + nbytes].view(dtype).reshape(shape)
+    return header['metadata'], arrays
+
+class CheckpointWriter:
+    """Writes checkpoints on a background thread, so saving never blocks the simulation.
+    
+    Only the newest submitted checkpoint is kept waiting: if saves arrive faster than the disk
+    takes them, intermediate ones are skipped.
+    """
+    
+    def __init__(self):
+        self._pending = None
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="checkpoint_writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, path, arrays, metadata):
+        """Queue a checkpoint; arrays must not be modified afterwards"""
+        with self._condition:
+            self._pending = (path, arrays, metadata)
+            self._condition.notify_all()
+    
+    def flush(self, timeout=None):
+        """Wait until every submitted checkpoint has been written"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                job = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                save(*job)
+            except Exception as e:
+                print(f"Failed to write checkpoint '{job[0]}': {e}")
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+    
+    def shutdown(self):
+        """Finish writing any pending checkpoint and stop the thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
@@ -0,0 +1,153 @@
+import ctypes
+import math
+from OpenGL.GL import *
+
+class ResolutionController:
+    """Picks the internal render scale that keeps measured frame cost within a target frame rate.
+    
+    Fill cost grows with the square of the scale, so each adjustment moves the scale by the square
+    root of budget / cost, damped and quantized to avoid reallocating or flickering between
+    neighbouring sizes. Frame cost is the GPU time of a frame, the part the scale changes; CPU time
+    and waits for vsync do not depend on it.
+    """
+    
+    def __init__(self, target_fps=60.0, min_scale=0.5, max_scale=1.0, step=0.05, smoothing=0.2, headroom=0.9):
+        self.budget_ms = 1000.0 / target_fps * headroom
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.smoothing = smoothing
+        self.scale = max_scale
+        self.frame_ms = None
+    
+    def update(self, gpu_ms):
+        """Fold in one frame's GPU time and return the scale for the next frame"""
+        cost = gpu_ms
+        if self.frame_ms is None:
+            self.frame_ms = cost
+        else:
+            self.frame_ms += (cost - self.frame_ms) * self.smoothing
+        
+        # Leave the scale alone within 10% of the budget, so it settles instead of oscillating
+        ratio = self.budget_ms / max(self.frame_ms, 1e-3)
+        if 0.9 <= ratio <= 1.1:
+            return self.scale
+        
+        wanted = self.scale * math.sqrt(ratio)
+        wanted = self.scale + (wanted - self.scale) * 0.5
+        wanted = round(round(wanted / self.step) * self.step, 6)
+        self.scale = min(self.max_scale, max(self.min_scale, wanted))
+        return self.scale
+
+class ScaledRenderTarget:
+    """Offscreen framebuffer the scene is drawn into at a fraction of the window size, then upscaled.
+    
+    Storage is allocated once at window size and a scaled corner of it is rendered, so changing the
+    scale costs nothing. The corner is stretched to the window with a linear-filtered blit. GPU time
+    is the difference of two timestamp queries around the scene, from a ring of query pairs read
+    frames later, so reading them never stalls the pipeline; when every pair is still waiting on the
+    GPU, the frame goes unmeasured.
+    """
+    
+    QUERY_COUNT = 3
+    
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.scale = 1.0
+        self.viewport = (width, height)
+        
+        self.framebuffer = glGenFramebuffers(1)
+        self.color = glGenRenderbuffers(1)
+        self.depth = glGenRenderbuffers(1)
+        
+        glBindRenderbuffer(GL_RENDERBUFFER, self.color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.depth)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.color)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, self.depth)
+        complete = glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if not complete:
+            self.cleanup()
+            raise RuntimeError("Scaled render target framebuffer is incomplete")
+        
+        # Start and end timestamp queries of each slot; one slot is recorded while older ones wait for results
+        self.queries = list(glGenQueries(2 * self.QUERY_COUNT))
+        self.query_pending = [False] * self.QUERY_COUNT
+        self.query_index = 0
+        self.query_active = False
+        self.gpu_ms = None
+    
+    def begin(self, scale):
+        """Bind the framebuffer with a viewport covering scale of the window"""
+        self.scale = scale
+        self.viewport = (max(1, int(self.width * scale)), max(1, int(self.height * scale)))
+        glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+        glViewport(0, 0, *self.viewport)
+        
+        # Take the next slot whose results have arrived; reusing a pending one would wait for the GPU,
+        # so with none free the frame goes untimed. A frame that failed before end() never marked its
+        # slot pending, so the slot is simply reused.
+        self.query_active = False
+        for offset in range(self.QUERY_COUNT):
+            index = (self.query_index + offset) % self.QUERY_COUNT
+            self._collect(index)
+            if not self.query_pending[index]:
+                self.query_index = index
+                glQueryCounter(self.queries[2 * index], GL_TIMESTAMP)
+                self.query_active = True
+                break
+    
+    def end(self):
+        """Stretch the rendered corner over the window and restore the default framebuffer"""
+        if self.query_active:
+            glQueryCounter(self.queries[2 * self.query_index + 1], GL_TIMESTAMP)
+            self.query_active = False
+            self.query_pending[self.query_index] = True
+            self.query_index = (self.query_index + 1) % self.QUERY_COUNT
+        
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.framebuffer)
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+        glBlitFramebuffer(0, 0, self.viewport[0], self.viewport[1], 0, 0, self.width, self.height,
+                          GL_COLOR_BUFFER_BIT, GL_LINEAR)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(0, 0, self.width, self.height)
+        
+        # Oldest first, so the newest finished frame's time is the one kept
+        for offset in range(self.QUERY_COUNT):
+            self._collect((self.query_index + offset) % self.QUERY_COUNT)
+    
+    def take_gpu_ms(self):
+        """GPU time of the newest frame measured since the last call, or None"""
+        gpu_ms, self.gpu_ms = self.gpu_ms, None
+        return gpu_ms
+    
+    def _collect(self, index):
+        """Read an earlier frame's timestamps, if the GPU has finished it"""
+        if not self.query_pending[index]:
+            return
+        start, end = self.queries[2 * index], self.queries[2 * index + 1]
+        try:
+            # The end timestamp is written after the start, so once it is available both are
+            if glGetQueryObjectiv(end, GL_QUERY_RESULT_AVAILABLE):
+                started, ended = GLuint64(0), GLuint64(0)
+                glGetQueryObjectui64v(start, GL_QUERY_RESULT, ctypes.byref(started))
+                glGetQueryObjectui64v(end, GL_QUERY_RESULT, ctypes.byref(ended))
+                self.gpu_ms = (ended.value - started.value) / 1e6
+                self.query_pending[index] = False
+        except Exception as e:
+            self.query_pending[index] = False
+    
+    def cleanup(self):
+        try:
+            glDeleteFramebuffers(1, [self.framebuffer])
+            glDeleteRenderbuffers(2, [self.color, self.depth])
+            if getattr(self, 'queries', None):
+                glDeleteQueries(len(self.queries), self.queries)
+        except Exception as e:
+            pass
@@ -1,36 +1,139 @@
 import os
+import ctypes
 import numpy as np
-from pygltflib import GLTF2
-from PIL import Image
 from OpenGL.GL import *
 import io
+from functools import partial
 from pathlib import Path
+from glb_reader import GLBReader
+from resource_registry import registry, content_hash
+from tracing import tracer
+from render_state import gl_state
+
+def _delete_vertex_array(buffer_keys, vao):
+    glDeleteVertexArrays(1, [vao])
+    for key in buffer_keys:
+        registry.release(key)
+
+def _delete_buffer(vbo):
+    glDeleteBuffers(1, [vbo])
+
+def _delete_texture(texture_id):
+    glDeleteTextures([texture_id])
+
+def _buffer_key(upload_dtype, array):
+    """Registry key of the buffer an array uploads to, as the upload dtype and the source data.
+    
+    The source dtype and shape are part of it, as arrays of different types can share their bytes.
+    Strided accessor views are hashed through a temporary packed copy.
+    """
+    return ('buffer', upload_dtype, array.dtype.str, array.shape, content_hash(np.ascontiguousarray(array)))
+
+def _register_or_share(key, resource, release):
+    """Register a freshly uploaded resource, unless another loader finished uploading the same content first"""
+    shared = registry.acquire(key)
+    if shared is not None:
+        release(resource)
+        return shared
+    return registry.register(key, resource, release=release)
+
+def _drop_pixels(model):
+    # Decoded pixels are only needed until every loader sharing the model has uploaded it
+    for texture_data in model['textures']:
+        texture_data.pop('pixels', None)
 
 class GLBLoader:
+    # Largest amount of data sent to GL in a single upload step
+    UPLOAD_CHUNK_BYTES = 1 << 20
+    
     def __init__(self, base_path=""):
         self.base_path = base_path
         self.gltf = None
+        self.reader = None
         self.meshes = []
         self.textures = []
         self.materials = []
         self.vaos = []
         self.vbos = []
         self.texture_ids = []
-
+        self.texture_hashes = []
+        self.model_key = None
+        self._resource_keys = []
+    
     def load(self, file_name):
+        """Decode and upload a model in one go"""
+        with tracer.span(f"load {file_name}", "loader"):
+            self.decode(file_name)
+            with tracer.span("upload_buffers", "loader"):
+                for _ in self.upload_steps():
+                    pass
+    
+    def decode(self, file_name):
+        """Parse the model into CPU-side arrays without touching GL, so it can run on a worker thread"""
         file_path = os.path.join(self.base_path, "models", file_name)
         
-        try:
-            self.gltf = GLTF2().load(file_path)
-            
+        with tracer.span(f"decode {file_name}", "loader"):
             self._clear_previous_data()
+            
+            with tracer.span("map_file", "loader"):
+                reader = GLBReader(file_path)
+            
+            # Decoded arrays are views of the mapping and keep it alive; closing drops everything else
+            with reader:
+                # Loaders of the same file content share one decode; the entry lives until all of them have uploaded
+                self.model_key = ('model', file_name, content_hash(reader.data))
+                model = registry.acquire_or_create(
+                    self.model_key,
+                    lambda: self._decode_model(reader),
+                    release=_drop_pixels
+                )
+            self.reader = None
+            self.gltf = model['gltf']
+            self.meshes = model['meshes']
+            self.textures = model['textures']
+            self.materials = model['materials']
+    
+    def _decode_model(self, reader):
+        self.reader = reader
+        self.gltf = reader.json
+        
+        with tracer.span("decode_textures", "loader"):
             self._load_textures()
+            self._decode_pixels()
+        with tracer.span("load_materials", "loader"):
             self._load_materials()
+        with tracer.span("load_meshes", "loader"):
             self._load_meshes()
-            self._setup_opengl_buffers()
-        except Exception as e:
-            raise
-
+            self._prepare_upload_arrays()
+        
+        return {
+            'gltf': self.gltf,
+            'meshes': self.meshes,
+            'textures': self.textures,
+            'materials': self.materials
+        }
+    
+    def _prepare_upload_arrays(self):
+        """Hash the attribute views so identical data is uploaded only once; conversion to the GL layout waits for upload"""
+        for mesh in self.meshes:
+            for primitive in mesh['primitives']:
+                vertex_buffers = []
+                for location, name, size in ((0, 'POSITION', 3), (1, 'NORMAL', 3), (2, 'TEXCOORD_0', 2)):
+                    if name in primitive['attributes']:
+                        array = primitive['attributes'][name]
+                        key = _buffer_key('float32', array)
+                        vertex_buffers.append((location, size, array, key))
+                primitive['vertex_buffers'] = vertex_buffers
+                
+                primitive['index_buffer'] = None
+                if primitive['indices'] is not None:
+                    indices = primitive['indices']
+                    primitive['index_buffer'] = (indices, _buffer_key('uint32', indices))
+        
+        for texture_data in self.textures:
+            if 'pixels' in texture_data:
+                texture_data['pixels_hash'] = content_hash(texture_data['pixels'])
+    
     def _clear_previous_data(self):
         self.meshes = []
         self.textures = []
@@ -38,22 +141,28 @@ class GLBLoader:
         self.vaos = []
         self.vbos = []
         self.texture_ids = []
-
+        self.texture_hashes = []
+    
     def _load_textures(self):
-        if not self.gltf.textures:
+        if not self.gltf.get('textures'):
             return
-            
-        for texture in self.gltf.textures:
+        
+        # Pillow is only needed once a model is actually loaded
+        from PIL import Image
+        
+        images = self.gltf.get('images', [])
+        for texture in self.gltf['textures']:
+            source = texture.get('source')
             texture_data = {
-                'index': texture.source,
-                'name': texture.name or f"texture_{len(self.textures)}"
+                'index': source,
+                'name': texture.get('name') or f"texture_{len(self.textures)}"
             }
             
-            if texture.source is not None and texture.source < len(self.gltf.images):
-                image = self.gltf.images[texture.source]
+            if source is not None and source < len(images):
+                image = images[source]
                 
-                if hasattr(image, 'uri') and image.uri:
-                    texture_path = os.path.join(self.base_path, "models", image.uri)
+                if image.get('uri'):
+                    texture_path = os.path.join(self.base_path, "models", image['uri'])
                     try:
                         with Image.open(texture_path) as img:
                             img = img.convert("RGBA")
@@ -65,36 +174,25 @@ class GLBLoader:
                             })
                     except Exception as e:
                         continue
-                
-                elif hasattr(image, 'bufferView'):
-                    buffer_view = self.gltf.bufferViews[image.bufferView]
-                    buffer = self.gltf.buffers[buffer_view.buffer]
-                    data = self.gltf.get_data_from_buffer_uri(buffer.uri)
                     
-                    start = buffer_view.byteOffset or 0
-                    end = start + buffer_view.byteLength
-                    image_data = data[start:end]
+                elif image.get('bufferView') is not None:
+                    image_data = self.reader.buffer_view(image['bufferView'])
                     
                     try:
-                        if hasattr(image, 'mimeType'):
-                            if image.mimeType == 'image/png':
-                                img = Image.open(io.BytesIO(image_data))
-                            elif image.mimeType == 'image/jpeg':
-                                img = Image.open(io.BytesIO(image_data))
-                            else:
-                                if hasattr(image, 'width') and hasattr(image, 'height'):
-                                    img = Image.frombytes(
-                                        'RGBA',
-                                        (image.width, image.height),
-                                        image_data,
-                                        'raw',
-                                        'RGBA',
-                                        0, 1
-                                    )
-                                else:
-                                    raise ValueError("Embedded texture missing dimensions")
-                        else:
+                        mime_type = image.get('mimeType')
+                        if mime_type in (None, 'image/png', 'image/jpeg'):
                             img = Image.open(io.BytesIO(image_data))
+                        elif 'width' in image and 'height' in image:
+                            img = Image.frombytes(
+                                'RGBA',
+                                (image['width'], image['height']),
+                                image_data,
+                                'raw',
+                                'RGBA',
+                                0, 1
+                            )
+                        else:
+                            raise ValueError("Embedded texture missing dimensions")
                         
                         texture_data.update({
                             'image': img,
@@ -106,232 +204,284 @@ class GLBLoader:
                         continue
                 
                 self.textures.append(texture_data)
-
+    
+    def _decode_pixels(self):
+        """Force image decoding so the upload steps only copy ready RGBA rows; the PIL image is dropped once decoded"""
+        for texture_data in self.textures:
+            if 'image' not in texture_data:
+                continue
+            
+            img = texture_data.pop('image')
+            if img.mode != 'RGBA':
+                img = img.convert('RGBA')
+            
+            img_data = np.asarray(img)
+            if len(img_data.shape) < 3 or img_data.shape[2] != 4:
+                img_data = np.array(list(img.getdata()), np.uint8).reshape(img.height, img.width, 4)
+            
+            texture_data['pixels'] = np.ascontiguousarray(img_data, dtype=np.uint8)
+            texture_data['has_texture'] = True
+            img.close()
+    
     def _load_materials(self):
-        if not self.gltf.materials:
+        if not self.gltf.get('materials'):
             return
-            
-        for material in self.gltf.materials:
-            pbr = material.pbrMetallicRoughness if hasattr(material, 'pbrMetallicRoughness') else None
+        
+        for material in self.gltf['materials']:
+            pbr = material.get('pbrMetallicRoughness')
             material_data = {
-                'name': material.name or f"material_{len(self.materials)}",
-                'baseColorFactor': pbr.baseColorFactor if pbr else [1.0, 1.0, 1.0, 1.0],
-                'metallicFactor': pbr.metallicFactor if pbr else 0.5,
-                'roughnessFactor': pbr.roughnessFactor if pbr else 0.5,
+                'name': material.get('name') or f"material_{len(self.materials)}",
+                'baseColorFactor': pbr.get('baseColorFactor', [1.0, 1.0, 1.0, 1.0]) if pbr is not None else [1.0, 1.0, 1.0, 1.0],
+                'metallicFactor': pbr.get('metallicFactor', 1.0) if pbr is not None else 0.5,
+                'roughnessFactor': pbr.get('roughnessFactor', 1.0) if pbr is not None else 0.5,
             }
             self.materials.append(material_data)
-
+    
     def _load_meshes(self):
-        if not self.gltf.meshes:
+        """Collect each primitive's attributes and indices as zero-copy views into the mapped file"""
+        if not self.gltf.get('meshes'):
             return
-                
-        for mesh in self.gltf.meshes:
+        
+        for mesh in self.gltf['meshes']:
             mesh_data = {
-                'name': mesh.name or f"mesh_{len(self.meshes)}",
+                'name': mesh.get('name') or f"mesh_{len(self.meshes)}",
                 'primitives': []
             }
             
-            for primitive in mesh.primitives:
+            for primitive in mesh['primitives']:
                 primitive_data = {
                     'attributes': {},
                     'indices': None,
-                    'material': primitive.material if hasattr(primitive, 'material') else None
+                    'material': primitive.get('material')
                 }
                 
-                attribute_names = [attr for attr in dir(primitive.attributes) 
-                                if not attr.startswith('_') and 
-                                hasattr(primitive.attributes, attr)]
-                
-                for attr in attribute_names:
-                    accessor_idx = getattr(primitive.attributes, attr)
-                    if isinstance(accessor_idx, int):
-                        accessor = self.gltf.accessors[accessor_idx]
-                        buffer_view = self.gltf.bufferViews[accessor.bufferView]
-                        buffer = self.gltf.buffers[buffer_view.buffer]
-                        data = self.gltf.get_data_from_buffer_uri(buffer.uri)
-                        
-                        start = (buffer_view.byteOffset or 0) + (accessor.byteOffset or 0)
-                        component_count = {
-                            'SCALAR': 1,
-                            'VEC2': 2,
-                            'VEC3': 3,
-                            'VEC4': 4,
-                            'MAT2': 4,
-                            'MAT3': 9,
-                            'MAT4': 16
-                        }.get(accessor.type, 3)
-                        
-                        dtype = self._get_numpy_dtype(accessor.componentType)
-                        bytes_per_component = np.dtype(dtype).itemsize
-                        total_bytes = accessor.count * component_count * bytes_per_component
-                        buffer_data = data[start:start + total_bytes]
-                        
-                        try:
-                            array = np.frombuffer(buffer_data, dtype=dtype)
-                            if len(array) == accessor.count * component_count:
-                                array = array.reshape((accessor.count, component_count))
-                            primitive_data['attributes'][attr] = array
-                        except ValueError as e:
-                            continue
+                for attr, accessor_idx in primitive.get('attributes', {}).items():
+                    try:
+                        primitive_data['attributes'][attr] = self.reader.accessor(accessor_idx)
+                    except ValueError as e:
+                        continue
                 
-                if hasattr(primitive, 'indices') and isinstance(primitive.indices, int):
-                    accessor = self.gltf.accessors[primitive.indices]
-                    buffer_view = self.gltf.bufferViews[accessor.bufferView]
-                    buffer = self.gltf.buffers[buffer_view.buffer]
-                    data = self.gltf.get_data_from_buffer_uri(buffer.uri)
-                    
-                    start = (buffer_view.byteOffset or 0) + (accessor.byteOffset or 0)
-                    dtype = self._get_numpy_dtype(accessor.componentType)
-                    bytes_per_component = np.dtype(dtype).itemsize
-                    total_bytes = accessor.count * bytes_per_component
-                    buffer_data = data[start:start + total_bytes]
-                    
+                if isinstance(primitive.get('indices'), int):
                     try:
-                        indices = np.frombuffer(buffer_data, dtype=dtype)
-                        primitive_data['indices'] = indices
+                        primitive_data['indices'] = self.reader.accessor(primitive['indices']).reshape(-1)
                     except ValueError as e:
                         continue
                 
                 mesh_data['primitives'].append(primitive_data)
             
             self.meshes.append(mesh_data)
-
-    def _setup_opengl_buffers(self):
+    
+    def upload_steps(self):
+        """Generator that uploads the decoded model to GL, yielding after each chunk-sized step.
+        
+        Each step leaves no VAO bound, so callers can render a frame between steps. Buffers, VAOs
+        and textures whose content is already on the GPU are shared instead of uploaded again.
+        """
         try:
             for i, mesh in enumerate(self.meshes):
                 for j, primitive in enumerate(mesh['primitives']):
                     try:
-                        vao = glGenVertexArrays(1)
-                        glBindVertexArray(vao)
-                        
-                        if 'POSITION' in primitive['attributes']:
-                            positions = primitive['attributes']['POSITION'].astype(np.float32)
-                            vbo = glGenBuffers(1)
-                            glBindBuffer(GL_ARRAY_BUFFER, vbo)
-                            glBufferData(GL_ARRAY_BUFFER, positions.nbytes, positions, GL_STATIC_DRAW)
-                            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
-                            glEnableVertexAttribArray(0)
-                            self.vbos.append(vbo)
-                        
-                        if 'NORMAL' in primitive['attributes']:
-                            normals = primitive['attributes']['NORMAL'].astype(np.float32)
-                            vbo = glGenBuffers(1)
-                            glBindBuffer(GL_ARRAY_BUFFER, vbo)
-                            glBufferData(GL_ARRAY_BUFFER, normals.nbytes, normals, GL_STATIC_DRAW)
-                            glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 0, None)
-                            glEnableVertexAttribArray(1)
-                            self.vbos.append(vbo)
-                        
-                        if 'TEXCOORD_0' in primitive['attributes']:
-                            texcoords = primitive['attributes']['TEXCOORD_0'].astype(np.float32)
-                            vbo = glGenBuffers(1)
-                            glBindBuffer(GL_ARRAY_BUFFER, vbo)
-                            glBufferData(GL_ARRAY_BUFFER, texcoords.nbytes, texcoords, GL_STATIC_DRAW)
-                            glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, 0, None)
-                            glEnableVertexAttribArray(2)
-                            self.vbos.append(vbo)
-                        
-                        if primitive['indices'] is not None:
-                            indices = primitive['indices'].astype(np.uint32)
-                            vbo = glGenBuffers(1)
-                            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, vbo)
-                            glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
-                            self.vbos.append(vbo)
-                        
+                        vao = yield from self._acquire_vertex_array(primitive)
                         self.vaos.append(vao)
+                        yield
                         
                         if primitive['material'] is not None and primitive['material'] < len(self.textures):
                             texture_data = self.textures[primitive['material']]
-                            if 'image' in texture_data:
-                                texture_id = glGenTextures(1)
-                                glBindTexture(GL_TEXTURE_2D, texture_id)
-                                
+                            if 'pixels_hash' in texture_data:
                                 try:
-                                    img = texture_data['image']
-                                    
-                                    if img.mode != 'RGBA':
-                                        img = img.convert('RGBA')
-                                    
-                                    img_data = np.array(img)
-                                    if len(img_data.shape) < 3 or img_data.shape[2] != 4:
-                                        img_data = np.array(list(img.getdata()), np.uint8).reshape(img.height, img.width, 4)
-                                    
-                                    glTexImage2D(
-                                        GL_TEXTURE_2D, 
-                                        0, 
-                                        GL_RGBA, 
-                                        img.width, 
-                                        img.height, 
-                                        0, 
-                                        GL_RGBA, 
-                                        GL_UNSIGNED_BYTE, 
-                                        img_data.flatten()
-                                    )
-                                    
-                                    error = glGetError()
-                                    
-                                    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-                                    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-                                    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
-                                    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
-                                    
+                                    texture_id = yield from self._acquire_texture(texture_data)
                                     self.texture_ids.append(texture_id)
+                                    self.texture_hashes.append(texture_data['pixels_hash'])
                                 except Exception as tex_err:
                                     pass
                         
                         error = glGetError()
-                    
+                        
                     except Exception as prim_err:
                         pass
+        finally:
+            self._release_model()
+    
+    def _release_model(self):
+        if self.model_key is not None:
+            registry.release(self.model_key)
+            self.model_key = None
+    
+    def _acquire_vertex_array(self, primitive):
+        index_buffer = primitive['index_buffer']
+        vao_key = (
+            'vao',
+            tuple((location, size, key) for location, size, _, key in primitive['vertex_buffers']),
+            index_buffer[1] if index_buffer else None
+        )
         
-        except Exception as e:
-            pass
-
-    def _get_numpy_dtype(self, component_type):
-        if isinstance(component_type, int):
-            type_map = {
-                5120: np.int8,
-                5121: np.uint8,
-                5122: np.int16,
-                5123: np.uint16,
-                5125: np.uint32,
-                5126: np.float32
-            }
-            return type_map.get(component_type, np.float32)
-        return np.float32
-
-    def render(self, shader_program):
+        vao = registry.acquire(vao_key)
+        if vao is not None:
+            self._resource_keys.append(vao_key)
+            return vao
+        
+        # The VAO owns references to its buffers and drops them when it is deleted
+        buffer_keys = []
+        try:
+            attribute_buffers = []
+            for location, size, array, key in primitive['vertex_buffers']:
+                vbo = yield from self._acquire_buffer(array, key)
+                buffer_keys.append(key)
+                attribute_buffers.append((location, size, vbo))
+            
+            ebo = None
+            if index_buffer is not None:
+                ebo = yield from self._acquire_buffer(*index_buffer)
+                buffer_keys.append(index_buffer[1])
+        except BaseException:
+            for key in buffer_keys:
+                registry.release(key)
+            raise
+        
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+        
+        for location, size, vbo in attribute_buffers:
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            glVertexAttribPointer(location, size, GL_FLOAT, GL_FALSE, 0, None)
+            glEnableVertexAttribArray(location)
+        
+        if ebo is not None:
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, ebo)
+        
+        glBindVertexArray(0)
+        
+        vao = _register_or_share(vao_key, vao, release=partial(_delete_vertex_array, tuple(buffer_keys)))
+        self._resource_keys.append(vao_key)
+        return vao
+    
+    def _acquire_buffer(self, array, key):
+        vbo = registry.acquire(key)
+        if vbo is None:
+            # Registered only once uploaded, so no other loader can draw from a partly filled buffer
+            vbo = glGenBuffers(1)
+            try:
+                yield from self._upload_buffer_steps(vbo, array, np.dtype(key[1]))
+            except BaseException:
+                glDeleteBuffers(1, [vbo])
+                raise
+            vbo = _register_or_share(key, vbo, release=_delete_buffer)
+        
+        self.vbos.append(vbo)
+        return vbo
+    
+    def _upload_buffer_steps(self, vbo, data, dtype):
+        """Upload an array into a buffer object in chunks, packing each chunk to dtype only as it is sent"""
+        row_bytes = dtype.itemsize * (data.shape[1] if data.ndim > 1 else 1)
+        rows_per_chunk = max(1, self.UPLOAD_CHUNK_BYTES // row_bytes)
+        
+        # GL_COPY_WRITE_BUFFER leaves the array/element bindings of whatever VAO is bound alone
+        glBindBuffer(GL_COPY_WRITE_BUFFER, vbo)
+        glBufferData(GL_COPY_WRITE_BUFFER, len(data) * row_bytes, None, GL_STATIC_DRAW)
+        
+        for row in range(0, len(data), rows_per_chunk):
+            chunk = np.ascontiguousarray(data[row:row + rows_per_chunk], dtype=dtype)
+            glBindBuffer(GL_COPY_WRITE_BUFFER, vbo)
+            glBufferSubData(GL_COPY_WRITE_BUFFER, row * row_bytes, chunk.nbytes, chunk)
+            glBindBuffer(GL_COPY_WRITE_BUFFER, 0)
+            yield
+    
+    def _acquire_texture(self, texture_data):
+        key = ('texture', texture_data['pixels_hash'])
+        texture_id = registry.acquire(key)
+        if texture_id is None:
+            texture_id = glGenTextures(1)
+            try:
+                yield from self._upload_texture_steps(texture_id, texture_data['pixels'])
+            except BaseException:
+                glDeleteTextures([texture_id])
+                raise
+            texture_id = _register_or_share(key, texture_id, release=_delete_texture)
+        
+        self._resource_keys.append(key)
+        return texture_id
+    
+    def _upload_texture_steps(self, texture_id, pixels):
+        """Stream RGBA rows into a texture through a pixel buffer object, one band per step"""
+        height, width = pixels.shape[:2]
+        band_rows = max(1, self.UPLOAD_CHUNK_BYTES // (width * 4))
+        
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        
+        pbo = glGenBuffers(1)
+        try:
+            for y in range(0, height, band_rows):
+                band = pixels[y:y + band_rows]
+                
+                # Re-specifying the store orphans the previous band, so the driver never has to wait on it
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+                glBufferData(GL_PIXEL_UNPACK_BUFFER, band.nbytes, band, GL_STREAM_DRAW)
+                glBindTexture(GL_TEXTURE_2D, texture_id)
+                glTexSubImage2D(GL_TEXTURE_2D, 0, 0, y, width, band.shape[0],
+                                GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+                glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+                yield
+        finally:
+            glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+            glDeleteBuffers(1, [pbo])
+    
+    def draw_items(self):
+        """Geometry of each uploaded primitive with the texture render() binds for it.
+        
+        Returns (mesh_key, attributes, indices, texture) tuples, where texture is a (texture_id, pixels_hash)
+        pair, or None where render() leaves the previously bound texture in place.
+        """
+        items = []
+        for i, mesh in enumerate(self.meshes):
+            for j, primitive in enumerate(mesh['primitives']):
+                vao_index = i * len(mesh['primitives']) + j
+                if vao_index >= len(self.vaos) or 'POSITION' not in primitive['attributes']:
+                    continue
+                
+                texture = None
+                material = primitive['material']
+                if (material is not None and material < len(self.texture_ids) and
+                    material < len(self.textures) and self.textures[material].get('has_texture')):
+                    texture = (self.texture_ids[material], self.texture_hashes[material])
+                
+                indices = primitive['indices']
+                if indices is None:
+                    indices = np.arange(len(primitive['attributes']['POSITION']), dtype=np.uint32)
+                    index_key = ('sequence', len(indices))
+                else:
+                    index_key = primitive['index_buffer'][1]
+                
+                mesh_key = (tuple(key for _, _, _, key in primitive['vertex_buffers']), index_key)
+                items.append((mesh_key, primitive['attributes'], indices, texture))
+        return items
+    
+    def render(self, shader):
+        """Draw every primitive; binds and uniforms that are already current are skipped"""
         for i, mesh in enumerate(self.meshes):
             for j, primitive in enumerate(mesh['primitives']):
                 vao_index = i * len(mesh['primitives']) + j
                 if vao_index >= len(self.vaos):
                     continue
                 
-                glBindVertexArray(self.vaos[vao_index])
+                gl_state.bind_vertex_array(self.vaos[vao_index])
                 
                 if primitive['material'] is not None and primitive['material'] < len(self.materials):
                     material = self.materials[primitive['material']]
-                    glUniform4f(
-                        glGetUniformLocation(shader_program, "baseColor"), 
-                        *material['baseColorFactor']
-                    )
-                    glUniform1f(
-                        glGetUniformLocation(shader_program, "metallicFactor"), 
-                        material['metallicFactor']
-                    )
-                    glUniform1f(
-                        glGetUniformLocation(shader_program, "roughnessFactor"), 
-                        material['roughnessFactor']
-                    )
+                    shader.set_vec4("baseColor", material['baseColorFactor'])
+                    shader.set_float("metallicFactor", material['metallicFactor'])
+                    shader.set_float("roughnessFactor", material['roughnessFactor'])
                 
                 if (primitive['material'] is not None and 
                     primitive['material'] < len(self.texture_ids) and 
                     primitive['material'] < len(self.textures) and 
-                    'image' in self.textures[primitive['material']]):
+                    self.textures[primitive['material']].get('has_texture')):
                     
-                    glActiveTexture(GL_TEXTURE0)
-                    glBindTexture(GL_TEXTURE_2D, self.texture_ids[primitive['material']])
-                    glUniform1i(glGetUniformLocation(shader_program, "texture_diffuse"), 0)
+                    gl_state.bind_texture(0, GL_TEXTURE_2D, self.texture_ids[primitive['material']])
                 
                 if primitive['indices'] is not None:
                     glDrawElements(
@@ -346,13 +496,15 @@ class GLBLoader:
                         0, 
                         len(primitive['attributes']['POSITION'])
                     )
-                
-                glBindVertexArray(0)
-
+                gl_state.count()
+    
     def cleanup(self):
-        if self.vaos:
-            glDeleteVertexArrays(len(self.vaos), self.vaos)
-        if self.vbos:
-            glDeleteBuffers(len(self.vbos), self.vbos)
-        if self.texture_ids:
-            glDeleteTextures(self.texture_ids)
\ No newline at end of file
+        """Release this loader's references; shared GL objects are deleted once their last user is gone"""
+        for key in self._resource_keys:
+            registry.release(key)
+        self._resource_keys = []
+        self._release_model()
+        
+        self.vaos = []
+        self.vbos = []
+        self.texture_ids = []
\ No newline at end of file
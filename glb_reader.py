@@ -0,0 +1,123 @@
+import json
+import mmap
+import struct
+import numpy as np
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_COUNTS = {
+    'SCALAR': 1,
+    'VEC2': 2,
+    'VEC3': 3,
+    'VEC4': 4,
+    'MAT2': 4,
+    'MAT3': 9,
+    'MAT4': 16
+}
+
+COMPONENT_DTYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32
+}
+
+class GLBReader:
+    """Memory-maps a binary glTF file and serves accessors as zero-copy views into its BIN chunk"""
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        
+        # The mapping keeps its own handle, so the file can be closed straight away
+        with open(file_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        self.data = memoryview(self._mmap)
+        self.json = None
+        self.bin = None
+        self._parse_chunks()
+    
+    def _parse_chunks(self):
+        magic, version, length = struct.unpack_from('<4sII', self.data, 0)
+        if magic != GLB_MAGIC:
+            raise ValueError(f"Not a GLB file: {self.file_path}")
+        if version != 2:
+            raise ValueError(f"Unsupported GLB version {version}: {self.file_path}")
+        
+        offset = 12
+        end = min(length, len(self.data))
+        while offset + 8 <= end:
+            chunk_length, chunk_type = struct.unpack_from('<II', self.data, offset)
+            chunk = self.data[offset + 8:offset + 8 + chunk_length]
+            
+            if chunk_type == CHUNK_JSON and self.json is None:
+                self.json = json.loads(bytes(chunk))
+            elif chunk_type == CHUNK_BIN and self.bin is None:
+                self.bin = chunk
+            
+            # Chunks are padded to 4-byte boundaries
+            offset += 8 + ((chunk_length + 3) & ~3)
+        
+        if self.json is None:
+            raise ValueError(f"GLB file has no JSON chunk: {self.file_path}")
+    
+    def buffer_view(self, index):
+        """Bytes of a bufferView as a memoryview into the mapped file"""
+        view = self.json['bufferViews'][index]
+        if view.get('buffer', 0) != 0 or 'uri' in self.json['buffers'][view.get('buffer', 0)]:
+            raise ValueError("Only the embedded GLB buffer is supported")
+        
+        start = view.get('byteOffset', 0)
+        return self.bin[start:start + view['byteLength']]
+    
+    def accessor(self, index):
+        """Accessor data as a read-only NumPy view, (count, components) or (count,) for scalars"""
+        accessor = self.json['accessors'][index]
+        dtype = np.dtype(COMPONENT_DTYPES.get(accessor['componentType'], np.float32))
+        components = COMPONENT_COUNTS.get(accessor['type'], 3)
+        count = accessor['count']
+        shape = (count,) if components == 1 else (count, components)
+        
+        if 'bufferView' not in accessor:
+            return np.zeros(shape, dtype=dtype)
+        
+        view = self.json['bufferViews'][accessor['bufferView']]
+        data = self.buffer_view(accessor['bufferView'])
+        offset = accessor.get('byteOffset', 0)
+        element_size = dtype.itemsize * components
+        stride = view.get('byteStride') or element_size
+        
+        if count == 0:
+            return np.zeros(shape, dtype=dtype)
+        
+        needed = offset + stride * (count - 1) + element_size
+        if needed > len(data):
+            raise ValueError(f"Accessor {index} overruns its bufferView")
+        
+        # np.frombuffer holds a buffer export, which keeps close() from unmapping data this view still uses
+        strides = (stride,) if components == 1 else (stride, dtype.itemsize)
+        return np.ndarray(shape=shape, dtype=dtype, buffer=np.frombuffer(data, dtype=np.uint8), offset=offset,
+                          strides=strides)
+    
+    def close(self):
+        """Unmap the file; views still referenced elsewhere keep the mapping alive until collected"""
+        try:
+            if self.bin is not None:
+                self.bin.release()
+            self.data.release()
+            self._mmap.close()
+        except BufferError:
+            pass
+        finally:
+            self.bin = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -1,39 +1,55 @@
+import time
+_import_start = time.perf_counter()
+
 import numpy as np
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
-from OpenGL.GLU import *
 import math
-import time
 from pathlib import Path
 from glb_loader import GLBLoader
-from shader import Shader
+from asset_streamer import AssetStreamer, PlaceholderSphere
+from particles import OrbitalParticles
+from moons import MoonSystem
+from scene_renderer import SceneRenderer
+from texture_array import TextureArray
+from shader import ShaderManager, ProgramBinaryCache
+from tracing import tracer, PhaseTimer
+from telemetry import TelemetryPublisher, free_port
+from render_state import gl_state, DrawList
+from body_catalog import BodyCatalog, PlanetConfig, DEFAULT_CATALOG, BODY_STAR, BODY_RINGED, BODY_MOON, stacked_orbit_radii
+from body_registry import BodyRegistry
+from body_state import BodyState, StateField
+from body_edits import BodyEditor
+from simulation import Simulation
+from dynamic_resolution import ResolutionController, ScaledRenderTarget
+import checkpoint
+from checkpoint import CheckpointWriter, DEFAULT_CHECKPOINT
+from trajectory import TrajectoryRecorder
+from session import SessionRecorder, SessionReplay, state_digest
+from transforms import TransformStage, identity_matrices, translation_matrices, scale_matrices, to_gl_layout
 import glm
-from dataclasses import dataclass
 from typing import List, Dict, Tuple
 import traceback
 import json
-import subprocess
 import os
+import argparse
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
-@dataclass
-class PlanetConfig:
-    name: str
-    model_file: str
-    diameter: float         # in km
-    distance: float         # in million km
-    mass: float             # in 10^24 kg
-    orbit_speed: float      # km/s
-    rotation_period: float  # hours
-    color: Tuple[float, float, float]
-    moons: int
-    has_rings: bool
+startup = PhaseTimer(origin=_import_start)
+startup.add("imports", time.perf_counter() - _import_start)
 
 class PropertyEditorCommunicator:
-    def __init__(self, solar_system):
+    def __init__(self, solar_system, telemetry_hz=20.0):
         self.solar_system = solar_system
         self.current_planet = None
         
+        # Runtime values of the selected body are streamed over localhost UDP instead of the data files
+        self.telemetry_hz = telemetry_hz
+        self.telemetry = None
+        
         # Data files for communication
         self.data_dir = Path(__file__).parent / "property_data"
         self.data_dir.mkdir(exist_ok=True)
@@ -44,7 +60,29 @@ class PropertyEditorCommunicator:
         self.last_change_time = 0
         self.property_editor_process = None
         
+        # Stopping and starting the editor process waits on it, so it runs on a helper thread
+        self.process_jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="property_editor")
+        
+        # While replaying a session no editor is started; its logged changes are applied instead
+        self.headless = False
+        
+        # Applied changes are appended here while a session is recorded
+        self.recorded_changes = None
+        
+        # Changes that trigger an action rather than edit a property
+        self.actions = {
+            'reset_position': lambda: self.current_planet.reset_position(),
+            'reset_all': self.reset_all_properties,
+            'reset_simulation': lambda: self.solar_system.reset_all_simulation(),
+        }
+    
     def close_property_editor(self):
+        self.current_planet = None
+        self._stop_property_editor()
+    
+    def _stop_property_editor(self):
+        import subprocess
+        
         try:
             if self.property_editor_process and self.property_editor_process.poll() is None:
                 shutdown_file = self.data_dir / "shutdown_signal.txt"
@@ -55,33 +93,48 @@ class PropertyEditorCommunicator:
                 except subprocess.TimeoutExpired:
                     self.property_editor_process.kill()
                     self.property_editor_process.wait(timeout=1.0)
-                
-            self.property_editor_process = None
-            self.current_planet = None
             
         except Exception as e:
+            pass
+        finally:
             self.property_editor_process = None
-            self.current_planet = None
+            self._close_telemetry()
+    
+    def _close_telemetry(self):
+        if self.telemetry:
+            self.telemetry.close()
+            self.telemetry = None
     
     def start_property_editor(self):
         try:
-            if self.property_editor_process is None or self.property_editor_process.poll() is not None:
-                script_path = Path(__file__).parent / "property_editor.py"
-                creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-                self.property_editor_process = subprocess.Popen([
-                    "python", str(script_path)
-                ], creationflags=creation_flags)
+            with tracer.span("start_property_editor", "ipc"):
+                self._spawn_property_editor()
         except Exception as e:
             pass
     
+    def _spawn_property_editor(self):
+        import subprocess
+        
+        if self.property_editor_process is None or self.property_editor_process.poll() is not None:
+            script_path = Path(__file__).parent / "property_editor.py"
+            creation_flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+            arguments = ["python", str(script_path)]
+            if self.telemetry_hz > 0:
+                port = free_port()
+                self.telemetry = TelemetryPublisher(port, self.telemetry_hz)
+                arguments += ["--telemetry-port", str(port)]
+            self.property_editor_process = subprocess.Popen(arguments, creationflags=creation_flags)
+    
     def _create_planet_data(self, planet, include_reset_timestamp=False):
         data = {
             'name': planet.config.name,
-            'diameter': planet.config.diameter,
-            'distance': planet.config.distance,
-            'mass': planet.config.mass,
+            'body_id': planet.body_id,
+            'diameter': planet.diameter,
+            'distance': planet.distance,
+            'mass': planet.mass,
             'moons': planet.config.moons,
             'has_rings': planet.config.has_rings,
+            'is_star': bool(planet.flags & BODY_STAR),
             'rotation_speed': planet.rotation_speed,
             'orbit_speed': planet.orbit_speed,
             'rotation_angle': planet.rotation_angle,
@@ -97,23 +150,33 @@ class PropertyEditorCommunicator:
         try:
             data = self._create_planet_data(planet, include_reset_timestamp=True)
             
-            with open(self.planet_data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with tracer.span("write_planet_data", "ipc"):
+                with open(self.planet_data_file, 'w') as f:
+                    json.dump(data, f, indent=2)
             
         except Exception as e:
             pass
     
     def show_planet_properties(self, planet):
+        """Select planet for editing; its data is read here, the editor is restarted on the helper thread"""
+        self.current_planet = planet
+        if self.headless:
+            return
+        
         try:
-            self.close_property_editor()
-            time.sleep(0.1)
-            
-            self.current_planet = planet
-            
             data = self._create_planet_data(planet)
+            self.process_jobs.submit(self._restart_property_editor, data)
+        except Exception as e:
+            pass
+    
+    def _restart_property_editor(self, data):
+        try:
+            self._stop_property_editor()
+            time.sleep(0.1)
             
-            with open(self.planet_data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with tracer.span("write_planet_data", "ipc"):
+                with open(self.planet_data_file, 'w') as f:
+                    json.dump(data, f, indent=2)
             
             self.start_property_editor()
             
@@ -129,150 +192,93 @@ class PropertyEditorCommunicator:
                 if mtime > self.last_change_time:
                     self.last_change_time = mtime
                     
-                    with open(self.changes_file, 'r') as f:
-                        change_data = json.load(f)
-                    
-                    self.apply_property_change(change_data)
+                    with tracer.span("read_property_changes", "ipc"):
+                        with open(self.changes_file, 'r') as f:
+                            change_data = json.load(f)
                     
+                    with tracer.span("apply_property_change", "ipc"):
+                        self.apply_property_change(change_data)
+                    return True
+            
         except Exception as e:
             pass  # File might be being written, ignore errors
+        return False
     
     def apply_property_change(self, change_data):
+        """Apply an edit from the property editor to the selected planet, or with a target to a group of bodies"""
         if not self.current_planet:
             return
         
         try:
+            if self.recorded_changes is not None:
+                self.recorded_changes.append(change_data)
+            
             property_name = change_data['property']
             value = change_data['value']
             
-            if property_name == "rotation_speed":
-                self.current_planet.rotation_speed = value
-            elif property_name == "orbit_speed":
-                self.current_planet.orbit_speed = value
-            elif property_name == "rotation_angle":
-                self.current_planet.rotation_angle = value
-            elif property_name == "scale":
-                self.current_planet.scale = value
-            elif property_name == "diameter":
-                self.current_planet.config.diameter = value
-                self._recalculate_scale(self.current_planet)
-            elif property_name == "distance":
-                self.current_planet.config.distance = value
-                self._recalculate_orbit_radius(self.current_planet)
-            elif property_name == "reset_position":
-                self.current_planet.reset_position()
-            elif property_name == "reset_all":
-                self.reset_all_properties()
-            elif property_name == "reset_simulation":
-                self.solar_system.reset_all_simulation()
-            
-        except Exception as e:
-            pass
-    
-    def _recalculate_orbit_radius(self, planet):
-        """Recalculate orbit radius when distance changes"""
-        try:
-            if planet.config.name == "sun":
-                planet.orbit_radius = 0
+            action = self.actions.get(property_name)
+            if action:
+                action()
                 return
             
-            all_configs = self.solar_system._get_planet_configs()
-            max_real_distance = max(p.distance for p in all_configs if p.name != "sun")
-            distance_scale = 4000.0 / max_real_distance
-            
-            # Calculate minimum separation based on sun's size plus buffer
-            sun_radius = 20.0  # Sun's visual scale
-            buffer_space = 150.0  # Much larger buffer space to prevent swallowing
-            min_separation = sun_radius + buffer_space
+            target = change_data.get('target', 'selected')
+            ids = self.target_ids(target)
+            self.solar_system.body_editor.apply(property_name, value, ids, change_data.get('operation', 'set'))
             
-            scaled_distance = planet.config.distance * distance_scale
-            planet.orbit_radius = max(scaled_distance, min_separation)
+            # The editor only tracks its own edits of the selected planet; refresh it after group edits
+            if target != 'selected' and self.current_planet.body_id in ids:
+                self.update_planet_data(self.current_planet)
             
         except Exception as e:
             pass
     
-    def _recalculate_scale(self, planet):
-        """Recalculate scale when diameter changes"""
-        try:
-            # Get original diameter for this planet
-            original_configs = self.solar_system._get_planet_configs()
-            original_diameter = None
-            
-            for config in original_configs:
-                if config.name == planet.config.name:
-                    original_diameter = config.diameter
-                    break
-            
-            if original_diameter is None:
-                return
-            
-            # Get the original scale from VISUAL_SIZES
-            if planet.config.name in self.solar_system.VISUAL_SIZES:
-                original_scale = self.solar_system.VISUAL_SIZES[planet.config.name]
-                
-                # Calculate proportional scale based on diameter ratio
-                diameter_ratio = planet.config.diameter / original_diameter
-                planet.scale = original_scale * diameter_ratio
-                
-                # Apply reasonable limits to prevent extreme sizes
-                if planet.config.name == "sun":
-                    planet.scale = max(1.0, min(500.0, planet.scale))
-                else:
-                    planet.scale = max(0.1, min(100.0, planet.scale))
-            
-        except Exception as e:
-            pass
+    def target_ids(self, target):
+        """Body ids an edit applies to: the selected planet, 'planets' (every non-star) or 'all'"""
+        editor = self.solar_system.body_editor
+        if target == 'planets':
+            return editor.select(exclude_flags=BODY_STAR)
+        if target == 'all':
+            return editor.select()
+        return [self.current_planet.body_id]
     
     def reset_all_properties(self):
         if not self.current_planet:
             return
         
         try:
-            original_configs = self.solar_system._get_planet_configs()
-            original_config = None
-            
-            for config in original_configs:
-                if config.name == self.current_planet.config.name:
-                    original_config = config
-                    break
-            
-            if original_config:
-                self.current_planet.config.diameter = original_config.diameter
-                self.current_planet.config.distance = original_config.distance
-                self.current_planet.config.mass = original_config.mass
-                self.current_planet.config.orbit_speed = original_config.orbit_speed
-                self.current_planet.config.rotation_period = original_config.rotation_period
-                
-                self.current_planet.orbit_speed = original_config.orbit_speed * 0.02
-                
-                if original_config.name == "sun":
-                    self.current_planet.rotation_speed = 2.0
-                else:
-                    direction = -1 if original_config.rotation_period < 0 else 1
-                    rotation_hours = abs(original_config.rotation_period)
-                    self.current_planet.rotation_speed = direction * (360.0 / (rotation_hours * 3600)) * 100
-                
-                if original_config.name in self.solar_system.VISUAL_SIZES:
-                    self.current_planet.scale = self.solar_system.VISUAL_SIZES[original_config.name]
-                
-                # Restore original orbital position instead of recalculating
-                if original_config.name in self.solar_system.original_orbit_positions:
-                    self.current_planet.orbit_radius = self.solar_system.original_orbit_positions[original_config.name]
-                
+            if self.solar_system.restore_original_properties(self.current_planet):
                 self.current_planet.reset_position()
-                
                 self.update_planet_data(self.current_planet)
             
         except Exception as e:
             pass
     
     def update(self):
-        """Update communicator (called from main loop)"""
-        self.check_property_changes()
+        """Update communicator (called on the simulation thread after each step); True if a change was applied"""
+        with tracer.span("check_property_changes", "ipc"):
+            changed = self.check_property_changes()
+        self.publish_telemetry()
+        return changed
+    
+    def publish_telemetry(self):
+        """Stream the selected body's runtime values to the editor, at most telemetry_hz times a second"""
+        # The helper thread replaces the publisher when it restarts the editor
+        telemetry = self.telemetry
+        planet = self.current_planet
+        if not telemetry or not planet:
+            return
+        
+        try:
+            with tracer.span("publish_telemetry", "ipc"):
+                telemetry.publish(planet.body_id, (planet.orbit_angle, planet.rotation_angle,
+                                                        planet.orbit_speed, planet.rotation_speed, planet.scale))
+        except Exception as e:
+            pass
     
     def cleanup(self):
         """Clean up property editor process"""
         try:
+            self.process_jobs.shutdown(wait=True)
             self.close_property_editor()
         except Exception as e:
             pass
@@ -285,8 +291,9 @@ class Camera:
         self.yaw = 45.0
         self.pitch = -30.0
         
-        # Planet targeting
+        # Planet targeting; positions are the rendered snapshot's, so the target does not run ahead of it
         self.target_planet = None
+        self.positions = None
         self.zoom_distance = None
         
         # Smooth transition properties
@@ -303,6 +310,9 @@ class Camera:
         self.target_pitch = -30.0
         self.start_position = glm.vec3(0, 0, 0)
         self.target_position = glm.vec3(0, 0, 0)
+        
+        # Set whenever the view changes; cleared once a frame has been drawn with it
+        self.dirty = True
     
     def smooth_lerp(self, t):
         """Smooth interpolation function (ease in-out)"""
@@ -310,8 +320,10 @@ class Camera:
     
     def get_planet_position(self, planet):
         """Get current position of a planet"""
-        if planet.config.name == "sun":
+        if planet.flags & BODY_STAR:
             return glm.vec3(0, 0, 0)
+        if self.positions is not None and 0 <= planet.body_id < len(self.positions):
+            return glm.vec3(*self.positions[planet.body_id])
         orbit_x = planet.orbit_radius * math.cos(math.radians(planet.orbit_angle))
         orbit_z = planet.orbit_radius * math.sin(math.radians(planet.orbit_angle))
         return glm.vec3(orbit_x, 0, orbit_z)
@@ -353,16 +365,18 @@ class Camera:
         return glm.perspective(math.radians(45.0), self.width / self.height, 1.0, 50000.0)
     
     def handle_rotation(self, rel_x, rel_y):
-        if not self.is_transitioning:
+        if not self.is_transitioning and (rel_x or rel_y):
+            self.dirty = True
             self.yaw += rel_x * 0.5
             self.pitch = max(-85, min(85, self.pitch - rel_y * 0.5))
     
     def handle_zoom(self, zoom_amount):
         if not self.is_transitioning:
+            self.dirty = True
             if self.target_planet is not None and self.zoom_distance is not None:
                 # Zooming while focused on a planet
                 # Set different minimum distances based on planet type
-                if self.target_planet.config.name == "sun":
+                if self.target_planet.flags & BODY_STAR:
                     planet_min = max(200, self.target_planet.scale * 10)  # Sun minimum farther
                     planet_max = max(1000, self.target_planet.scale * 50)  # Sun maximum much farther
                 else:
@@ -385,7 +399,7 @@ class Camera:
         self.target_position = self.get_planet_position(planet)
         
         if zoom_distance is None:
-            if planet.config.name == "sun":
+            if planet.flags & BODY_STAR:
                 zoom_distance = max(planet.scale * 30, 600)
             else:
                 zoom_distance = max(planet.scale * 2.5, 30)
@@ -398,6 +412,7 @@ class Camera:
         
         self.is_transitioning = True
         self.transition_time = 0.0
+        self.dirty = True
     
     def clear_target(self):
         self.start_distance = self.zoom_distance if self.zoom_distance else self.distance
@@ -415,10 +430,12 @@ class Camera:
         
         self.is_transitioning = True
         self.transition_time = 0.0
+        self.dirty = True
     
     def update(self, dt):
         """Update camera transitions"""
         if self.is_transitioning:
+            self.dirty = True
             self.transition_time += dt
             if self.transition_time >= self.transition_duration:
                 # Transition complete
@@ -430,9 +447,9 @@ class Camera:
 class Starfield:
     def __init__(self, num_stars=2000):
         self.num_stars = num_stars
-        self.star_positions = []
-        self.star_colors = []
-        self.star_brightness = []
+        self.star_positions = None
+        self.star_colors = None
+        self.star_brightness = None
         
         # OpenGL buffers
         self.VAO = None
@@ -444,37 +461,32 @@ class Starfield:
     
     def _generate_stars(self):
         """Generate random star positions and colors"""
-        np.random.seed(42)  # For consistent star pattern
+        rng = np.random.RandomState(42)  # For consistent star pattern
         
         # Generate stars in a large sphere around the solar system
-        for i in range(self.num_stars):
-            # Random spherical coordinates
-            phi = np.random.uniform(0, 2 * np.pi)  # azimuth
-            theta = np.random.uniform(0, np.pi)    # polar angle
-            radius = np.random.uniform(8000, 20000)  # Distance from center
-            
-            # Convert to cartesian coordinates
-            x = radius * np.sin(theta) * np.cos(phi)
-            y = radius * np.sin(theta) * np.sin(phi)
-            z = radius * np.cos(theta)
-            
-            self.star_positions.extend([x, y, z])
-            
-            # Generate star colors (mostly white/blue/yellow with some variety)
-            star_type = np.random.random()
-            brightness = np.random.uniform(0.3, 1.0)
-            
-            if star_type < 0.6:  # White stars
-                color = [brightness, brightness, brightness]
-            elif star_type < 0.8:  # Blue-white stars
-                color = [brightness * 0.8, brightness * 0.9, brightness]
-            elif star_type < 0.95:  # Yellow stars
-                color = [brightness, brightness * 0.9, brightness * 0.7]
-            else:  # Red stars
-                color = [brightness, brightness * 0.6, brightness * 0.4]
-            
-            self.star_colors.extend(color)
-            self.star_brightness.append(brightness)
+        phi = rng.uniform(0, 2 * np.pi, self.num_stars)     # azimuth
+        theta = rng.uniform(0, np.pi, self.num_stars)       # polar angle
+        radius = rng.uniform(8000, 20000, self.num_stars)   # Distance from center
+        
+        # Convert to cartesian coordinates
+        self.star_positions = np.stack([
+            radius * np.sin(theta) * np.cos(phi),
+            radius * np.sin(theta) * np.sin(phi),
+            radius * np.cos(theta)
+        ], axis=1).astype(np.float32)
+        
+        # Generate star colors (mostly white/blue/yellow with some variety)
+        star_type = rng.random_sample(self.num_stars)
+        self.star_brightness = rng.uniform(0.3, 1.0, self.num_stars).astype(np.float32)
+        
+        tints = np.array([
+            [1.0, 1.0, 1.0],   # White stars
+            [0.8, 0.9, 1.0],   # Blue-white stars
+            [1.0, 0.9, 0.7],   # Yellow stars
+            [1.0, 0.6, 0.4]    # Red stars
+        ], dtype=np.float32)
+        star_class = np.searchsorted([0.6, 0.8, 0.95], star_type, side='right')
+        self.star_colors = tints[star_class] * self.star_brightness[:, None]
     
     def _setup_opengl_buffers(self):
         try:
@@ -485,43 +497,32 @@ class Starfield:
             glBindVertexArray(self.VAO)
             
             glBindBuffer(GL_ARRAY_BUFFER, self.VBO_pos)
-            positions_array = np.array(self.star_positions, dtype=np.float32)
-            glBufferData(GL_ARRAY_BUFFER, positions_array.nbytes, positions_array, GL_STATIC_DRAW)
+            glBufferData(GL_ARRAY_BUFFER, self.star_positions.nbytes, self.star_positions, GL_STATIC_DRAW)
             glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 0, None)
             glEnableVertexAttribArray(0)
             
             glBindBuffer(GL_ARRAY_BUFFER, self.VBO_color)
-            colors_array = np.array(self.star_colors, dtype=np.float32)
-            glBufferData(GL_ARRAY_BUFFER, colors_array.nbytes, colors_array, GL_STATIC_DRAW)
+            glBufferData(GL_ARRAY_BUFFER, self.star_colors.nbytes, self.star_colors, GL_STATIC_DRAW)
             glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 0, None)
             glEnableVertexAttribArray(1)
             
-            glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, 0, None)
-            glDisableVertexAttribArray(2)
-            
             glBindVertexArray(0)
             
         except Exception as e:
             pass
     
-    def render(self, shader):
+    def render(self, shader, point_size=2.0):
+        """Draw with the star shader in use and its view and projection set"""
         try:
             if self.VAO is None:
                 return
             
-            glEnable(GL_PROGRAM_POINT_SIZE)
-            
-            identity = glm.mat4(1.0)
-            shader.set_mat4("model", glm.value_ptr(identity))
-            shader.set_vec3("objectColor", [1.0, 1.0, 1.0])
-            shader.set_vec3("lightPos", [0, 0, 0])
-            shader.set_vec3("lightColor", [1.0, 1.0, 1.0])
+            gl_state.set_capability(GL_PROGRAM_POINT_SIZE, True)
+            shader.set_float("pointSize", point_size)
             
-            glBindVertexArray(self.VAO)
+            gl_state.bind_vertex_array(self.VAO)
             glDrawArrays(GL_POINTS, 0, self.num_stars)
-            glBindVertexArray(0)
-            
-            glDisable(GL_PROGRAM_POINT_SIZE)
+            gl_state.count()
             
         except Exception as e:
             pass
@@ -538,15 +539,49 @@ class Starfield:
             pass
 
 class Planet:
-    def __init__(self, config: PlanetConfig, loader: GLBLoader, scale: float, orbit_radius: float):
+    # Simulation state lives in BodyState columns so it can be stepped and transformed in batches
+    orbit_radius = StateField()
+    orbit_angle = StateField()
+    orbit_speed = StateField()
+    orbit_inclination = StateField()
+    rotation_angle = StateField()
+    rotation_speed = StateField()
+    scale = StateField()
+    diameter = StateField()
+    distance = StateField()
+    mass = StateField()
+    rotation_period = StateField()
+    flags = StateField()
+    
+    # Id of the body this one orbits, -1 when it orbits the origin
+    parent = StateField()
+    
+    def __init__(self, config: PlanetConfig, loader: GLBLoader, scale: float, orbit_radius: float,
+                 placeholder: PlaceholderSphere = None, flags: int = 0, pivot_offset=(0.0, 0.0, 0.0)):
         self.config = config
         self.loader = loader
+        self.placeholder = placeholder
+        
+        # A private single-row state until the planet is added to a BodyRegistry
+        self.state = BodyState(capacity=1)
+        self.state_index = self.state.allocate()
+        self.state.pivot_offset[self.state_index] = pivot_offset
+        self.flags = flags
+        
         self.scale = scale
         self.orbit_radius = orbit_radius
+        self.diameter = config.diameter
+        self.distance = config.distance
+        self.mass = config.mass
+        self.rotation_period = config.rotation_period
+        
+        # Set when the planet is added to a BodyRegistry
+        self.body_id = -1
+        self.catalog_row = -1
         
         self.orbit_speed = config.orbit_speed * 0.02
         
-        if config.name == "sun":
+        if flags & BODY_STAR:
             self.rotation_speed = 2.0
         else:
             direction = -1 if config.rotation_period < 0 else 1
@@ -560,73 +595,150 @@ class Planet:
         self.orbit_angle = (self.orbit_angle + self.orbit_speed * dt) % 360
         self.rotation_angle = (self.rotation_angle + self.rotation_speed * dt) % 360
     
-    def render(self, shader):
+    def render(self, shader, normal_matrix):
+        """Draw with the batched model matrices bound; the planet's row selects its matrix.
+        
+        normal_matrix is the planet's column-major 3x3 normal matrix from the transform stage.
+        """
         try:
-            model = glm.mat4(1.0)
-            
-            if self.config.name != "sun":
-                orbit_x = self.orbit_radius * math.cos(math.radians(self.orbit_angle))
-                orbit_z = self.orbit_radius * math.sin(math.radians(self.orbit_angle))
-                model = glm.translate(model, glm.vec3(orbit_x, 0, orbit_z))
-            
-            # Special handling for Jupiter - fix incorrect pivot point
-            if self.config.name == "jupiter":
-                # Manually center Jupiter by offsetting its incorrect pivot point
-                jupiter_center_offset = glm.vec3(-0.3, 0, 0)
-                
-                # Move to correct center, rotate, then move back
-                model = glm.translate(model, jupiter_center_offset)
-                model = glm.rotate(model, glm.radians(self.rotation_angle), glm.vec3(0, 1, 0))
-                model = glm.translate(model, -jupiter_center_offset)
-                
-                model = glm.scale(model, glm.vec3(self.scale, self.scale, self.scale))
-            else:
-                model = glm.rotate(model, glm.radians(self.rotation_angle), glm.vec3(0, 1, 0))
-                model = glm.scale(model, glm.vec3(self.scale, self.scale, self.scale))
-            
-            shader.set_mat4("model", glm.value_ptr(model))
+            shader.set_int("modelIndex", self.state_index)
+            shader.set_mat3("normalMatrix", normal_matrix)
             shader.set_vec3("objectColor", self.config.color)
             shader.set_vec3("lightPos", [0, 0, 0])
             shader.set_vec3("lightColor", [1.0, 1.0, 1.0])
             
             if self.loader:
-                self.loader.render(shader.id)
+                self.loader.render(shader)
+            elif self.placeholder:
+                self.placeholder.render(shader)
         except Exception as e:
             pass
     
+    def draw_key(self, shader):
+        """(program, vertex array, texture, material) key that orders this planet among the frame's draws"""
+        if self.loader and self.loader.vaos:
+            texture = self.loader.texture_ids[0] if self.loader.texture_ids else 0
+            return (shader.id, self.loader.vaos[0], texture, self.body_id)
+        return (shader.id, self.placeholder.VAO, self.placeholder.texture_id, self.body_id)
+    
     def reset_position(self):
         """Reset planet to a random orbital position"""
         self.orbit_angle = np.random.uniform(0, 360)
         self.rotation_angle = 0
 
 class SolarSystem:
-    VISUAL_SIZES = {
-        "sun": 20.0, "mercury": 1.0, "venus": 2.0, "earth": 2.2, "mars": 1.5,
-        "jupiter": 12.0, "saturn": 10.0, "uranus": 4.0, "neptune": 3.8
-    }
-    
     PLANET_KEYS = {
         pygame.K_1: "sun", pygame.K_2: "mercury", pygame.K_3: "venus", pygame.K_4: "earth",
         pygame.K_5: "mars", pygame.K_6: "jupiter", pygame.K_7: "saturn", pygame.K_8: "uranus", pygame.K_9: "neptune"
     }
     
-    def __init__(self):
+    # The asteroid belt sits in the gap between these two bodies' orbits
+    ASTEROID_BELT_BOUNDS = ("mars", "jupiter")
+    
+    # Texture units holding the batched model and normal matrices read by the vertex shaders
+    MODEL_MATRIX_UNIT = 1
+    NORMAL_MATRIX_UNIT = 3
+    
+    # Seconds between checks for edited shader sources when watching them
+    SHADER_POLL_INTERVAL = 0.5
+    
+    # Longest wait for input while idle, which bounds how late a paused edit is drawn
+    IDLE_WAIT_MS = 50
+    
+    def __init__(self, startup_report=False, upload_budget_ms=2.0, catalog_path=DEFAULT_CATALOG,
+                 belt_particles=120000, ring_particles=30000, max_moons=None, multi_draw_indirect=None,
+                 watch_shaders=False, shader_cache=True, telemetry_hz=20.0, script_path=None,
+                 sim_thread=True, sim_rate=120.0, dynamic_resolution=False, target_fps=60.0, min_render_scale=0.5,
+                 checkpoint_path=DEFAULT_CHECKPOINT, restore_path=None, autosave_interval=0.0, record_path=None,
+                 record_interval=0.05, session_record_path=None, session_replay_path=None, replay_realtime=False):
         try:
-            self._initialize_pygame()
-            self._setup_opengl()
-            self._load_shaders()
+            self.startup_report = startup_report
+            self.watch_shaders = watch_shaders
+            self.shader_cache = shader_cache
+            self.last_shader_check = time.perf_counter()
+            self.multi_draw_indirect = multi_draw_indirect
+            self.upload_budget_ms = upload_budget_ms
+            self.belt_particles = belt_particles
+            self.ring_particles = ring_particles
+            self.max_moons = max_moons
+            self.sim_thread = sim_thread
+            self.dynamic_resolution = dynamic_resolution
+            self.target_fps = target_fps
+            self.min_render_scale = min_render_scale
+            self.checkpoint_path = Path(checkpoint_path)
+            self.autosave_interval = autosave_interval
+            self.last_autosave = time.perf_counter()
+            self.replay_realtime = replay_realtime
+            
+            # Sessions replay exactly: the simulation steps by each logged frame's dt, from the logged seed
+            self.session_recorder = None
+            self.session_replay = SessionReplay(session_replay_path) if session_replay_path else None
+            self.replayed_changes = []
+            if self.session_replay or session_record_path:
+                self.sim_thread = False
+                seed = self.session_replay.seed if self.session_replay else int.from_bytes(os.urandom(4), 'little')
+                np.random.seed(seed)
+                if session_record_path:
+                    self.session_recorder = SessionRecorder(session_record_path, seed)
+            
+            with startup.phase("catalog"):
+                self.catalog = BodyCatalog.load(catalog_path)
+            
+            with startup.phase("window"):
+                self._initialize_pygame()
+            with startup.phase("opengl_setup"):
+                self._setup_opengl()
+            with startup.phase("shaders"):
+                self._load_shaders()
             
             self.camera = Camera(self.width, self.height)
-            self._initialize_planets()
+            with startup.phase("planet_setup"):
+                self._initialize_planets()
             
-            # Store original orbital positions for reset functionality
-            self.original_orbit_positions = {planet.config.name: planet.orbit_radius for planet in self.planets}
+            # Store original orbital positions and sizes for reset functionality
+            bodies = self.planets + self.moon_bodies
+            self.original_orbit_positions = {planet.body_id: planet.orbit_radius for planet in bodies}
+            self.original_scales = {planet.body_id: planet.scale for planet in bodies}
             
-            self.paused = False
             self.clock = pygame.time.Clock()
             self.last_mouse_pos = None
             
-            self.property_editor = PropertyEditorCommunicator(self)
+            self.property_editor = PropertyEditorCommunicator(self, telemetry_hz)
+            
+            # Body state is stepped (and editor IPC handled) by the simulation; frames draw its latest snapshot
+            self.simulation = Simulation(self.bodies.state, BODY_STAR, sim_rate)
+            if self.session_replay:
+                self.property_editor.headless = True
+                self.simulation.on_tick.append(self.apply_replayed_changes)
+            else:
+                self.simulation.on_tick.append(self.property_editor.update)
+            if self.session_recorder:
+                self.property_editor.recorded_changes = []
+            self.snapshot = None
+            
+            # Checkpoints are captured between simulation steps and written to disk on their own thread
+            self.checkpoint_writer = CheckpointWriter()
+            if autosave_interval > 0:
+                self.simulation.on_tick.append(self.autosave)
+            
+            # Body trajectories sampled after each step, compressed and written on a background thread
+            self.recorder = None
+            if record_path:
+                self.recorder = TrajectoryRecorder(record_path, self.bodies.names(), BODY_STAR, record_interval)
+                self.simulation.on_tick.append(self.record_trajectory)
+            
+            # Frames are only drawn when the view, the scene or the simulation changed since the last one
+            self.dirty = True
+            self.drawn_snapshot = None
+            
+            # Work the simulation thread hands back to the main thread, such as camera changes
+            self.main_thread_calls = queue.SimpleQueue()
+            
+            if script_path:
+                self.run_script(script_path)
+            if restore_path:
+                self.restore_checkpoint(restore_path)
+            self.simulation.publish()
             
         except Exception as e:
             traceback.print_exc()
@@ -656,6 +768,16 @@ class SolarSystem:
         glEnable(GL_DEPTH_TEST)
         glDepthFunc(GL_LESS)
         glClearColor(0.0, 0.0, 0.05, 1.0)
+        
+        # Optionally draw into an offscreen target whose resolution follows the measured frame time
+        self.render_target = None
+        self.resolution = None
+        if self.dynamic_resolution:
+            try:
+                self.render_target = ScaledRenderTarget(self.width, self.height)
+                self.resolution = ResolutionController(self.target_fps, min_scale=self.min_render_scale)
+            except Exception as e:
+                self.render_target = None
     
     def _load_shaders(self):
         base_dir = Path(__file__).parent.resolve()
@@ -665,327 +787,850 @@ class SolarSystem:
         if not vertex_path.exists() or not fragment_path.exists():
             raise FileNotFoundError("Shader files not found")
         
-        self.shader = Shader(str(vertex_path), str(fragment_path))
+        # One specialised program per kind of draw, all reloadable from disk
+        self.shaders = ShaderManager(base_dir / "shaders", ProgramBinaryCache() if self.shader_cache else None)
+        self.shader = self.shaders.load("planet", "vertex.glsl", "fragment.glsl")
+        self._assign_planet_units()
+        self.shader.on_reload.append(self._assign_planet_units)
+        self.star_shader = self.shaders.load("star", "star_vertex.glsl", "star_fragment.glsl")
+        self.transforms = TransformStage()
+        self.draw_list = DrawList(gl_state)
+        
+        try:
+            self.particle_shader = self.shaders.load("particle", "particle_vertex.glsl", "particle_fragment.glsl")
+        except Exception as e:
+            self.particle_shader = None
+        
+        try:
+            self.moon_shader = self.shaders.load("moon", "moon_vertex.glsl", "fragment.glsl")
+        except Exception as e:
+            self.moon_shader = None
+        
+        # Loaded models are drawn together from a shared mesh arena and texture array; placeholders keep the per-body path
+        try:
+            self.scene_shader = self.shaders.load("scene", "scene_vertex.glsl", "scene_fragment.glsl")
+            self.scene_renderer = SceneRenderer(self.scene_shader, self.MODEL_MATRIX_UNIT, self.NORMAL_MATRIX_UNIT,
+                                                TextureArray(), use_indirect=self.multi_draw_indirect)
+        except Exception as e:
+            self.scene_shader = None
+            self.scene_renderer = None
+    
+    def _assign_planet_units(self):
+        self.shader.use()
+        self.shader.set_int("modelMatrices", self.MODEL_MATRIX_UNIT)
+        self.shader.set_int("texture_diffuse", 0)
     
     def _get_planet_configs(self) -> List[PlanetConfig]:
-        return [
-            PlanetConfig(
-                name="sun",
-                model_file="sun.glb",
-                diameter=1392700,
-                distance=0,
-                mass=1988400.00,
-                orbit_speed=0,
-                rotation_period=587.28,
-                color=(1.0, 1.0, 0.7),
-                moons=0,
-                has_rings=False
-            ),
-            PlanetConfig(
-                name="mercury",
-                model_file="mercury.glb",
-                diameter=4879,
-                distance=57.9,
-                mass=0.33,
-                orbit_speed=47.4,
-                rotation_period=1407.6,
-                color=(0.8, 0.8, 0.7),
-                moons=0,
-                has_rings=False
-            ),
-            PlanetConfig(
-                name="venus",
-                model_file="venus.glb",
-                diameter=12104,
-                distance=108.2,
-                mass=4.87,
-                orbit_speed=35.0,
-                rotation_period=-5832.5,
-                color=(0.9, 0.7, 0.4),
-                moons=0,
-                has_rings=False
-            ),
-            PlanetConfig(
-                name="earth",
-                model_file="earth.glb",
-                diameter=12756,
-                distance=149.6,
-                mass=5.97,
-                orbit_speed=29.8,
-                rotation_period=23.9,
-                color=(0.2, 0.4, 0.9),
-                moons=1,
-                has_rings=False
-            ),
-            PlanetConfig(
-                name="mars",
-                model_file="mars.glb",
-                diameter=6792,
-                distance=228.0,
-                mass=0.642,
-                orbit_speed=24.1,
-                rotation_period=24.6,
-                color=(0.9, 0.4, 0.2),
-                moons=2,
-                has_rings=False
-            ),
-            PlanetConfig(
-                name="jupiter",
-                model_file="jupiter.glb",
-                diameter=142984,
-                distance=778.5,
-                mass=1898,
-                orbit_speed=13.1,
-                rotation_period=9.9,
-                color=(0.9, 0.8, 0.6),
-                moons=95,
-                has_rings=True
-            ),
-            PlanetConfig(
-                name="saturn",
-                model_file="saturn.glb",
-                diameter=120536,
-                distance=1432.0,
-                mass=568,
-                orbit_speed=9.7,
-                rotation_period=10.7,
-                color=(0.95, 0.85, 0.65),
-                moons=274,
-                has_rings=True
-            ),
-            PlanetConfig(
-                name="uranus",
-                model_file="uranus.glb",
-                diameter=51118,
-                distance=2867.0,
-                mass=86.8,
-                orbit_speed=6.8,
-                rotation_period=-17.2,
-                color=(0.7, 0.85, 0.95),
-                moons=28,
-                has_rings=True
-            ),
-            PlanetConfig(
-                name="neptune",
-                model_file="neptune.glb",
-                diameter=49528,
-                distance=4515.0,
-                mass=102,
-                orbit_speed=5.4,
-                rotation_period=16.1,
-                color=(0.3, 0.5, 0.9),
-                moons=16,
-                has_rings=True
-            )
-        ]
+        return self.catalog.configs()
     
     def _calculate_orbit_distances(self, planet_configs: List[PlanetConfig]) -> Dict[str, float]:
-        max_real_distance = max(p.distance for p in planet_configs if p.name != "sun")
-        distance_scale = 4000.0 / max_real_distance
-        min_separation = 170.0  # sun radius (20) + buffer (150)
-        
-        orbit_distances = {"sun": 0}
-        last_position = min_separation
-        
-        for planet in planet_configs[1:]:
-            scaled_distance = planet.distance * distance_scale
-            orbit_distances[planet.name] = max(scaled_distance, last_position + min_separation)
-            last_position = orbit_distances[planet.name]
-        
-        return orbit_distances
+        rows = [self.catalog.row(planet.name) for planet in planet_configs]
+        radii = stacked_orbit_radii([planet.distance for planet in planet_configs],
+                                    self.catalog.flags[rows] & BODY_STAR, self.catalog.max_distance)
+        return {planet.name: radius for planet, radius in zip(planet_configs, radii.tolist())}
     
     def _initialize_planets(self):
-        base_dir = Path(__file__).parent.resolve()
+        """Create planets as placeholder spheres and start streaming their models in the background"""
+        self.base_dir = Path(__file__).parent.resolve()
         planet_configs = self._get_planet_configs()
         orbit_distances = self._calculate_orbit_distances(planet_configs)
+        self.orbit_distances = orbit_distances
         
         self.planets = []
-        models_dir = base_dir / "models"
+        self.bodies = BodyRegistry(self.catalog)
+        self.body_editor = BodyEditor(self.bodies, self.catalog)
+        self.starfield = None
+        self.starfield_pending = True
+        self.asteroid_belt = None
+        self.planet_rings = None
+        self.ringed_planets = []
+        self.particles_pending = self.particle_shader is not None
+        self.moons = None
+        self.moon_bodies = []
+        self.assets_loaded = False
+        self.placeholder = PlaceholderSphere()
+        self.asset_streamer = AssetStreamer(
+            str(self.base_dir),
+            frame_budget_ms=self.upload_budget_ms,
+            on_loaded=self._on_model_loaded,
+            on_failed=self._on_model_failed
+        )
+        models_dir = self.base_dir / "models"
         
         if not models_dir.exists():
             models_dir.mkdir(exist_ok=True)
         
         for config in planet_configs:
+            model_path = models_dir / config.model_file
+            
+            if model_path.exists():
+                row = self.catalog.row(config.name)
+                planet = Planet(
+                    config=config,
+                    loader=None,
+                    scale=self.catalog.visual_size(config.name),
+                    orbit_radius=orbit_distances[config.name],
+                    placeholder=self.placeholder,
+                    flags=int(self.catalog.flags[row]),
+                    pivot_offset=self.catalog.pivot_offsets[row]
+                )
+                self.planets.append(planet)
+                self.bodies.add(planet)
+        
+        self._initialize_moons()
+        self.moons_pending = self.moons is not None and self.moon_shader is not None
+        
+        for planet in sorted(self.planets, key=self._load_priority):
+            self.asset_streamer.submit(planet)
+    
+    def _initialize_moons(self):
+        """Register every body's moons as bodies orbiting it; their draw buffers are created while streaming"""
+        if self.max_moons == 0:
+            return
+        
+        moons = MoonSystem.for_bodies(self.bodies, self.catalog, self.max_moons)
+        if moons.count:
+            create_moon = partial(Planet, loader=None, placeholder=self.placeholder)
+            self.moon_bodies = moons.register(self.bodies, create_moon)
+            self.moons = moons
+    
+    def _on_model_loaded(self, planet):
+        startup.mark(f"model {planet.config.model_file}")
+        if self.scene_renderer:
             try:
-                loader = GLBLoader(str(base_dir))
-                model_path = models_dir / config.model_file
-                
-                if model_path.exists():
-                    loader.load(config.model_file)
-                    planet = Planet(
-                        config=config,
-                        loader=loader,
-                        scale=self.VISUAL_SIZES[config.name],
-                        orbit_radius=orbit_distances[config.name]
-                    )
-                    self.planets.append(planet)
-                else:
-                    pass
+                self.scene_renderer.add_body(planet.body_id, planet.loader, planet.config.color)
             except Exception as e:
-                pass
+                self.scene_renderer.remove_body(planet.body_id)
+    
+    def _on_model_failed(self, planet):
+        self.planets.remove(planet)
+        self.bodies.remove(planet)
+        if self.scene_renderer:
+            self.scene_renderer.remove_body(planet.body_id)
+        if planet in self.ringed_planets:
+            self.ringed_planets.remove(planet)
         
+        # Its moons go with it and are no longer drawn
+        removed = [planet] + [moon for moon in self.moon_bodies if moon.parent == planet.body_id]
+        for moon in removed[1:]:
+            self.bodies.remove(moon)
+        if self.camera.target_planet in removed:
+            self.camera.clear_target()
+    
+    def _load_starfield(self):
+        self.starfield_pending = False
         try:
-            self.starfield = Starfield()
+            with startup.phase("starfield"):
+                self.starfield = Starfield()
         except Exception as e:
             self.starfield = None
     
+    def _load_particles(self):
+        """Build the asteroid belt and the ring point cloud shared by every ringed planet"""
+        self.particles_pending = False
+        try:
+            with startup.phase("particles"):
+                # Bounds come from the catalog, so the belt is placed even if a bounding model is missing
+                inner_name, outer_name = self.ASTEROID_BELT_BOUNDS
+                if inner_name in self.orbit_distances and outer_name in self.orbit_distances and self.belt_particles > 0:
+                    inner_radius = self.orbit_distances[inner_name]
+                    gap = self.orbit_distances[outer_name] - inner_radius
+                    self.asteroid_belt = OrbitalParticles.belt(
+                        self.belt_particles,
+                        inner_radius=inner_radius + 0.3 * gap,
+                        outer_radius=inner_radius + 0.75 * gap,
+                        reference_radius=inner_radius,
+                        reference_speed=math.radians(self.catalog.value(inner_name, 'orbit_speed') * 0.02),
+                        thickness=0.03 * gap
+                    )
+                
+                self.ringed_planets = [planet for planet in self.planets if planet.flags & BODY_RINGED]
+                if self.ringed_planets and self.ring_particles > 0:
+                    self.planet_rings = OrbitalParticles.ring(self.ring_particles)
+        except Exception as e:
+            self.asteroid_belt = None
+            self.planet_rings = None
+    
+    def _load_moons(self):
+        self.moons_pending = False
+        with startup.phase("moons"):
+            self.moons.setup_buffers()
+    
+    def _load_priority(self, planet):
+        """Sort key streaming visible bodies with the largest apparent size first"""
+        view = self.camera.get_view_matrix()
+        view_projection = self.camera.get_projection_matrix() * view
+        eye = glm.vec3(glm.inverse(view)[3])
+        
+        position = self.camera.get_planet_position(planet)
+        clip = view_projection * glm.vec4(position, 1.0)
+        visible = False
+        if clip.w > 0:
+            margin = 1.0 + planet.scale / clip.w
+            visible = abs(clip.x / clip.w) <= margin and abs(clip.y / clip.w) <= margin
+        
+        apparent_size = planet.scale / max(glm.length(position - eye), 1e-3)
+        return (not visible, -apparent_size)
+    
+    def stream_assets(self):
+        """Advance deferred loading: the starfield first, then budgeted model uploads"""
+        if self.assets_loaded:
+            return
+        
+        # Every loading step can change what is on screen
+        self.dirty = True
+        
+        if self.starfield_pending:
+            self._load_starfield()
+            return
+        
+        if self.particles_pending:
+            self._load_particles()
+            return
+        
+        if self.moons_pending:
+            self._load_moons()
+            return
+        
+        self.asset_streamer.pump()
+        
+        if self.asset_streamer.pending == 0:
+            self.assets_loaded = True
+            startup.mark("all_assets_loaded")
+            if self.startup_report:
+                print(startup.report())
+    
     def update(self, dt: float):
         try:
-            self.camera.update(dt)
+            if not self.simulation.running:
+                self.simulation.tick(dt)
+            self.snapshot = self.simulation.snapshots.acquire()
+            self.camera.positions = self.snapshot.positions
+            
+            while not self.main_thread_calls.empty():
+                self.main_thread_calls.get_nowait()()
             
-            self.property_editor.update()
+            self.camera.update(dt)
             
-            if not self.paused:
-                for planet in self.planets:
-                    planet.update(dt)
+            if self.watch_shaders and time.perf_counter() - self.last_shader_check >= self.SHADER_POLL_INTERVAL:
+                self.last_shader_check = time.perf_counter()
+                if self.shaders.reload_changed():
+                    self.dirty = True
         except Exception as e:
             pass
     
+    def needs_redraw(self):
+        return self.dirty or self.camera.dirty or self.simulation.snapshots.has_newer(self.drawn_snapshot)
+    
     def render(self):
         try:
+            frame_start = time.perf_counter()
+            if self.render_target:
+                self.render_target.begin(self.resolution.scale)
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-            self.shader.use()
+            gl_state.begin_frame()
+            if self.scene_renderer:
+                self.scene_renderer.prepare()
+            
+            # Kept alive for the whole frame: value_ptr only points into these matrices
+            view_matrix = self.camera.get_view_matrix()
+            projection_matrix = self.camera.get_projection_matrix()
+            view = glm.value_ptr(view_matrix)
+            projection = glm.value_ptr(projection_matrix)
+            
+            # Every body's model matrix is built in one batch and uploaded in one buffer write
+            snapshot = self.snapshot or self.simulation.snapshots.acquire()
+            positions = snapshot.positions
+            self.transforms.update(snapshot, positions)
+            self.transforms.bind(self.MODEL_MATRIX_UNIT, self.NORMAL_MATRIX_UNIT)
+            
+            # Draws are collected, sorted by program, vertex array and texture, then submitted together
+            draws = self.draw_list
+            draws.set_program_setup(self.shader.id, partial(self._setup_camera, self.shader, view, projection))
+            
+            batched = self.scene_renderer or ()
+            normal_matrices = np.ascontiguousarray(self.transforms.normal_matrices.transpose(0, 2, 1))
+            for planet in self.planets:
+                if planet.body_id not in batched:
+                    draws.add(
+                        planet.draw_key(self.shader),
+                        partial(planet.render, self.shader, normal_matrices[planet.state_index])
+                    )
             
-            view = self.camera.get_view_matrix()
-            projection = self.camera.get_projection_matrix()
+            if hasattr(self, 'starfield') and self.starfield:
+                draws.set_program_setup(self.star_shader.id, partial(self._setup_camera, self.star_shader, view, projection))
+                draws.add((self.star_shader.id, self.starfield.VAO, 0, 0), partial(self.starfield.render, self.star_shader))
             
-            self.shader.set_mat4("projection", glm.value_ptr(projection))
-            self.shader.set_mat4("view", glm.value_ptr(view))
+            if self.scene_renderer:
+                self.scene_renderer.queue(draws, view, projection)
             
-            for planet in self.planets:
-                if planet.loader:
-                    planet.render(self.shader)
+            self._queue_moons(draws, view, projection, snapshot)
+            self._queue_particles(draws, view, projection, snapshot)
             
-            if hasattr(self, 'starfield') and self.starfield:
-                self.starfield.render(self.shader)
+            draws.submit()
+            gl_state.bind_vertex_array(0)
+            
+            tracer.counter("gl_calls", gl_state.calls, "render")
+            tracer.counter("gl_calls_skipped", gl_state.skipped, "render")
+            
+            if self.render_target:
+                self.render_target.end()
+                
+                # Measured before the flip, which can block on vsync
+                tracer.counter("frame_cpu_ms", (time.perf_counter() - frame_start) * 1000.0, "render")
+                gpu_ms = self.render_target.take_gpu_ms()
+                if gpu_ms is not None:
+                    scale = self.resolution.update(gpu_ms)
+                    tracer.counter("render_scale_percent", round(scale * 100), "render")
             
             pygame.display.flip()
             
+            self.dirty = False
+            self.camera.dirty = False
+            self.drawn_snapshot = snapshot
+            
         except Exception as e:
             pass
     
-    def handle_events(self) -> bool:
+    def _setup_camera(self, shader, view, projection):
+        shader.set_mat4("projection", projection)
+        shader.set_mat4("view", view)
+    
+    def _queue_moons(self, draws, view, projection, snapshot):
+        if self.moons is None or self.moons.sphere is None:
+            return
+        
+        # World matrices come from the frame's batched transform stage; removed moons collapse to nothing
+        ids = self.moons.ids
+        matrices = self.transforms.matrices[ids] * snapshot.alive[ids][:, None, None]
+        
+        shader = self.moon_shader
+        draws.set_program_setup(shader.id, partial(self._setup_camera, shader, view, projection))
+        draws.add(
+            (shader.id, self.moons.sphere.VAO, self.moons.sphere.texture_id, 0),
+            partial(self.moons.render, shader, matrices)
+        )
+    
+    def _queue_particles(self, draws, view, projection, snapshot):
+        if self.asteroid_belt is None and self.planet_rings is None:
+            return
+        
+        shader = self.particle_shader
+        
+        def setup():
+            self._setup_camera(shader, view, projection)
+            shader.set_float("time", snapshot.sim_time)
+        
+        draws.set_program_setup(shader.id, setup)
+        
+        if self.asteroid_belt:
+            draws.add(
+                (shader.id, self.asteroid_belt.VAO, 0, 0),
+                partial(self.asteroid_belt.render, shader, to_gl_layout(identity_matrices(1))[0], [0.45, 0.42, 0.38])
+            )
+        
+        if self.planet_rings and self.ringed_planets:
+            # Rings are modelled in planet radii and follow their parent's position and scale
+            ids = np.array([planet.body_id for planet in self.ringed_planets])
+            models = to_gl_layout(translation_matrices(snapshot.positions[ids]) @ scale_matrices(snapshot.scale[ids]))
+            ring_brightness = self.catalog.columns['ring_brightness']
+            for planet, model in zip(self.ringed_planets, models):
+                color = [channel * ring_brightness[planet.catalog_row] for channel in planet.config.color]
+                draws.add(
+                    (shader.id, self.planet_rings.VAO, 0, planet.body_id),
+                    partial(self.planet_rings.render, shader, model, color, point_size=1.5)
+                )
+    
+    def poll_events(self, wait_ms=0):
+        """Queued input events, first blocking up to wait_ms for some to arrive"""
+        events = pygame.event.get()
+        if not events and wait_ms:
+            event = pygame.event.wait(wait_ms)
+            if event.type != pygame.NOEVENT:
+                events = [event] + pygame.event.get()
+        return events
+    
+    def handle_events(self, events) -> bool:
+        """Apply input events; False when quitting.
+        
+        Only the events themselves are read (not the live mouse state), so a logged session's events
+        replay exactly.
+        """
         try:
-            for event in pygame.event.get():
+            # A drag's motion events are summed into one rotation per frame
+            rotate_x = rotate_y = 0
+            for event in events:
                 if event.type == pygame.QUIT:
                     return False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         return False
                     elif event.key == pygame.K_SPACE:
-                        self.paused = not self.paused
+                        self.simulation.paused = not self.simulation.paused
+                    elif event.key == pygame.K_F5:
+                        self.shaders.reload_changed(force=True)
+                        self.dirty = True
+                    elif event.key == pygame.K_F6:
+                        self.save_checkpoint()
+                    elif event.key == pygame.K_F9:
+                        self.restore_checkpoint()
                     elif event.key in self.PLANET_KEYS:
                         self.select_planet(self.PLANET_KEYS[event.key])
+                    elif event.key == pygame.K_TAB:
+                        self.select_next_moon()
                 elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    self.last_mouse_pos = pygame.mouse.get_pos()
+                    self.last_mouse_pos = event.pos
                 elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
                     self.last_mouse_pos = None
-                elif event.type == pygame.MOUSEMOTION and self.last_mouse_pos and pygame.mouse.get_pressed()[0]:
+                elif event.type == pygame.MOUSEMOTION and self.last_mouse_pos and event.buttons[0]:
                     x, y = event.pos
-                    rel_x = x - self.last_mouse_pos[0]
-                    rel_y = y - self.last_mouse_pos[1]
-                    self.camera.handle_rotation(rel_x, rel_y)
+                    rotate_x += x - self.last_mouse_pos[0]
+                    rotate_y += y - self.last_mouse_pos[1]
                     self.last_mouse_pos = (x, y)
                 elif event.type == pygame.MOUSEWHEEL:
                     self.camera.handle_zoom(event.y * 30)
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+                                    pygame.WINDOWSHOWN, pygame.WINDOWRESTORED):
+                    self.dirty = True
             
+            self.camera.handle_rotation(rotate_x, rotate_y)
             return True
         except Exception as e:
             return True
     
     def run(self):
+        if self.session_replay:
+            self.run_replay()
+            return
+        
         running = True
+        first_frame_shown = False
         last_time = time.time()
+        session_start = last_time
         
         try:
+            if self.sim_thread:
+                self.simulation.start()
+            
             while running:
+                tracer.begin("frame")
+                
+                # With nothing to redraw, sleep in the event queue instead of spinning at the frame rate.
+                # A loop stepping the simulation itself is never idle while it runs: its frames are the steps.
+                stepping = not self.simulation.running and not self.simulation.paused
+                idle = not stepping and not self.needs_redraw()
+                with tracer.span("handle_events"):
+                    events = self.poll_events(self.IDLE_WAIT_MS if idle else 0)
+                    running = self.handle_events(events)
+                
+                # Time spent waiting is not animation time: an idle camera has no transition to advance
                 current_time = time.time()
-                dt = current_time - last_time
+                dt = 0.0 if idle else current_time - last_time
                 last_time = current_time
                 
-                running = self.handle_events()
-                self.update(dt)
-                self.render()
+                with tracer.span("update"):
+                    self.update(dt)
+                
+                drawn = self.needs_redraw()
+                if drawn:
+                    with tracer.span("render"):
+                        self.render()
+                    
+                    if not first_frame_shown:
+                        first_frame_shown = True
+                        startup.mark("first_frame")
+                
+                with tracer.span("stream_assets"):
+                    self.stream_assets()
+                
+                if self.session_recorder:
+                    changes, self.property_editor.recorded_changes = self.property_editor.recorded_changes, []
+                    self.session_recorder.frame(dt, current_time - session_start, drawn, events, changes)
+                
+                if drawn:
+                    with tracer.span("clock_tick"):
+                        self.clock.tick(60)
+                tracer.end("frame")
+        except Exception as e:
+            traceback.print_exc()
+        finally:
+            if self.session_recorder:
+                self.session_recorder.close(state_digest(self.bodies.state, self.simulation.sim_time))
+            self.cleanup()
+            pygame.quit()
+    
+    def run_replay(self):
+        """Play a session log back frame by frame, then report frame times and whether the state matched.
+        
+        Frames run as fast as possible unless replay_realtime is set, when they keep their logged
+        pacing. Logged frames are drawn as they were, with all assets loaded first, so a replay
+        is a benchmark whose workload is identical across builds.
+        """
+        replay = self.session_replay
+        try:
+            while not self.assets_loaded:
+                self.stream_assets()
+                time.sleep(0.001)
+            
+            frame_times = []
+            start = time.perf_counter()
+            for frame in replay.frames():
+                if self.replay_realtime:
+                    time.sleep(max(0.0, start + frame.wall - time.perf_counter()))
+                
+                frame_start = time.perf_counter()
+                tracer.begin("frame")
+                pygame.event.pump()
+                with tracer.span("handle_events"):
+                    self.handle_events(frame.events)
                 
-                self.clock.tick(60)
+                self.replayed_changes = frame.changes
+                with tracer.span("update"):
+                    self.update(frame.dt)
+                
+                if frame.drawn:
+                    with tracer.span("render"):
+                        self.render()
+                tracer.end("frame")
+                frame_times.append(time.perf_counter() - frame_start)
+            
+            total = time.perf_counter() - start
+            digest = state_digest(self.bodies.state, self.simulation.sim_time)
+            if replay.digest is None:
+                outcome = "log has no final state (recording did not exit cleanly)"
+            elif digest == replay.digest:
+                outcome = "final state matches the recording"
+            else:
+                outcome = "final state DIFFERS from the recording"
+            
+            # Simulated time shows a replay actually stepped, not only that the states agree
+            print(f"Replayed {len(frame_times)} frames ({self.simulation.sim_time:.3f} s of simulation) "
+                  f"in {total:.2f} s; {outcome}")
+            if frame_times:
+                times_ms = np.array(frame_times) * 1000.0
+                print(f"Frame time: mean {times_ms.mean():.2f} ms, median {np.median(times_ms):.2f} ms, "
+                      f"p95 {np.percentile(times_ms, 95):.2f} ms, max {times_ms.max():.2f} ms")
         except Exception as e:
             traceback.print_exc()
         finally:
+            replay.close()
             self.cleanup()
             pygame.quit()
     
     def cleanup(self):
         try:
+            self.simulation.stop()
+            self.checkpoint_writer.shutdown()
+            if self.recorder:
+                self.recorder.close()
+            self.asset_streamer.shutdown()
+            
             for planet in self.planets:
                 if planet.loader:
                     planet.loader.cleanup()
             
-            if hasattr(self, 'shader') and self.shader.id:
-                glDeleteProgram(self.shader.id)
+            self.shaders.cleanup()
             
             self.property_editor.cleanup()
             
             if hasattr(self, 'starfield') and self.starfield:
                 self.starfield.cleanup()
+            if self.asteroid_belt:
+                self.asteroid_belt.cleanup()
+            if self.planet_rings:
+                self.planet_rings.cleanup()
+            if self.moons:
+                self.moons.cleanup()
+            self.transforms.cleanup()
+            if self.render_target:
+                self.render_target.cleanup()
+            if self.scene_renderer:
+                self.scene_renderer.cleanup()
+                self.scene_renderer.textures.cleanup()
+            
+            self.placeholder.cleanup()
         except Exception as e:
             pass
     
+    def run_script(self, path):
+        """Run a Python edit script against the loaded bodies.
+        
+        The script sees the system, its BodyState as `state`, `select` and `edit` (BodyEditor.select
+        and apply) and the flag bits, so group edits are written as e.g.
+        edit('scale', 2.0, select(exclude_flags=BODY_STAR), 'multiply').
+        """
+        namespace = {
+            'system': self,
+            'state': self.bodies.state,
+            'select': self.body_editor.select,
+            'edit': self.body_editor.apply,
+            'np': np,
+            'BODY_STAR': BODY_STAR,
+            'BODY_RINGED': BODY_RINGED,
+            'BODY_MOON': BODY_MOON,
+        }
+        try:
+            with tracer.span("run_script"):
+                with open(path, 'r', encoding='utf-8') as f:
+                    exec(compile(f.read(), str(path), 'exec'), namespace)
+        except Exception as e:
+            print(f"Edit script '{path}' failed:")
+            traceback.print_exc()
+    
     def select_planet(self, planet_name):
-        for planet in self.planets:
-            if planet.config.name == planet_name:
-                self.camera.set_target(planet)
-                self.property_editor.show_planet_properties(planet)
-                break
+        planet = self.bodies.get(planet_name)
+        if planet is not None:
+            self.camera.set_target(planet)
+            # The editor reads the body's state, so the selection is made between simulation steps
+            self.simulation.call(partial(self.property_editor.show_planet_properties, planet))
+    
+    def select_next_moon(self):
+        """Cycle the selection through the targeted body's moons and back to the body itself"""
+        target = self.camera.target_planet
+        if target is None:
+            return
+        
+        parent = self.bodies.by_id(target.parent) if target.parent >= 0 else target
+        system = [parent] + [moon for moon in self.moon_bodies
+                             if moon.parent == parent.body_id and self.bodies.by_id(moon.body_id) is moon]
+        if target in system:
+            self.select_planet(system[(system.index(target) + 1) % len(system)].config.name)
+    
+    def restore_original_properties(self, planet):
+        """Reset a planet's editable properties to its catalog values; returns False for unregistered bodies"""
+        if planet.catalog_row >= 0:
+            original_config = self.catalog.config_at(planet.catalog_row)
+        elif planet.flags & BODY_MOON and planet.body_id in self.original_scales:
+            # Moons are not in the catalog; the config they were generated with holds their original values
+            original_config = planet.config
+        else:
+            return False
+        
+        planet.diameter = original_config.diameter
+        planet.distance = original_config.distance
+        planet.mass = original_config.mass
+        planet.rotation_period = original_config.rotation_period
+        
+        planet.orbit_speed = original_config.orbit_speed * 0.02
+        
+        if planet.flags & BODY_STAR:
+            planet.rotation_speed = 2.0
+        else:
+            direction = -1 if original_config.rotation_period < 0 else 1
+            rotation_hours = abs(original_config.rotation_period)
+            planet.rotation_speed = direction * (360.0 / (rotation_hours * 3600)) * 100
+        
+        planet.scale = self.original_scales[planet.body_id]
+        
+        # Restore original orbital position instead of recalculating
+        if planet.body_id in self.original_orbit_positions:
+            planet.orbit_radius = self.original_orbit_positions[planet.body_id]
+        return True
     
     def reset_all_simulation(self):
         try:
-            original_configs = self._get_planet_configs()
-            visual_sizes = self.VISUAL_SIZES
-            
-            for planet in self.planets:
-                original_config = None
-                for config in original_configs:
-                    if config.name == planet.config.name:
-                        original_config = config
-                        break
-                
-                if original_config:
-                    planet.config.diameter = original_config.diameter
-                    planet.config.distance = original_config.distance
-                    planet.config.mass = original_config.mass
-                    planet.config.orbit_speed = original_config.orbit_speed
-                    planet.config.rotation_period = original_config.rotation_period
-                    
-                    planet.orbit_speed = original_config.orbit_speed * 0.02
-                    
-                    if original_config.name == "sun":
-                        planet.rotation_speed = 2.0
-                    else:
-                        direction = -1 if original_config.rotation_period < 0 else 1
-                        rotation_hours = abs(original_config.rotation_period)
-                        planet.rotation_speed = direction * (360.0 / (rotation_hours * 3600)) * 100
-                    
-                    if original_config.name in visual_sizes:
-                        planet.scale = visual_sizes[original_config.name]
-                
+            # Failed models are removed from the list on the main thread, so iterate over a copy
+            for planet in self.planets + self.moon_bodies:
+                self.restore_original_properties(planet)
                 planet.reset_position()
             
-            # Restore original orbital positions instead of recalculating
-            for planet in self.planets:
-                if planet.config.name in self.original_orbit_positions:
-                    planet.orbit_radius = self.original_orbit_positions[planet.config.name]
-            
-            self.camera.clear_target()
-            self.camera.distance = 3000.0
-            self.camera.yaw = 45.0
-            self.camera.pitch = -30.0
+            self.main_thread_calls.put(self.reset_camera)
             
         except Exception as e:
             pass
+    
+    def reset_camera(self):
+        self.camera.clear_target()
+        self.camera.distance = 3000.0
+        self.camera.yaw = 45.0
+        self.camera.pitch = -30.0
+    
+    def capture_checkpoint(self):
+        """(arrays, metadata) copy of the simulation state; runs between simulation steps"""
+        state = self.bodies.state
+        n = state.count
+        arrays = {field: getattr(state, field)[:n].copy() for field in BodyState.FIELDS}
+        arrays['pivot_offset'] = state.pivot_offset[:n].copy()
+        arrays['flags'] = state.flags[:n].copy()
+        
+        # Rows are matched to bodies by name on restore, so a checkpoint survives catalog changes
+        arrays['names'] = self.bodies.name_array()
+        
+        generator, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+        arrays['rng_keys'] = keys.copy()
+        
+        camera = self.camera
+        metadata = {
+            'saved_at': time.time(),
+            'count': n,
+            'sim_time': self.simulation.sim_time,
+            'paused': self.simulation.paused,
+            'camera': {
+                'distance': camera.distance,
+                'yaw': camera.yaw,
+                'pitch': camera.pitch,
+                'zoom_distance': camera.zoom_distance,
+                'target': camera.target_planet.config.name if camera.target_planet else None,
+            },
+            'rng': {'generator': generator, 'position': int(position), 'has_gauss': int(has_gauss),
+                    'cached_gaussian': float(cached_gaussian)},
+        }
+        return arrays, metadata
+    
+    def apply_checkpoint(self, metadata, arrays):
+        """Overwrite the simulation state with a loaded checkpoint; runs between simulation steps"""
+        state = self.bodies.state
+        names = arrays['names']
+        if len(names) == state.count and np.array_equal(names, self.bodies.name_array()):
+            sources = targets = np.arange(state.count)
+        else:
+            # Bodies missing from either side keep their current state
+            targets = self.bodies.ids_of(names)
+            sources = np.flatnonzero(targets >= 0)
+            targets = targets[sources]
+        
+        # Liveness and catalog rows belong to the registry and catalog, not the saved scenario.
+        # Columns added since a checkpoint was written keep their current values.
+        for field in BodyState.FIELDS + ('pivot_offset', 'flags'):
+            if field in arrays:
+                getattr(state, field)[targets] = arrays[field][sources]
+        
+        self.simulation.sim_time = metadata['sim_time']
+        self.simulation.paused = metadata['paused']
+        
+        rng = metadata['rng']
+        np.random.set_state((rng['generator'], np.array(arrays['rng_keys']), rng['position'], rng['has_gauss'],
+                             rng['cached_gaussian']))
+        
+        self.main_thread_calls.put(partial(self.restore_camera, metadata['camera']))
+        if self.property_editor.current_planet is not None:
+            self.property_editor.update_planet_data(self.property_editor.current_planet)
+    
+    def restore_camera(self, saved):
+        camera = self.camera
+        camera.is_transitioning = False
+        camera.target_planet = self.bodies.get(saved['target']) if saved['target'] else None
+        camera.zoom_distance = saved['zoom_distance'] if camera.target_planet else None
+        camera.distance = saved['distance']
+        camera.yaw = saved['yaw']
+        camera.pitch = saved['pitch']
+        camera.dirty = True
+    
+    def _write_checkpoint(self, path):
+        with tracer.span("capture_checkpoint", "checkpoint"):
+            arrays, metadata = self.capture_checkpoint()
+        self.checkpoint_writer.submit(path, arrays, metadata)
+    
+    def _read_checkpoint(self, path):
+        try:
+            with tracer.span("restore_checkpoint", "checkpoint"):
+                metadata, arrays = checkpoint.load(path)
+                self.apply_checkpoint(metadata, arrays)
+            print(f"Restored checkpoint '{path}'")
+        except Exception as e:
+            print(f"Failed to restore checkpoint '{path}': {e}")
+    
+    def save_checkpoint(self, path=None):
+        """Capture the state on the simulation thread and write it in the background"""
+        self.simulation.call(partial(self._write_checkpoint, path or self.checkpoint_path))
+    
+    def restore_checkpoint(self, path=None):
+        self.simulation.call(partial(self._read_checkpoint, path or self.checkpoint_path))
+    
+    def autosave(self):
+        """Simulation tick callback writing a checkpoint every autosave_interval seconds"""
+        now = time.perf_counter()
+        if now - self.last_autosave >= self.autosave_interval:
+            self.last_autosave = now
+            self._write_checkpoint(self.checkpoint_path)
+        return False
+    
+    def apply_replayed_changes(self):
+        """Simulation tick callback applying the editor changes logged for the replayed frame"""
+        changes, self.replayed_changes = self.replayed_changes, []
+        for change in changes:
+            self.property_editor.apply_property_change(change)
+        return bool(changes)
+    
+    def record_trajectory(self):
+        """Simulation tick callback sampling the bodies into the trajectory recording"""
+        self.recorder.record(self.bodies.state, self.simulation.sim_time)
+        return False
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Solar System Simulator")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="record a Chrome trace-event JSON file (open it in Perfetto)")
+    parser.add_argument("--trace-capacity", type=int, default=1 << 16,
+                        help="number of trace events kept in the ring buffer")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print a startup time breakdown once all assets have loaded")
+    parser.add_argument("--upload-budget-ms", type=float, default=2.0,
+                        help="time per frame spent uploading streamed models to the GPU")
+    parser.add_argument("--catalog", metavar="PATH", default=str(DEFAULT_CATALOG),
+                        help="body catalog to load (.json, .csv or .npz)")
+    parser.add_argument("--belt-particles", type=int, default=120000,
+                        help="number of asteroid belt particles (0 disables the belt)")
+    parser.add_argument("--ring-particles", type=int, default=30000,
+                        help="number of particles in planetary rings (0 disables rings)")
+    parser.add_argument("--max-moons", type=int, default=None,
+                        help="limit the number of moons per body (0 disables moons)")
+    parser.add_argument("--watch-shaders", action="store_true",
+                        help="recompile shaders when their source files change (F5 always reloads them)")
+    parser.add_argument("--no-shader-cache", dest="shader_cache", action="store_false",
+                        help="always compile shaders from source instead of loading cached program binaries")
+    parser.add_argument("--no-multi-draw", dest="multi_draw_indirect", action="store_const", const=False, default=None,
+                        help="draw bodies with instanced calls instead of glMultiDrawElementsIndirect")
+    parser.add_argument("--script", metavar="PATH",
+                        help="run a Python edit script against the bodies once they are created")
+    parser.add_argument("--no-sim-thread", dest="sim_thread", action="store_false",
+                        help="step the simulation on the render loop instead of its own thread")
+    parser.add_argument("--sim-rate", type=float, default=120.0,
+                        help="simulation steps per second on the simulation thread")
+    parser.add_argument("--dynamic-resolution", action="store_true",
+                        help="render offscreen at a resolution scaled to hold --target-fps, then upscale to the window")
+    parser.add_argument("--target-fps", type=float, default=60.0,
+                        help="frame rate the dynamic resolution controller aims for")
+    parser.add_argument("--min-render-scale", type=float, default=0.5,
+                        help="lowest fraction of the window resolution dynamic resolution may render at")
+    parser.add_argument("--telemetry-hz", type=float, default=20.0,
+                        help="rate of live runtime values sent to the property editor (0 disables them)")
+    parser.add_argument("--checkpoint", metavar="PATH", default=str(DEFAULT_CHECKPOINT),
+                        help="checkpoint file written with F6 and by autosave, and restored with F9")
+    parser.add_argument("--restore", metavar="PATH",
+                        help="restore a checkpoint once the bodies are created")
+    parser.add_argument("--autosave", metavar="SECONDS", type=float, default=0.0,
+                        help="write a checkpoint every SECONDS seconds (0 disables autosave)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record body positions, velocities and angles to a trajectory file")
+    parser.add_argument("--record-interval", metavar="SECONDS", type=float, default=0.05,
+                        help="simulation time between trajectory samples (0 samples every step)")
+    parser.add_argument("--record-session", metavar="PATH",
+                        help="log input, editor changes and frame times so the session can be replayed")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a logged session as fast as possible and report frame times")
+    parser.add_argument("--replay-realtime", action="store_true",
+                        help="replay at the pace the session was recorded")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.trace:
+        tracer.enable(args.trace_capacity)
+    
     try:
-        system = SolarSystem()
+        system = SolarSystem(startup_report=args.startup_report, upload_budget_ms=args.upload_budget_ms,
+                             catalog_path=args.catalog, belt_particles=args.belt_particles,
+                             ring_particles=args.ring_particles, max_moons=args.max_moons,
+                             multi_draw_indirect=args.multi_draw_indirect, watch_shaders=args.watch_shaders,
+                             shader_cache=args.shader_cache, telemetry_hz=args.telemetry_hz,
+                             script_path=args.script, sim_thread=args.sim_thread, sim_rate=args.sim_rate,
+                             dynamic_resolution=args.dynamic_resolution, target_fps=args.target_fps,
+                             min_render_scale=args.min_render_scale, checkpoint_path=args.checkpoint,
+                             restore_path=args.restore, autosave_interval=args.autosave,
+                             record_path=args.record, record_interval=args.record_interval,
+                             session_record_path=args.record_session, session_replay_path=args.replay,
+                             replay_realtime=args.replay_realtime)
         system.run()
         
     except Exception as e:
@@ -995,4 +1640,6 @@ if __name__ == "__main__":
         try:
             pygame.quit()
         except:
-            pass
\ No newline at end of file
+            pass
+        if args.trace:
+            tracer.dump(args.trace)
\ No newline at end of file
@@ -0,0 +1,170 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from render_state import gl_state
+from asset_streamer import PlaceholderSphere
+from body_catalog import PlanetConfig, BODY_MOON
+from transforms import to_gl_layout
+
+# Color of every moon, which have no catalog entry of their own
+MOON_COLOR = (0.6, 0.6, 0.6)
+
+class MoonSystem:
+    """Moons of every body, registered as bodies orbiting their parent and drawn as one instanced batch of spheres.
+    
+    Each moon is a row of the shared BodyState whose parent is the body it orbits, so the simulation,
+    selection, the editor, checkpoints and trajectory recordings treat it like any other body.
+    BodyState composes positions over the parent/child hierarchy, so moons follow their parent without
+    inheriting its spin or scale. Orbits and sizes are generated in parent radii and fixed in scene units
+    from the parent's size when the moons are registered.
+    """
+    
+    def __init__(self, parent_ids, moon_counts, seed=3):
+        """parent_ids are body ids with at least one moon; moon_counts the number of moons of each"""
+        rng = np.random.RandomState(seed)
+        self.parent = np.repeat(np.asarray(parent_ids, dtype=np.int64), moon_counts)
+        self.count = len(self.parent)
+        
+        # Rank of each moon within its parent: the first few are the large regular moons
+        starts = np.repeat(np.cumsum(moon_counts) - moon_counts, moon_counts)
+        self.rank = np.arange(self.count) - starts
+        regular = self.rank < 4
+        
+        # Regular moons orbit close in on near-equatorial orbits, irregular ones far out and inclined
+        self.orbit_radius = np.where(
+            regular,
+            rng.uniform(2.5, 6.0, self.count),
+            np.exp(rng.uniform(np.log(6.0), np.log(15.0), self.count))
+        )
+        self.size = np.where(regular, rng.uniform(0.1, 0.2, self.count), rng.uniform(0.03, 0.06, self.count))
+        self.inclination = np.where(
+            regular,
+            rng.normal(0.0, 1.5, self.count),
+            rng.uniform(-35.0, 35.0, self.count)
+        )
+        self.phase = rng.uniform(0, 360, self.count)
+        
+        # Kepler's third law relative to an orbit of three parent radii, in degrees per second;
+        # some irregular moons are retrograde
+        direction = np.where(~regular & (rng.random_sample(self.count) < 0.5), -1.0, 1.0)
+        self.orbit_speed = direction * np.degrees(0.6 * (self.orbit_radius / 3.0) ** -1.5)
+        
+        # Body ids, set when the moons are registered
+        self.ids = np.zeros(0, dtype=np.intp)
+        
+        self.sphere = None
+        self.VBO_instances = None
+    
+    @classmethod
+    def for_bodies(cls, registry, catalog, max_per_body=None):
+        """Create moons for every registered body, using the catalog's moon counts"""
+        parent_ids, moon_counts = [], []
+        for body_id, planet in enumerate(registry.bodies):
+            if planet is None or planet.catalog_row < 0:
+                continue
+            count = int(catalog.columns['moons'][planet.catalog_row])
+            if max_per_body is not None:
+                count = min(count, max_per_body)
+            if count > 0:
+                parent_ids.append(body_id)
+                moon_counts.append(count)
+        return cls(parent_ids, moon_counts)
+    
+    def configs(self, registry):
+        """PlanetConfig of each moon, in catalog units derived from its parent's values.
+        
+        Moons are tidally locked: the rotation period is chosen so they spin at their orbital speed.
+        """
+        configs = []
+        for i, parent_id in enumerate(self.parent.tolist()):
+            parent = registry.by_id(parent_id)
+            speed = float(self.orbit_speed[i])
+            configs.append(PlanetConfig(
+                name=f"{parent.config.name} {int(self.rank[i]) + 1}",
+                model_file="",
+                diameter=float(self.size[i]) * parent.diameter,
+                distance=float(self.orbit_radius[i]) * parent.diameter / 2 / 1e6,
+                mass=0.0,
+                orbit_speed=speed / 0.02,
+                rotation_period=10.0 / speed,
+                color=MOON_COLOR,
+                moons=0,
+                has_rings=False
+            ))
+        return configs
+    
+    def register(self, registry, create_body):
+        """Add every moon to the registry as create_body(config=, scale=, orbit_radius=, flags=).
+        
+        Returns the moon bodies in order.
+        """
+        state = registry.state
+        parent_scale = state.scale[self.parent]
+        scales = (self.size * parent_scale).tolist()
+        radii = (self.orbit_radius * parent_scale).tolist()
+        
+        bodies = []
+        for config, scale, radius in zip(self.configs(registry), scales, radii):
+            body = create_body(config=config, scale=scale, orbit_radius=radius, flags=BODY_MOON)
+            registry.add(body)
+            bodies.append(body)
+        
+        self.ids = np.array([body.body_id for body in bodies], dtype=np.intp)
+        state.set_parents(self.ids, self.parent)
+        state.orbit_inclination[self.ids] = self.inclination
+        state.orbit_angle[self.ids] = self.phase
+        return bodies
+    
+    def setup_buffers(self):
+        try:
+            self.sphere = PlaceholderSphere(sectors=16, stacks=8)
+            self.VBO_instances = glGenBuffers(1)
+            
+            glBindVertexArray(self.sphere.VAO)
+            glBindBuffer(GL_ARRAY_BUFFER, self.VBO_instances)
+            glBufferData(GL_ARRAY_BUFFER, self.count * 64, None, GL_STREAM_DRAW)
+            
+            # A mat4 attribute takes four consecutive locations, one per column
+            for column in range(4):
+                location = 3 + column
+                glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, 64, ctypes.c_void_p(column * 16))
+                glEnableVertexAttribArray(location)
+                glVertexAttribDivisor(location, 1)
+            
+            glBindVertexArray(0)
+            
+        except Exception as e:
+            pass
+    
+    def render(self, shader, matrices, color=MOON_COLOR):
+        """Draw every moon in one instanced call from its (count, 4, 4) world matrix; removed moons should have zero matrices"""
+        try:
+            if self.sphere is None or self.count == 0:
+                return
+            
+            matrices = to_gl_layout(matrices)
+            
+            # Orphan the previous frame's buffer and write every matrix in one upload
+            glBindBuffer(GL_ARRAY_BUFFER, self.VBO_instances)
+            glBufferData(GL_ARRAY_BUFFER, matrices.nbytes, matrices, GL_STREAM_DRAW)
+            
+            shader.set_vec3("objectColor", color)
+            shader.set_vec3("lightPos", [0, 0, 0])
+            shader.set_vec3("lightColor", [1.0, 1.0, 1.0])
+            
+            gl_state.bind_texture(0, GL_TEXTURE_2D, self.sphere.texture_id)
+            gl_state.bind_vertex_array(self.sphere.VAO)
+            glDrawElementsInstanced(GL_TRIANGLES, self.sphere.index_count, GL_UNSIGNED_INT, None, self.count)
+            gl_state.count(3)
+            
+        except Exception as e:
+            pass
+    
+    def cleanup(self):
+        try:
+            if self.VBO_instances:
+                glDeleteBuffers(1, [self.VBO_instances])
+            if self.sphere:
+                self.sphere.cleanup()
+        except Exception as e:
+            pass
@@ -0,0 +1,114 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from render_state import gl_state
+
+# Saturn's main rings in planet radii: (inner, outer, brightness) for the C, B and A rings
+SATURN_RING_BANDS = [
+    (1.24, 1.53, 0.35),
+    (1.53, 1.95, 1.0),
+    (2.03, 2.27, 0.7)
+]
+
+class OrbitalParticles:
+    """Point cloud of particles on circular orbits, rendered through the same GL_POINTS path as the starfield.
+    
+    Each particle stores (radius, phase, angular speed, height) and a brightness; the vertex shader
+    advances every orbit from a single time uniform, so the CPU does no per-particle work per frame.
+    """
+    
+    def __init__(self, radii, phases, angular_speeds, heights, brightness):
+        self.count = len(radii)
+        self.VAO = None
+        self.VBO = None
+        
+        attributes = np.empty((self.count, 5), dtype=np.float32)
+        attributes[:, 0] = radii
+        attributes[:, 1] = phases
+        attributes[:, 2] = angular_speeds
+        attributes[:, 3] = heights
+        attributes[:, 4] = brightness
+        self._setup_opengl_buffers(attributes)
+    
+    @classmethod
+    def belt(cls, count, inner_radius, outer_radius, reference_radius, reference_speed, thickness, seed=7):
+        """Asteroid belt whose angular speed follows Kepler's third law from a reference orbit (speed in radians/s)"""
+        rng = np.random.RandomState(seed)
+        
+        # Denser towards the middle of the belt
+        radii = inner_radius + (outer_radius - inner_radius) * rng.beta(2.0, 2.0, count)
+        phases = rng.uniform(0, 2 * np.pi, count)
+        angular_speeds = reference_speed * (radii / reference_radius) ** -1.5
+        heights = rng.normal(0.0, thickness, count)
+        brightness = rng.uniform(0.35, 1.0, count)
+        return cls(radii, phases, angular_speeds, heights, brightness)
+    
+    @classmethod
+    def ring(cls, count, bands=SATURN_RING_BANDS, inner_speed=0.5, thickness=0.01, seed=11):
+        """Planetary ring in units of the parent's radius; bands are (inner, outer, brightness) tuples"""
+        rng = np.random.RandomState(seed)
+        bands = np.asarray(bands, dtype=np.float64)
+        
+        # Spread particles over the bands in proportion to their area
+        areas = bands[:, 1] ** 2 - bands[:, 0] ** 2
+        band = rng.choice(len(bands), size=count, p=areas / areas.sum())
+        inner, outer = bands[band, 0], bands[band, 1]
+        radii = np.sqrt(rng.uniform(inner ** 2, outer ** 2))
+        
+        phases = rng.uniform(0, 2 * np.pi, count)
+        angular_speeds = inner_speed * (radii / bands[:, 0].min()) ** -1.5
+        heights = rng.normal(0.0, thickness, count)
+        brightness = bands[band, 2] * rng.uniform(0.6, 1.0, count)
+        return cls(radii, phases, angular_speeds, heights, brightness)
+    
+    def _setup_opengl_buffers(self, attributes):
+        try:
+            stride = attributes.shape[1] * 4
+            
+            self.VAO = glGenVertexArrays(1)
+            self.VBO = glGenBuffers(1)
+            
+            glBindVertexArray(self.VAO)
+            
+            glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+            glBufferData(GL_ARRAY_BUFFER, attributes.nbytes, attributes, GL_STATIC_DRAW)
+            glVertexAttribPointer(0, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+            glEnableVertexAttribArray(0)
+            glVertexAttribPointer(1, 1, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(4 * 4))
+            glEnableVertexAttribArray(1)
+            
+            glBindVertexArray(0)
+            
+        except Exception as e:
+            pass
+    
+    def render(self, shader, model, color, point_size=1.0):
+        """Draw with the particle shader already in use and its view, projection and time uniforms set.
+        
+        model is a column-major 4x4 float32 array, as produced by transforms.to_gl_layout.
+        """
+        try:
+            if self.VAO is None:
+                return
+            
+            gl_state.set_capability(GL_PROGRAM_POINT_SIZE, True)
+            
+            shader.set_mat4("model", model)
+            shader.set_vec3("objectColor", color)
+            shader.set_float("pointSize", point_size)
+            
+            gl_state.bind_vertex_array(self.VAO)
+            glDrawArrays(GL_POINTS, 0, self.count)
+            gl_state.count()
+            
+        except Exception as e:
+            pass
+    
+    def cleanup(self):
+        try:
+            if self.VAO:
+                glDeleteVertexArrays(1, [self.VAO])
+            if self.VBO:
+                glDeleteBuffers(1, [self.VBO])
+        except Exception as e:
+            pass
@@ -6,14 +6,65 @@ Runs as a separate process to avoid threading issues with pygame
 
 import tkinter as tk
 from tkinter import ttk
+import argparse
 import json
 import time
 import os
 import sys
 from pathlib import Path
+from dataclasses import dataclass
+from telemetry import TelemetryReceiver
+
+@dataclass(frozen=True)
+class PropertyField:
+    """An editable property: its key in the planet data, slider range and, if different, the range for stars"""
+    label: str
+    name: str
+    unit: str
+    min_value: float
+    max_value: float
+    star_range: tuple = None
+    
+    def range(self, is_star):
+        if is_star and self.star_range:
+            return self.star_range
+        return (self.min_value, self.max_value)
+
+@dataclass(frozen=True)
+class FormSection:
+    title: str
+    fields: tuple
+    for_stars: bool = True
+
+PROPERTY_SCHEMA = (
+    FormSection("Editable Properties", (
+        PropertyField("Rotation Speed", "rotation_speed", "degrees/second", -1000, 1000),
+        PropertyField("Orbit Speed", "orbit_speed", "units/second", -10, 10),
+        PropertyField("Scale", "scale", "units", 0.1, 50, star_range=(1.0, 200.0)),
+    )),
+    FormSection("Physical Properties", (
+        PropertyField("Diameter", "diameter", "km", 1000, 200000),
+        PropertyField("Distance", "distance", "million km", 10, 6000),
+    ), for_stars=False),
+)
+
+# Targets and operations offered for group edits, as sent to the simulator
+GROUP_TARGETS = ('planets', 'all')
+GROUP_OPERATIONS = ('multiply', 'add', 'set')
+
+INFO_FIELDS = (
+    ("Diameter", lambda data: f"{data['diameter']:,.0f} km"),
+    ("Distance", lambda data: f"{data['distance']:,.1f} million km"),
+    ("Mass", lambda data: f"{data['mass']:,.2f} × 10²⁴ kg"),
+    ("Moons", lambda data: f"{data['moons']}"),
+    ("Has Rings", lambda data: 'Yes' if data['has_rings'] else 'No'),
+)
 
 class PropertyEditor:
-    def __init__(self):
+    # Milliseconds between polls of the telemetry socket; faster than the fastest publish rate
+    TELEMETRY_POLL_MS = 15
+    
+    def __init__(self, telemetry_port=None):
         self.root = tk.Tk()
         self.root.title("Solar System Property Editor")
         
@@ -27,10 +78,24 @@ class PropertyEditor:
         self.shutdown_file = self.data_dir / "shutdown_signal.txt"
         
         self.current_planet = None
+        self.planet_data_mtime = None
         self.vars = {}
+        self.scales = {}
+        
+        # Set while values from the simulator are written to the form, so they are not echoed back
+        self.suppress_changes = False
+        
+        self.telemetry = None
+        if telemetry_port:
+            try:
+                self.telemetry = TelemetryReceiver(telemetry_port)
+            except Exception as e:
+                pass
         
         self.setup_ui()
         self.start_monitoring()
+        if self.telemetry:
+            self.poll_telemetry()
     
     def position_window(self):
         """Position the window to appear in front of the main application"""
@@ -81,73 +146,47 @@ class PropertyEditor:
                                         text="Select a planet in the main application\nto edit its properties", 
                                         font=('Arial', 12))
         self.no_planet_label.pack(pady=50)
+        
+        self.build_form()
     
-    def clear_content(self):
-        """Clear all content from the scrollable frame"""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-    
-    def create_property_controls(self, planet_data):
-        """Create property controls for the planet"""
-        self.clear_content()
-        self.vars.clear()
+    def build_form(self):
+        """Create the widgets for every field in the schema; they are rebound, never rebuilt, per planet"""
+        self.form = ttk.Frame(self.scrollable_frame)
         
-        title = ttk.Label(self.scrollable_frame, 
-                         text=f"{planet_data['name'].title()} Properties", 
-                         font=('Arial', 14, 'bold'))
-        title.pack(pady=(0, 10))
+        self.title_label = ttk.Label(self.form, font=('Arial', 14, 'bold'))
+        self.title_label.pack(pady=(0, 10))
         
-        info_frame = ttk.LabelFrame(self.scrollable_frame, text="Basic Information")
+        info_frame = ttk.LabelFrame(self.form, text="Basic Information")
         info_frame.pack(fill=tk.X, pady=5)
-        
-        ttk.Label(info_frame, text=f"Diameter: {planet_data['diameter']:,.0f} km").pack(anchor=tk.W, padx=5, pady=2)
-        ttk.Label(info_frame, text=f"Distance: {planet_data['distance']:,.1f} million km").pack(anchor=tk.W, padx=5, pady=2)
-        ttk.Label(info_frame, text=f"Mass: {planet_data['mass']:,.2f} × 10²⁴ kg").pack(anchor=tk.W, padx=5, pady=2)
-        ttk.Label(info_frame, text=f"Moons: {planet_data['moons']}").pack(anchor=tk.W, padx=5, pady=2)
-        ttk.Label(info_frame, text=f"Has Rings: {'Yes' if planet_data['has_rings'] else 'No'}").pack(anchor=tk.W, padx=5, pady=2)
-        
-        edit_frame = ttk.LabelFrame(self.scrollable_frame, text="Editable Properties")
-        edit_frame.pack(fill=tk.X, pady=5)
-        
-        self.create_property_control(edit_frame, "Rotation Speed", 
-                                   planet_data['rotation_speed'], -1000, 1000, 
-                                   "rotation_speed", "degrees/second")
-        
-        self.create_property_control(edit_frame, "Orbit Speed", 
-                                   planet_data['orbit_speed'], -10, 10, 
-                                   "orbit_speed", "units/second")
-        
-        if planet_data['name'] == 'sun':
-            self.create_property_control(edit_frame, "Scale", 
-                                       planet_data['scale'], 1.0, 200.0, 
-                                       "scale", "units")
-        else:
-            self.create_property_control(edit_frame, "Scale", 
-                                       planet_data['scale'], 0.1, 50, 
-                                       "scale", "units")
-        
-        if planet_data['name'] != 'sun':
-            physical_frame = ttk.LabelFrame(self.scrollable_frame, text="Physical Properties")
-            physical_frame.pack(fill=tk.X, pady=5)
-            
-            self.create_property_control(physical_frame, "Diameter", 
-                                       planet_data['diameter'], 1000, 200000, 
-                                       "diameter", "km")
-            
-            self.create_property_control(physical_frame, "Distance", 
-                                       planet_data['distance'], 10, 6000, 
-                                       "distance", "million km")
-        
-        values_frame = ttk.LabelFrame(self.scrollable_frame, text="Current Runtime Values")
-        values_frame.pack(fill=tk.X, pady=5)
-        
-        self.orbit_angle_label = ttk.Label(values_frame, text=f"Orbit Angle: {planet_data['orbit_angle']:.1f}°")
+        self.info_labels = []
+        for label, format_value in INFO_FIELDS:
+            info_label = ttk.Label(info_frame)
+            info_label.pack(anchor=tk.W, padx=5, pady=2)
+            self.info_labels.append((info_label, label, format_value))
+        
+        # Sections are shown and hidden per body inside their own container, which keeps its place in the form
+        self.sections_frame = ttk.Frame(self.form)
+        self.sections_frame.pack(fill=tk.X)
+        self.section_frames = []
+        for section in PROPERTY_SCHEMA:
+            frame = ttk.LabelFrame(self.sections_frame, text=section.title)
+            frame.pack(fill=tk.X, pady=5)
+            self.section_frames.append((frame, section))
+            for field in section.fields:
+                self.create_property_control(frame, field)
+        
+        self.build_group_edit()
+        
+        self.values_frame = ttk.LabelFrame(self.form, text="Current Runtime Values")
+        self.values_frame.pack(fill=tk.X, pady=5)
+        
+        self.orbit_angle_label = ttk.Label(self.values_frame)
         self.orbit_angle_label.pack(anchor=tk.W, padx=5, pady=2)
         
-        self.rotation_angle_label = ttk.Label(values_frame, text=f"Rotation Angle: {planet_data['rotation_angle']:.1f}°")
+        self.rotation_angle_label = ttk.Label(self.values_frame)
         self.rotation_angle_label.pack(anchor=tk.W, padx=5, pady=2)
         
-        button_frame = ttk.Frame(self.scrollable_frame)
+        button_frame = ttk.Frame(self.form)
         button_frame.pack(fill=tk.X, pady=10)
         
         ttk.Button(button_frame, text="Reset Position", 
@@ -155,42 +194,108 @@ class PropertyEditor:
         
         ttk.Button(button_frame, text="Reset All Properties", 
                   command=self.reset_all_properties).pack(side=tk.LEFT, padx=5)
-    
+        
         ttk.Button(button_frame, text="Reset Simulation", 
                   command=self.reset_simulation).pack(side=tk.LEFT, padx=5)
     
-    def create_property_control(self, parent, label, value, min_val, max_val, var_name, unit):
+    def build_group_edit(self):
+        """Controls that apply one edit to every planet or every body at once"""
+        frame = ttk.LabelFrame(self.form, text="Group Edit")
+        frame.pack(fill=tk.X, pady=5)
+        
+        names = [field.name for section in PROPERTY_SCHEMA for field in section.fields]
+        self.group_property = tk.StringVar(value=names[0])
+        self.group_operation = tk.StringVar(value=GROUP_OPERATIONS[0])
+        self.group_target = tk.StringVar(value=GROUP_TARGETS[0])
+        self.group_value = tk.StringVar(value="1.0")
+        
+        row = ttk.Frame(frame)
+        row.pack(fill=tk.X, padx=5, pady=3)
+        ttk.Combobox(row, textvariable=self.group_property, values=names, state="readonly", width=14).pack(side=tk.LEFT)
+        ttk.Combobox(row, textvariable=self.group_operation, values=GROUP_OPERATIONS, state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Entry(row, textvariable=self.group_value, width=8).pack(side=tk.LEFT)
+        
+        row = ttk.Frame(frame)
+        row.pack(fill=tk.X, padx=5, pady=3)
+        ttk.Label(row, text="Apply to:").pack(side=tk.LEFT)
+        ttk.Combobox(row, textvariable=self.group_target, values=GROUP_TARGETS, state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Button(row, text="Apply", command=self.apply_group_edit).pack(side=tk.LEFT, padx=5)
+    
+    def create_property_control(self, parent, field):
         """Create a property control with label, entry, and slider"""
         frame = ttk.Frame(parent)
         frame.pack(fill=tk.X, padx=5, pady=3)
         
-        ttk.Label(frame, text=f"{label} ({unit}):", width=15).pack(side=tk.LEFT)
+        ttk.Label(frame, text=f"{field.label} ({field.unit}):", width=15).pack(side=tk.LEFT)
         
-        var = tk.DoubleVar(value=value)
-        self.vars[var_name] = var
+        var = tk.DoubleVar(value=field.min_value)
+        self.vars[field.name] = var
         
         entry = ttk.Entry(frame, textvariable=var, width=10)
         entry.pack(side=tk.LEFT, padx=5)
         
-        scale = ttk.Scale(frame, from_=min_val, to=max_val, variable=var, 
+        scale = ttk.Scale(frame, from_=field.min_value, to=field.max_value, variable=var, 
                          orient=tk.HORIZONTAL, length=150)
         scale.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self.scales[field.name] = scale
         
-        var.trace_add('write', lambda *args, name=var_name: self.on_property_change(name))
+        var.trace_add('write', lambda *args, name=field.name: self.on_property_change(name))
+    
+    def show_planet(self, planet_data):
+        """Rebind the form to a planet's values without sending them back as changes"""
+        is_star = planet_data.get('is_star', False)
+        
+        self.title_label.config(text=f"{planet_data['name'].title()} Properties")
+        for info_label, label, format_value in self.info_labels:
+            info_label.config(text=f"{label}: {format_value(planet_data)}")
+        
+        self.suppress_changes = True
+        try:
+            # Repacked in schema order, so a section hidden for a star comes back in its place
+            for frame, section in self.section_frames:
+                frame.pack_forget()
+            for frame, section in self.section_frames:
+                if is_star and not section.for_stars:
+                    continue
+                frame.pack(fill=tk.X, pady=5)
+                for field in section.fields:
+                    min_value, max_value = field.range(is_star)
+                    self.scales[field.name].configure(from_=min_value, to=max_value)
+                    self.vars[field.name].set(planet_data[field.name])
+        finally:
+            self.suppress_changes = False
+        
+        self.update_runtime_labels(planet_data)
+        
+        if not self.form.winfo_manager():
+            self.no_planet_label.pack_forget()
+            self.form.pack(fill=tk.X)
     
     def on_property_change(self, property_name):
         """Handle property changes"""
+        if self.suppress_changes:
+            return
         if property_name in self.vars:
             value = self.vars[property_name].get()
             self.send_property_change(property_name, value)
     
-    def send_property_change(self, property_name, value):
+    def apply_group_edit(self):
+        """Send the group edit; the simulator applies it to all targeted bodies in one array operation"""
+        try:
+            value = float(self.group_value.get())
+        except ValueError as e:
+            return
+        self.send_property_change(self.group_property.get(), value,
+                                  operation=self.group_operation.get(), target=self.group_target.get())
+    
+    def send_property_change(self, property_name, value, **options):
         """Send property change to main application"""
         try:
             change_data = {
                 'property': property_name,
                 'value': value,
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                **options
             }
             
             with open(self.changes_file, 'w') as f:
@@ -227,33 +332,66 @@ class PropertyEditor:
         """Monitor for planet data updates from main application"""
         try:
             if self.planet_data_file.exists():
+                # The file only changes on selection and resets; runtime values arrive as telemetry
+                mtime = self.planet_data_file.stat().st_mtime
+                if mtime == self.planet_data_mtime:
+                    return
+                self.planet_data_mtime = mtime
+                
                 with open(self.planet_data_file, 'r') as f:
                     planet_data = json.load(f)
                 
                 if (self.current_planet is None or 
                     self.current_planet['name'] != planet_data['name']):
                     self.current_planet = planet_data
-                    self.create_property_controls(planet_data)
+                    self.show_planet(planet_data)
                 elif self.current_planet:
                     if ('reset_timestamp' in planet_data and 
                         ('reset_timestamp' not in self.current_planet or 
                          planet_data['reset_timestamp'] != self.current_planet['reset_timestamp'])):
                         self.current_planet = planet_data
-                        self.create_property_controls(planet_data)
+                        self.show_planet(planet_data)
                     else:
-                        if hasattr(self, 'orbit_angle_label'):
-                            self.orbit_angle_label.config(text=f"Orbit Angle: {planet_data['orbit_angle']:.1f}°")
-                        if hasattr(self, 'rotation_angle_label'):
-                            self.rotation_angle_label.config(text=f"Rotation Angle: {planet_data['rotation_angle']:.1f}°")
-                        
+                        self.update_runtime_labels(planet_data)
                         self.current_planet = planet_data
         except Exception as e:
             pass
     
+    def update_runtime_labels(self, values):
+        """Rewrite the runtime value labels in place, leaving unchanged text alone"""
+        for label_name, text in (('orbit_angle_label', f"Orbit Angle: {values.get('orbit_angle', 0.0):.1f}°"),
+                                 ('rotation_angle_label', f"Rotation Angle: {values.get('rotation_angle', 0.0):.1f}°")):
+            label = getattr(self, label_name, None)
+            if label is not None and label.winfo_exists() and label.cget('text') != text:
+                label.config(text=text)
+    
+    def poll_telemetry(self):
+        """Apply the latest streamed runtime values for the selected body"""
+        try:
+            changed = self.telemetry.poll()
+            body_id = self.current_planet.get('body_id') if self.current_planet else None
+            if body_id in changed:
+                values = self.telemetry.states[body_id]
+                self.current_planet.update(values)
+                self.update_runtime_labels(values)
+        except Exception as e:
+            pass
+        
+        self.root.after(self.TELEMETRY_POLL_MS, self.poll_telemetry)
+    
     def run(self):
         """Run the property editor"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.telemetry:
+                self.telemetry.close()
 
 if __name__ == "__main__":
-    editor = PropertyEditor()
+    parser = argparse.ArgumentParser(description="Solar System Property Editor")
+    parser.add_argument("--telemetry-port", type=int, default=None,
+                        help="localhost UDP port the simulator streams runtime values to")
+    args = parser.parse_args()
+    
+    editor = PropertyEditor(telemetry_port=args.telemetry_port)
     editor.run() 
\ No newline at end of file
@@ -0,0 +1,117 @@
+from OpenGL.GL import *
+
+class RenderState:
+    """Shadow copy of the GL state touched while drawing a frame.
+    
+    Setters skip calls that would not change anything, and every GL call made through the
+    tracker is counted, so the cost of a frame in Python->C transitions can be watched in
+    traces. Code that changes this state behind the tracker's back must call reset().
+    """
+    
+    def __init__(self):
+        self.calls = 0
+        self.skipped = 0
+        self.program = None
+        self.vertex_array = None
+        self.active_unit = None
+        self.textures = {}
+        self.capabilities = {}
+    
+    def reset(self):
+        """Forget the cached state, so the next setter of each kind is always issued"""
+        self.program = None
+        self.vertex_array = None
+        self.active_unit = None
+        self.textures.clear()
+        self.capabilities.clear()
+    
+    def begin_frame(self):
+        """Zero the counters and forget state other code may have changed between frames"""
+        self.calls = 0
+        self.skipped = 0
+        self.reset()
+    
+    def count(self, calls=1):
+        """Record GL calls issued directly, such as draws and uniform uploads"""
+        self.calls += calls
+    
+    def use_program(self, program):
+        if program == self.program:
+            self.skipped += 1
+            return
+        glUseProgram(program)
+        self.program = program
+        self.calls += 1
+    
+    def bind_vertex_array(self, vertex_array):
+        if vertex_array == self.vertex_array:
+            self.skipped += 1
+            return
+        glBindVertexArray(vertex_array)
+        self.vertex_array = vertex_array
+        self.calls += 1
+    
+    def active_texture(self, unit):
+        if unit == self.active_unit:
+            self.skipped += 1
+            return
+        glActiveTexture(GL_TEXTURE0 + unit)
+        self.active_unit = unit
+        self.calls += 1
+    
+    def bind_texture(self, unit, target, texture):
+        key = (unit, target)
+        if self.textures.get(key) == texture:
+            self.skipped += 1
+            return
+        self.active_texture(unit)
+        glBindTexture(target, texture)
+        self.textures[key] = texture
+        self.calls += 1
+    
+    def set_capability(self, capability, enabled):
+        if self.capabilities.get(capability) == enabled:
+            self.skipped += 1
+            return
+        if enabled:
+            glEnable(capability)
+        else:
+            glDisable(capability)
+        self.capabilities[capability] = enabled
+        self.calls += 1
+
+class DrawList:
+    """Draw items collected over a frame and submitted sorted by state key.
+    
+    Keys are (program, vertex array, texture, material) tuples of ints. Items with equal keys keep
+    the order they were added in. Each program can register a setup callback for its per-frame
+    uniforms, which runs once when the sorted list first switches to that program.
+    """
+    
+    def __init__(self, state):
+        self.state = state
+        self.items = []
+        self.program_setup = {}
+    
+    def set_program_setup(self, program, setup):
+        self.program_setup[program] = setup
+    
+    def add(self, key, draw):
+        self.items.append((key, len(self.items), draw))
+    
+    def submit(self):
+        self.items.sort(key=lambda item: (item[0], item[1]))
+        program = None
+        for key, _, draw in self.items:
+            if key[0] != program:
+                program = key[0]
+                self.state.use_program(program)
+                setup = self.program_setup.get(program)
+                if setup:
+                    setup()
+            draw()
+        
+        self.items.clear()
+        self.program_setup.clear()
+
+gl_state = RenderState()
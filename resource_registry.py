@@ -0,0 +1,102 @@
+import hashlib
+import threading
+
+def content_hash(data):
+    """Digest of a buffer's raw bytes, used to recognise identical meshes and textures"""
+    return hashlib.blake2b(memoryview(data).cast('B'), digest_size=16).hexdigest()
+
+class _Entry:
+    __slots__ = ('resource', 'refcount', 'release', 'ready')
+    
+    def __init__(self, resource, release, ready=None):
+        self.resource = resource
+        self.refcount = 1
+        self.release = release
+        self.ready = ready
+
+class ResourceRegistry:
+    """Reference-counted store of resources shared between loaders.
+    
+    GL objects are only ever created and released on the GL thread; decoded model data may be
+    created from worker threads through acquire_or_create.
+    """
+    
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, key):
+        """Take a reference to an existing resource, or return None if there is none"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.ready is not None:
+                return None
+            entry.refcount += 1
+            return entry.resource
+    
+    def register(self, key, resource, release=None):
+        """Store a newly created resource holding one reference; release(resource) runs when the last user goes away"""
+        with self._lock:
+            if key in self._entries:
+                raise KeyError(f"Resource already registered: {key!r}")
+            self._entries[key] = _Entry(resource, release)
+        return resource
+    
+    def acquire_or_create(self, key, factory, release=None):
+        """Acquire key, running factory() to create it if needed; concurrent callers wait for a single creation"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    ready = threading.Event()
+                    self._entries[key] = _Entry(None, release, ready)
+                    break
+                if entry.ready is None:
+                    entry.refcount += 1
+                    return entry.resource
+                ready = entry.ready
+            ready.wait()
+        
+        try:
+            resource = factory()
+        except Exception:
+            with self._lock:
+                del self._entries[key]
+            ready.set()
+            raise
+        
+        with self._lock:
+            entry = self._entries[key]
+            entry.resource = resource
+            entry.ready = None
+        ready.set()
+        return resource
+    
+    def release(self, key):
+        """Drop a reference; the resource is freed when its count reaches zero"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.ready is not None:
+                return
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            del self._entries[key]
+        
+        if entry.release:
+            entry.release(entry.resource)
+    
+    def refcount(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refcount if entry else 0
+    
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+registry = ResourceRegistry()
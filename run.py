@@ -1,22 +1,28 @@
+import importlib.util
+import runpy
 import subprocess
 import sys
 import os
 from pathlib import Path
 
+# pip package name -> importable module name
+REQUIRED_PACKAGES = {
+    'numpy': 'numpy',
+    'pygame': 'pygame',
+    'PyOpenGL': 'OpenGL',
+    'PyOpenGL_accelerate': 'OpenGL_accelerate',
+    'PyGLM': 'glm'
+}
+
 def check_dependencies():
-    """Check if all required packages are installed"""
-    required_packages = ['numpy', 'pygame', 'PyOpenGL', 'PyOpenGL_accelerate', 'glm']
-    missing_packages = []
-    
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    """Install any required packages that cannot be found (only run with --check-deps)"""
+    missing_packages = [
+        package for package, module in REQUIRED_PACKAGES.items()
+        if importlib.util.find_spec(module) is None
+    ]
     
-    if missing_packages:
-        for package in missing_packages:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+    for package in missing_packages:
+        subprocess.check_call([sys.executable, "-m", "pip", "install", package])
 
 def ensure_directories():
     """Ensure all required directories exist"""
@@ -290,21 +296,26 @@ class Shader:
 '''
     Path("shader.py").write_text(shader_code)
 
-def run_application():
-    """Run the main.py application"""
+def run_application(args):
+    """Run the main.py application in this interpreter instead of spawning a second one"""
+    sys.argv = ["main.py", *args]
     try:
-        subprocess.run([sys.executable, "main.py"], check=True)
-    except subprocess.CalledProcessError:
+        runpy.run_path(str(Path(__file__).parent / "main.py"), run_name="__main__")
+    except ImportError as e:
+        print(f"Missing dependency: {e.name}. Run 'python run.py --check-deps' to install it.")
         return False
     except KeyboardInterrupt:
         pass
     return True
 
 if __name__ == "__main__":
-    check_dependencies()
+    args = sys.argv[1:]
+    if "--check-deps" in args:
+        args.remove("--check-deps")
+        check_dependencies()
     ensure_directories()
     create_shader_files()
     create_dummy_models()
     create_glb_loader()
     create_shader_class()
-    run_application() 
\ No newline at end of file
+    run_application(args) 
\ No newline at end of file
@@ -0,0 +1,299 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from render_state import gl_state
+
+# Interleaved arena vertex: position, normal, texcoord
+VERTEX_FLOATS = 8
+INDIRECT_COMMAND = np.dtype([
+    ('count', np.uint32),
+    ('instance_count', np.uint32),
+    ('first_index', np.uint32),
+    ('base_vertex', np.int32),
+    ('base_instance', np.uint32)
+])
+
+def supports_multi_draw_indirect():
+    """True when the context has glMultiDrawElementsIndirect with baseInstance (GL 4.3 or the ARB extensions)"""
+    try:
+        version = glGetString(GL_VERSION).decode().split()[0]
+        major, minor = (int(part) for part in version.split('.')[:2])
+        if (major, minor) >= (4, 3):
+            return bool(glMultiDrawElementsIndirect)
+        
+        extensions = {glGetStringi(GL_EXTENSIONS, i).decode() for i in range(glGetIntegerv(GL_NUM_EXTENSIONS))}
+        return {'GL_ARB_multi_draw_indirect', 'GL_ARB_base_instance'} <= extensions and bool(glMultiDrawElementsIndirect)
+    except Exception as e:
+        return False
+
+class MeshArena:
+    """Shared vertex and index buffers that every static mesh is appended to, drawn through one VAO"""
+    
+    def __init__(self, vertex_capacity=1 << 16, index_capacity=1 << 18):
+        self.vertex_count = 0
+        self.index_count = 0
+        self.vertex_capacity = 0
+        self.index_capacity = 0
+        self.draw_id_capacity = 0
+        self.ranges = {}
+        
+        self.VAO = glGenVertexArrays(1)
+        self.VBO = None
+        self.EBO = None
+        self.VBO_draw_ids = glGenBuffers(1)
+        
+        self._resize_vertices(vertex_capacity)
+        self._resize_indices(index_capacity)
+        self.reserve_draw_ids(256)
+    
+    def _grow_buffer(self, old_buffer, old_bytes, new_bytes):
+        """New buffer of new_bytes holding the first old_bytes of old_buffer, copied on the GPU"""
+        buffer = glGenBuffers(1)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, buffer)
+        glBufferData(GL_COPY_WRITE_BUFFER, new_bytes, None, GL_STATIC_DRAW)
+        
+        if old_buffer is not None:
+            if old_bytes:
+                glBindBuffer(GL_COPY_READ_BUFFER, old_buffer)
+                glCopyBufferSubData(GL_COPY_READ_BUFFER, GL_COPY_WRITE_BUFFER, 0, 0, old_bytes)
+                glBindBuffer(GL_COPY_READ_BUFFER, 0)
+            glDeleteBuffers(1, [old_buffer])
+        
+        glBindBuffer(GL_COPY_WRITE_BUFFER, 0)
+        return buffer
+    
+    def _resize_vertices(self, capacity):
+        stride = VERTEX_FLOATS * 4
+        self.VBO = self._grow_buffer(self.VBO, self.vertex_count * stride, capacity * stride)
+        self.vertex_capacity = capacity
+        
+        glBindVertexArray(self.VAO)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(3 * 4))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(2, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(6 * 4))
+        glEnableVertexAttribArray(2)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    
+    def _resize_indices(self, capacity):
+        self.EBO = self._grow_buffer(self.EBO, self.index_count * 4, capacity * 4)
+        self.index_capacity = capacity
+        
+        glBindVertexArray(self.VAO)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+        glBindVertexArray(0)
+    
+    def reserve_draw_ids(self, count):
+        """Make the per-instance draw index attribute cover at least count draws"""
+        if count <= self.draw_id_capacity:
+            return
+        
+        capacity = max(count, self.draw_id_capacity * 2)
+        draw_ids = np.arange(capacity, dtype=np.uint32)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO_draw_ids)
+        glBufferData(GL_ARRAY_BUFFER, draw_ids.nbytes, draw_ids, GL_STATIC_DRAW)
+        self.draw_id_capacity = capacity
+        
+        glBindVertexArray(self.VAO)
+        self.point_draw_ids(0)
+        glEnableVertexAttribArray(3)
+        glVertexAttribDivisor(3, 1)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+    
+    def point_draw_ids(self, first_draw):
+        """Start the draw index attribute at first_draw; used by draws that cannot pass a baseInstance"""
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO_draw_ids)
+        glVertexAttribIPointer(3, 1, GL_UNSIGNED_INT, 4, ctypes.c_void_p(first_draw * 4))
+    
+    def add(self, key, attributes, indices):
+        """Append a mesh once per key; returns its (first_index, index_count, base_vertex) range"""
+        if key in self.ranges:
+            return self.ranges[key]
+        
+        positions = attributes['POSITION']
+        count = len(positions)
+        vertices = np.zeros((count, VERTEX_FLOATS), dtype=np.float32)
+        vertices[:, 0:3] = positions
+        if 'NORMAL' in attributes:
+            vertices[:, 3:6] = attributes['NORMAL']
+        if 'TEXCOORD_0' in attributes:
+            vertices[:, 6:8] = attributes['TEXCOORD_0']
+        indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        
+        if self.vertex_count + count > self.vertex_capacity:
+            self._resize_vertices(max(self.vertex_count + count, self.vertex_capacity * 2))
+        if self.index_count + len(indices) > self.index_capacity:
+            self._resize_indices(max(self.index_count + len(indices), self.index_capacity * 2))
+        
+        glBindBuffer(GL_COPY_WRITE_BUFFER, self.VBO)
+        glBufferSubData(GL_COPY_WRITE_BUFFER, self.vertex_count * vertices.itemsize * VERTEX_FLOATS, vertices.nbytes, vertices)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, self.EBO)
+        glBufferSubData(GL_COPY_WRITE_BUFFER, self.index_count * 4, indices.nbytes, indices)
+        glBindBuffer(GL_COPY_WRITE_BUFFER, 0)
+        
+        mesh_range = (self.index_count, len(indices), self.vertex_count)
+        self.ranges[key] = mesh_range
+        self.vertex_count += count
+        self.index_count += len(indices)
+        return mesh_range
+    
+    def cleanup(self):
+        try:
+            glDeleteVertexArrays(1, [self.VAO])
+            glDeleteBuffers(3, [self.VBO, self.EBO, self.VBO_draw_ids])
+        except Exception as e:
+            pass
+
+class SceneRenderer:
+    """Draws every loaded body from one mesh arena and one texture array with a constant number of submissions.
+    
+    Each draw is an indirect command whose baseInstance indexes a per-draw record in a texture
+    buffer: (model matrix index, texture layer) and the object color. With GL 4.3 the whole scene
+    is a single glMultiDrawElementsIndirect call; on GL 3.3 draws of the same mesh are merged into
+    instanced calls.
+    """
+    
+    # RGBA32F texels per draw record
+    DRAW_RECORD_TEXELS = 2
+    
+    def __init__(self, shader, model_matrix_unit, normal_matrix_unit, textures, draw_data_unit=2, use_indirect=None):
+        self.shader = shader
+        self.model_matrix_unit = model_matrix_unit
+        self.normal_matrix_unit = normal_matrix_unit
+        self.draw_data_unit = draw_data_unit
+        self.textures = textures
+        self.use_indirect = supports_multi_draw_indirect() if use_indirect is None else use_indirect
+        
+        self.arena = MeshArena()
+        self.bodies = {}
+        self.dirty = False
+        self.batches = []
+        self.draw_count = 0
+        
+        self.indirect_buffer = glGenBuffers(1) if self.use_indirect else None
+        self.TBO_draw_data = glGenBuffers(1)
+        self.draw_data_texture = glGenTextures(1)
+        
+        self.assign_units()
+        shader.on_reload.append(self.assign_units)
+    
+    def assign_units(self):
+        """Point the program's samplers at their texture units"""
+        self.shader.use()
+        self.shader.set_int("modelMatrices", self.model_matrix_unit)
+        self.shader.set_int("normalMatrices", self.normal_matrix_unit)
+        self.shader.set_int("drawData", self.draw_data_unit)
+        self.shader.set_int("textureLayers", 0)
+    
+    def add_body(self, body_id, loader, color):
+        """Copy a loaded model's primitives into the arena and its textures into the array, then queue its draws"""
+        draws = []
+        layer = -1
+        for key, attributes, indices, texture in loader.draw_items():
+            # Primitives without a texture of their own keep the previous one, as GLBLoader.render does
+            if texture is not None:
+                layer = self.textures.layer(*texture)
+            draws.append((layer, self.arena.add(key, attributes, indices)))
+        
+        self.bodies[body_id] = (draws, tuple(color))
+        self.dirty = True
+    
+    def remove_body(self, body_id):
+        if self.bodies.pop(body_id, None) is not None:
+            self.dirty = True
+    
+    def __contains__(self, body_id):
+        return body_id in self.bodies
+    
+    def _rebuild(self):
+        """Sort draws by mesh, then upload the indirect commands and per-draw records"""
+        records = []
+        for body_id, (draws, color) in self.bodies.items():
+            for layer, mesh_range in draws:
+                records.append((mesh_range, body_id, layer, color))
+        records.sort(key=lambda record: record[0])
+        
+        self.draw_count = len(records)
+        self.arena.reserve_draw_ids(max(1, self.draw_count))
+        
+        commands = np.zeros(self.draw_count, dtype=INDIRECT_COMMAND)
+        draw_data = np.zeros((max(1, self.draw_count), self.DRAW_RECORD_TEXELS, 4), dtype=np.float32)
+        for index, ((first_index, index_count, base_vertex), body_id, layer, color) in enumerate(records):
+            commands[index] = (index_count, 1, first_index, base_vertex, index)
+            draw_data[index, 0] = (body_id, layer, 0.0, 0.0)
+            draw_data[index, 1] = (*color, 1.0)
+        
+        glBindBuffer(GL_TEXTURE_BUFFER, self.TBO_draw_data)
+        glBufferData(GL_TEXTURE_BUFFER, draw_data.nbytes, draw_data, GL_STATIC_DRAW)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+        glBindTexture(GL_TEXTURE_BUFFER, self.draw_data_texture)
+        glTexBuffer(GL_TEXTURE_BUFFER, GL_RGBA32F, self.TBO_draw_data)
+        glBindTexture(GL_TEXTURE_BUFFER, 0)
+        
+        if self.use_indirect and self.draw_count:
+            glBindBuffer(GL_DRAW_INDIRECT_BUFFER, self.indirect_buffer)
+            glBufferData(GL_DRAW_INDIRECT_BUFFER, commands.nbytes, commands, GL_STATIC_DRAW)
+            glBindBuffer(GL_DRAW_INDIRECT_BUFFER, 0)
+        
+        # The fallback path merges consecutive draws of one mesh into a single instanced call
+        self.batches = []
+        for index, (mesh_range, _, _, _) in enumerate(records):
+            if self.batches and self.batches[-1][2] == mesh_range:
+                self.batches[-1][1] += 1
+            else:
+                self.batches.append([index, 1, mesh_range])
+        
+        self.dirty = False
+    
+    def prepare(self):
+        """Apply pending body changes; call before the frame's tracked state is set up, as it binds buffers directly"""
+        if self.dirty:
+            self._rebuild()
+    
+    def setup(self, view, projection, light_pos=(0, 0, 0), light_color=(1.0, 1.0, 1.0)):
+        """Per-frame uniforms, set with the scene program in use"""
+        self.shader.set_mat4("view", view)
+        self.shader.set_mat4("projection", projection)
+        self.shader.set_vec3("lightPos", light_pos)
+        self.shader.set_vec3("lightColor", light_color)
+    
+    def queue(self, draw_list, view, projection):
+        """Add the whole scene to a frame's draw list as one item"""
+        if not self.draw_count:
+            return
+        draw_list.set_program_setup(self.shader.id, lambda: self.setup(view, projection))
+        draw_list.add((self.shader.id, self.arena.VAO, self.textures.texture, 0), self.draw)
+    
+    def draw(self):
+        """Draw all bodies with the scene program in use and the model matrices uploaded"""
+        gl_state.bind_texture(self.draw_data_unit, GL_TEXTURE_BUFFER, self.draw_data_texture)
+        self.textures.bind(0)
+        
+        gl_state.bind_vertex_array(self.arena.VAO)
+        if self.use_indirect:
+            glBindBuffer(GL_DRAW_INDIRECT_BUFFER, self.indirect_buffer)
+            glMultiDrawElementsIndirect(GL_TRIANGLES, GL_UNSIGNED_INT, None, self.draw_count, 0)
+            glBindBuffer(GL_DRAW_INDIRECT_BUFFER, 0)
+            gl_state.count(3)
+        else:
+            for first_draw, count, (first_index, index_count, base_vertex) in self.batches:
+                self.arena.point_draw_ids(first_draw)
+                glDrawElementsInstancedBaseVertex(GL_TRIANGLES, index_count, GL_UNSIGNED_INT,
+                                                  ctypes.c_void_p(first_index * 4), count, base_vertex)
+            self.arena.point_draw_ids(0)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+            gl_state.count(3 * len(self.batches) + 3)
+    
+    def cleanup(self):
+        try:
+            self.arena.cleanup()
+            if self.indirect_buffer:
+                glDeleteBuffers(1, [self.indirect_buffer])
+            glDeleteBuffers(1, [self.TBO_draw_data])
+            glDeleteTextures([self.draw_data_texture])
+        except Exception as e:
+            pass
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import json
+import struct
+import pygame
+
+SESSION_MAGIC = b'SSSESS\0\0'
+SESSION_VERSION = 1
+
+# magic, format version, length of the JSON header that follows
+PREAMBLE = struct.Struct('<8sII')
+
+# Per frame: dt, seconds since recording started, whether it was drawn, event and change counts
+FRAME = struct.Struct('<ddBHH')
+
+# Per event: pygame type and up to six integer attributes
+EVENT = struct.Struct('<I6i')
+
+# Length of one JSON-encoded editor change
+CHANGE = struct.Struct('<I')
+
+# Attributes kept for each input event type the simulator handles; tuples take one slot per item
+EVENT_ATTRIBUTES = {
+    pygame.QUIT: (),
+    pygame.KEYDOWN: (('key', 1), ('mod', 1)),
+    pygame.KEYUP: (('key', 1), ('mod', 1)),
+    pygame.MOUSEBUTTONDOWN: (('button', 1), ('pos', 2)),
+    pygame.MOUSEBUTTONUP: (('button', 1), ('pos', 2)),
+    pygame.MOUSEMOTION: (('pos', 2), ('rel', 2), ('buttons', 2)),
+    pygame.MOUSEWHEEL: (('x', 1), ('y', 1)),
+    pygame.VIDEOEXPOSE: (),
+    pygame.VIDEORESIZE: (('w', 1), ('h', 1)),
+    pygame.WINDOWEXPOSED: (),
+    pygame.WINDOWSHOWN: (),
+    pygame.WINDOWRESTORED: (),
+}
+
+def encode_event(event):
+    values = []
+    for name, width in EVENT_ATTRIBUTES[event.type]:
+        value = getattr(event, name)
+        values.extend(value[:width] if width > 1 else (value,))
+    values.extend([0] * (6 - len(values)))
+    return EVENT.pack(event.type, *(int(value) for value in values))
+
+def decode_event(data):
+    event_type, *values = EVENT.unpack(data)
+    attributes = {}
+    for name, width in EVENT_ATTRIBUTES[event_type]:
+        attributes[name] = tuple(values[:width]) if width > 1 else values[0]
+        values = values[width:]
+    return pygame.event.Event(event_type, attributes)
+
+def state_digest(state, sim_time):
+    """Hash of the simulation state, which a deterministic replay reproduces exactly"""
+    digest = hashlib.sha1()
+    n = state.count
+    for field in state.FIELDS:
+        digest.update(getattr(state, field)[:n].tobytes())
+    digest.update(state.pivot_offset[:n].tobytes())
+    digest.update(struct.pack('<d', sim_time))
+    return digest.hexdigest()
+
+class SessionFrame:
+    __slots__ = ('dt', 'wall', 'drawn', 'events', 'changes')
+    
+    def __init__(self, dt, wall, drawn, events, changes):
+        self.dt = dt
+        self.wall = wall
+        self.drawn = drawn
+        self.events = events
+        self.changes = changes
+
+class SessionRecorder:
+    """Writes a session log: the RNG seed, then each frame's dt, input events and applied editor changes.
+    
+    Frames that change nothing (idle waits with no input) are not logged. The log is gzip-compressed
+    and ends with a digest of the final simulation state, which replays are checked against.
+    """
+    
+    def __init__(self, path, seed):
+        self.seed = seed
+        self.frames = 0
+        self.file = gzip.open(path, 'wb', compresslevel=6)
+        header = json.dumps({'seed': seed}).encode('utf-8')
+        self.file.write(PREAMBLE.pack(SESSION_MAGIC, SESSION_VERSION, len(header)))
+        self.file.write(header)
+    
+    def frame(self, dt, wall, drawn, events, changes):
+        events = [event for event in events if event.type in EVENT_ATTRIBUTES]
+        if not (dt or drawn or events or changes):
+            return
+        self.file.write(FRAME.pack(dt, wall, drawn, len(events), len(changes)))
+        for event in events:
+            self.file.write(encode_event(event))
+        for change in changes:
+            encoded = json.dumps(change).encode('utf-8')
+            self.file.write(CHANGE.pack(len(encoded)))
+            self.file.write(encoded)
+        self.frames += 1
+    
+    def close(self, digest):
+        if self.file is None:
+            return
+        # A frame with a negative dt marks the end; the digest follows as a change
+        self.file.write(FRAME.pack(-1.0, 0.0, 0, 0, 1))
+        encoded = json.dumps({'digest': digest, 'frames': self.frames}).encode('utf-8')
+        self.file.write(CHANGE.pack(len(encoded)))
+        self.file.write(encoded)
+        self.file.close()
+        self.file = None
+
+class SessionReplay:
+    """Reads a session log back as SessionFrames"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, 'rb')
+        magic, version, header_length = PREAMBLE.unpack(self.file.read(PREAMBLE.size))
+        if magic != SESSION_MAGIC:
+            raise ValueError(f"Not a session log: {path}")
+        if version != SESSION_VERSION:
+            raise ValueError(f"Unsupported session log version {version}: {path}")
+        header = json.loads(self.file.read(header_length).decode('utf-8'))
+        self.seed = header['seed']
+        self.digest = None
+    
+    def _read_change(self):
+        length, = CHANGE.unpack(self.file.read(CHANGE.size))
+        return json.loads(self.file.read(length).decode('utf-8'))
+    
+    def frames(self):
+        """Yield the recorded frames in order; a log cut short (the app crashed) ends at its last whole frame"""
+        while True:
+            try:
+                data = self.file.read(FRAME.size)
+                if len(data) < FRAME.size:
+                    return
+                dt, wall, drawn, event_count, change_count = FRAME.unpack(data)
+                if dt < 0:
+                    self.digest = self._read_change()['digest']
+                    return
+                events = [decode_event(self.file.read(EVENT.size)) for _ in range(event_count)]
+                changes = [self._read_change() for _ in range(change_count)]
+            except (struct.error, EOFError, ValueError) as e:
+                return
+            yield SessionFrame(dt, wall, bool(drawn), events, changes)
+    
+    def close(self):
+        self.file.close()
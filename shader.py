@@ -1,14 +1,130 @@
 from OpenGL.GL import *
+import ctypes
+import hashlib
 import os
+import struct
+import numpy as np
+from pathlib import Path
+from render_state import gl_state
+
+DEFAULT_PROGRAM_CACHE_DIR = Path(__file__).parent / "cache" / "programs"
+
+class ProgramBinaryCache:
+    """Linked program binaries stored on disk, keyed by shader source and the GL driver that produced them.
+    
+    Binaries are only portable to the exact same driver, so vendor, renderer and version strings
+    are part of the key. A binary the driver rejects is deleted and the program compiled from source.
+    """
+    
+    def __init__(self, cache_dir=DEFAULT_PROGRAM_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._supported = None
+        self._driver = None
+    
+    @property
+    def supported(self):
+        """Whether the context can save and load program binaries; checked on first use, as it needs a context"""
+        if self._supported is None:
+            try:
+                version = glGetString(GL_VERSION).decode()
+                major, minor = (int(part) for part in version.split()[0].split('.')[:2])
+                has_api = (major, minor) >= (4, 1) or 'GL_ARB_get_program_binary' in {
+                    glGetStringi(GL_EXTENSIONS, i).decode() for i in range(glGetIntegerv(GL_NUM_EXTENSIONS))
+                }
+                # The version can claim the API while the platform binding failed to load its entry points
+                has_entry_points = bool(glProgramParameteri) and bool(glProgramBinary) and bool(glGetProgramBinary)
+                self._supported = bool(has_api and has_entry_points and glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0)
+                self._driver = b"\0".join(glGetString(name) for name in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+            except Exception as e:
+                self._supported = False
+        return self._supported
+    
+    def key(self, *sources):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._driver)
+        for source in sources:
+            digest.update(b"\0")
+            digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _path(self, key):
+        return self.cache_dir / f"{key}.bin"
+    
+    def load(self, key):
+        """Linked program from the cached binary for key, or None"""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError as e:
+            return None
+        
+        program = glCreateProgram()
+        try:
+            binary_format, = struct.unpack_from('<I', data)
+            binary = np.frombuffer(data, dtype=np.uint8, offset=4)
+            glProgramBinary(program, binary_format, binary.ctypes.data_as(ctypes.c_void_p), len(binary))
+            if glGetProgramiv(program, GL_LINK_STATUS):
+                return program
+        except Exception as e:
+            pass
+        
+        # Driver updates invalidate binaries; drop the stale one so it is rebuilt from source
+        glDeleteProgram(program)
+        try:
+            path.unlink()
+        except OSError as e:
+            pass
+        return None
+    
+    def store(self, key, program):
+        try:
+            length = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+            if not length:
+                return
+            binary = np.empty(length, dtype=np.uint8)
+            written = GLsizei(0)
+            binary_format = GLenum(0)
+            glGetProgramBinary(program, length, ctypes.byref(written), ctypes.byref(binary_format),
+                               binary.ctypes.data_as(ctypes.c_void_p))
+            
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(key)
+            temporary = path.with_suffix(".tmp")
+            temporary.write_bytes(struct.pack('<I', binary_format.value) + binary[:written.value].tobytes())
+            os.replace(temporary, path)
+        except Exception as e:
+            pass
 
 class Shader:
-    def __init__(self, vertex_path, fragment_path):
+    def __init__(self, vertex_path, fragment_path, binary_cache=None):
         if not os.path.exists(vertex_path):
             raise FileNotFoundError(f"Vertex shader not found at: {vertex_path}")
         if not os.path.exists(fragment_path):
             raise FileNotFoundError(f"Fragment shader not found at: {fragment_path}")
         
+        self.vertex_path = str(vertex_path)
+        self.fragment_path = str(fragment_path)
+        self.binary_cache = binary_cache
         self.id = self._compile_shader(vertex_path, fragment_path)
+        
+        # Uniform locations are looked up once; values are program state, so unchanged ones are not re-sent
+        self._locations = {}
+        self._values = {}
+        
+        # Called with the new program in use after a reload, to restore uniforms that are set only once
+        self.on_reload = []
+    
+    def reload(self):
+        """Recompile from the source files; on error the current program is kept and the error raised"""
+        program = self._compile_shader(self.vertex_path, self.fragment_path)
+        glDeleteProgram(self.id)
+        self.id = program
+        self._locations = {}
+        self._values = {}
+        
+        self.use()
+        for callback in self.on_reload:
+            callback()
     
     def _compile_shader(self, vertex_path, fragment_path):
         with open(vertex_path, 'r', encoding='utf-8') as f:
@@ -16,11 +132,19 @@ class Shader:
         with open(fragment_path, 'r', encoding='utf-8') as f:
             fragment_src = f.read()
         
+        cache = self.binary_cache if self.binary_cache and self.binary_cache.supported else None
+        if cache:
+            cache_key = cache.key(vertex_src, fragment_src)
+            program = cache.load(cache_key)
+            if program:
+                return program
+        
         vertex = glCreateShader(GL_VERTEX_SHADER)
         glShaderSource(vertex, vertex_src)
         glCompileShader(vertex)
         if not glGetShaderiv(vertex, GL_COMPILE_STATUS):
             error = glGetShaderInfoLog(vertex).decode()
+            glDeleteShader(vertex)
             raise RuntimeError(f"Vertex shader compilation error:\n{error}")
         
         fragment = glCreateShader(GL_FRAGMENT_SHADER)
@@ -28,29 +152,139 @@ class Shader:
         glCompileShader(fragment)
         if not glGetShaderiv(fragment, GL_COMPILE_STATUS):
             error = glGetShaderInfoLog(fragment).decode()
+            glDeleteShader(vertex)
+            glDeleteShader(fragment)
             raise RuntimeError(f"Fragment shader compilation error:\n{error}")
         
         program = glCreateProgram()
         glAttachShader(program, vertex)
         glAttachShader(program, fragment)
+        if cache:
+            try:
+                glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+            except Exception as e:
+                cache = None  # Caching is an optimization; never let it stop the program from linking
         glLinkProgram(program)
-        if not glGetProgramiv(program, GL_LINK_STATUS):
-            error = glGetProgramInfoLog(program).decode()
-            raise RuntimeError(f"Shader linking error:\n{error}")
+        linked = glGetProgramiv(program, GL_LINK_STATUS)
+        error = None if linked else glGetProgramInfoLog(program).decode()
         
+        # The program keeps its own copy of the linked code; the shader objects are no longer needed
+        glDetachShader(program, vertex)
+        glDetachShader(program, fragment)
         glDeleteShader(vertex)
         glDeleteShader(fragment)
+        if not linked:
+            glDeleteProgram(program)
+            raise RuntimeError(f"Shader linking error:\n{error}")
         
+        if cache:
+            cache.store(cache_key, program)
         return program
     
     def use(self):
-        glUseProgram(self.id)
+        gl_state.use_program(self.id)
+    
+    def _location(self, name):
+        location = self._locations.get(name)
+        if location is None:
+            location = glGetUniformLocation(self.id, name)
+            self._locations[name] = location
+            gl_state.count()
+        return location
+    
+    def _changed(self, name, value):
+        """True when a uniform must be uploaded; uniforms the program does not use never are"""
+        if self._values.get(name) == value or self._location(name) == -1:
+            gl_state.skipped += 1
+            return False
+        self._values[name] = value
+        gl_state.count()
+        return True
     
     def set_mat4(self, name, value):
-        glUniformMatrix4fv(glGetUniformLocation(self.id, name), 1, GL_FALSE, value)
+        location = self._location(name)
+        if location == -1:
+            gl_state.skipped += 1
+            return
+        glUniformMatrix4fv(location, 1, GL_FALSE, value)
+        gl_state.count()
+    
+    def set_mat3(self, name, value):
+        location = self._location(name)
+        if location == -1:
+            gl_state.skipped += 1
+            return
+        glUniformMatrix3fv(location, 1, GL_FALSE, value)
+        gl_state.count()
     
     def set_vec3(self, name, value):
-        glUniform3fv(glGetUniformLocation(self.id, name), 1, value)
+        value = tuple(float(component) for component in value)
+        if self._changed(name, value):
+            glUniform3f(self._locations[name], *value)
+    
+    def set_vec4(self, name, value):
+        value = tuple(float(component) for component in value)
+        if self._changed(name, value):
+            glUniform4f(self._locations[name], *value)
     
     def set_float(self, name, value):
-        glUniform1f(glGetUniformLocation(self.id, name), value)
\ No newline at end of file
+        value = float(value)
+        if self._changed(name, value):
+            glUniform1f(self._locations[name], value)
+    
+    def set_int(self, name, value):
+        value = int(value)
+        if self._changed(name, value):
+            glUniform1i(self._locations[name], value)
+
+class ShaderManager:
+    """Named shader programs compiled from one directory, recompiled when their source files change"""
+    
+    def __init__(self, shader_dir, binary_cache=None):
+        self.shader_dir = Path(shader_dir)
+        self.binary_cache = binary_cache
+        self.programs = {}
+        self._mtimes = {}
+    
+    def _source_mtimes(self, shader):
+        try:
+            return (os.path.getmtime(shader.vertex_path), os.path.getmtime(shader.fragment_path))
+        except OSError as e:
+            return None
+    
+    def load(self, name, vertex_file, fragment_file):
+        shader = Shader(str(self.shader_dir / vertex_file), str(self.shader_dir / fragment_file), self.binary_cache)
+        self.programs[name] = shader
+        self._mtimes[name] = self._source_mtimes(shader)
+        return shader
+    
+    def __getitem__(self, name):
+        return self.programs[name]
+    
+    def __contains__(self, name):
+        return name in self.programs
+    
+    def reload_changed(self, force=False):
+        """Recompile programs whose sources changed (all of them with force); returns the names reloaded"""
+        reloaded = []
+        for name, shader in self.programs.items():
+            mtimes = self._source_mtimes(shader)
+            if not force and (mtimes is None or mtimes == self._mtimes[name]):
+                continue
+            
+            # Remember the attempt either way, so a broken file is reported once per save
+            self._mtimes[name] = mtimes
+            try:
+                shader.reload()
+                reloaded.append(name)
+            except Exception as e:
+                print(f"Shader '{name}' failed to reload, keeping the previous program:\n{e}")
+        return reloaded
+    
+    def cleanup(self):
+        try:
+            for shader in self.programs.values():
+                if shader.id:
+                    glDeleteProgram(shader.id)
+        except Exception as e:
+            pass
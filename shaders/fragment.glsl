@@ -2,7 +2,6 @@
 in vec3 FragPos;
 in vec3 Normal;
 in vec2 TexCoord;
-in vec3 VertexColor;
 
 out vec4 FragColor;
 
@@ -13,13 +12,6 @@ uniform sampler2D texture_diffuse;
 
 void main()
 {
-    // Check if this is a star point (no texture coordinates)
-    // Stars are rendered as GL_POINTS with vertex colors
-    if (TexCoord.x == 0.0 && TexCoord.y == 0.0 && length(Normal) < 0.1) {
-        FragColor = vec4(VertexColor, 1.0);
-        return;
-    }
-
     // Ambient - increased for better visibility
     float ambientStrength = 0.25;
     vec3 ambient = ambientStrength * lightColor;
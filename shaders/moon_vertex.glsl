@@ -0,0 +1,24 @@
+#version 330 core
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in vec3 aNormal;
+layout (location = 2) in vec2 aTexCoord;
+// Per-instance world matrix, one column per attribute location
+layout (location = 3) in mat4 aModel;
+
+out vec3 FragPos;
+out vec3 Normal;
+out vec2 TexCoord;
+
+uniform mat4 view;
+uniform mat4 projection;
+
+void main()
+{
+    FragPos = vec3(aModel * vec4(aPos, 1.0));
+    
+    // Moons are uniformly scaled, so the model matrix transforms normals directly
+    Normal = mat3(aModel) * aNormal;
+    TexCoord = aTexCoord;
+    
+    gl_Position = projection * view * vec4(FragPos, 1.0);
+}
@@ -0,0 +1,11 @@
+#version 330 core
+in float Brightness;
+
+out vec4 FragColor;
+
+uniform vec3 objectColor;
+
+void main()
+{
+    FragColor = vec4(objectColor * Brightness, 1.0);
+}
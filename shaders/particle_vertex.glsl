@@ -0,0 +1,23 @@
+#version 330 core
+// x = orbit radius, y = phase (radians), z = angular speed (radians/s), w = height above the orbital plane
+layout (location = 0) in vec4 aOrbit;
+layout (location = 1) in float aBrightness;
+
+out float Brightness;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+uniform float time;
+uniform float pointSize;
+
+void main()
+{
+    // Advance each particle along its circular orbit; the CPU only updates the time uniform
+    float angle = aOrbit.y + aOrbit.z * time;
+    vec3 position = vec3(aOrbit.x * cos(angle), aOrbit.w, aOrbit.x * sin(angle));
+    
+    Brightness = aBrightness;
+    gl_PointSize = pointSize;
+    gl_Position = projection * view * model * vec4(position, 1.0);
+}
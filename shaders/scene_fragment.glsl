@@ -0,0 +1,43 @@
+#version 330 core
+in vec3 FragPos;
+in vec3 Normal;
+in vec2 TexCoord;
+flat in vec3 ObjectColor;
+flat in int TextureLayer;
+
+out vec4 FragColor;
+
+uniform vec3 lightPos;
+uniform vec3 lightColor;
+// Every body texture, one per layer; untextured draws have a negative layer
+uniform sampler2DArray textureLayers;
+
+void main()
+{
+    // Same lighting as fragment.glsl, with the object color coming from the draw data
+    float ambientStrength = 0.25;
+    vec3 ambient = ambientStrength * lightColor;
+    
+    vec3 norm = normalize(Normal);
+    vec3 lightDir = normalize(lightPos - FragPos);
+    float diff = max(dot(norm, lightDir), 0.0);
+    vec3 diffuse = diff * lightColor;
+    
+    float specularStrength = 0.7;
+    vec3 viewDir = normalize(-FragPos);
+    vec3 reflectDir = reflect(-lightDir, norm);
+    float spec = pow(max(dot(viewDir, reflectDir), 0.0), 32);
+    vec3 specular = specularStrength * spec * lightColor;
+    
+    vec3 lightResult = (ambient + diffuse + specular);
+    
+    vec4 texColor = TextureLayer < 0 ? vec4(0.0) : texture(textureLayers, vec3(TexCoord, TextureLayer));
+    
+    if(texColor.a < 0.1) {
+        FragColor = vec4(lightResult * ObjectColor * 1.3, 1.0);
+    } else {
+        vec3 finalColor = lightResult * mix(ObjectColor, texColor.rgb, texColor.a);
+        finalColor = finalColor * 1.1;
+        FragColor = vec4(finalColor, texColor.a);
+    }
+}
@@ -0,0 +1,48 @@
+#version 330 core
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in vec3 aNormal;
+layout (location = 2) in vec2 aTexCoord;
+// Per-instance draw index; the indirect command's baseInstance selects this draw's entry
+layout (location = 3) in uint aDrawIndex;
+
+out vec3 FragPos;
+out vec3 Normal;
+out vec2 TexCoord;
+flat out vec3 ObjectColor;
+flat out int TextureLayer;
+
+uniform mat4 view;
+uniform mat4 projection;
+
+// Four RGBA32F texels per body: the columns of its model matrix
+uniform samplerBuffer modelMatrices;
+// Three RGBA32F texels per body: the columns of its normal matrix
+uniform samplerBuffer normalMatrices;
+// Two RGBA32F texels per draw: (model index, texture layer, -, -) and (object color, -)
+uniform samplerBuffer drawData;
+
+void main()
+{
+    vec4 draw = texelFetch(drawData, int(aDrawIndex) * 2);
+    int base = int(draw.x) * 4;
+    mat4 model = mat4(
+        texelFetch(modelMatrices, base),
+        texelFetch(modelMatrices, base + 1),
+        texelFetch(modelMatrices, base + 2),
+        texelFetch(modelMatrices, base + 3)
+    );
+    
+    FragPos = vec3(model * vec4(aPos, 1.0));
+    int normalBase = int(draw.x) * 3;
+    mat3 normalMatrix = mat3(
+        texelFetch(normalMatrices, normalBase).xyz,
+        texelFetch(normalMatrices, normalBase + 1).xyz,
+        texelFetch(normalMatrices, normalBase + 2).xyz
+    );
+    Normal = normalMatrix * aNormal;
+    TexCoord = aTexCoord;
+    ObjectColor = texelFetch(drawData, int(aDrawIndex) * 2 + 1).rgb;
+    TextureLayer = int(draw.y);
+    
+    gl_Position = projection * view * vec4(FragPos, 1.0);
+}
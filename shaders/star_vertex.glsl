@@ -0,0 +1,16 @@
+#version 330 core
+layout (location = 0) in vec3 aPos;
+layout (location = 1) in vec3 aColor;
+
+out vec3 Color;
+
+uniform mat4 view;
+uniform mat4 projection;
+uniform float pointSize;
+
+void main()
+{
+    Color = aColor;
+    gl_PointSize = pointSize;
+    gl_Position = projection * view * vec4(aPos, 1.0);
+}
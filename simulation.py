@@ -0,0 +1,169 @@
+import queue
+import threading
+import time
+import numpy as np
+from tracing import tracer
+
+class StateSnapshot:
+    """Copy of the body state the renderer reads, taken after one simulation tick.
+    
+    The arrays are read-only views into storage owned by a SnapshotBuffer slot, which is only
+    rewritten once the renderer has moved on to a newer snapshot.
+    """
+    
+    ARRAYS = (('positions', 3), ('rotation_angle', None), ('scale', None), ('pivot_offset', 3), ('alive', None))
+    
+    def __init__(self):
+        self.count = 0
+        self.sim_time = 0.0
+        self.capacity = 0
+        self._storage = {}
+        for name, _ in self.ARRAYS:
+            setattr(self, name, None)
+    
+    def capture(self, state, positions, sim_time):
+        n = state.count
+        if n > self.capacity:
+            self.capacity = max(n, 2 * self.capacity, 16)
+            for name, width in self.ARRAYS:
+                shape = self.capacity if width is None else (self.capacity, width)
+                self._storage[name] = np.zeros(shape, dtype=np.bool_ if name == 'alive' else np.float64)
+        
+        sources = {'positions': positions, 'rotation_angle': state.rotation_angle, 'scale': state.scale,
+                   'pivot_offset': state.pivot_offset, 'alive': state.alive}
+        for name, _ in self.ARRAYS:
+            storage = self._storage[name]
+            storage[:n] = sources[name][:n]
+            view = storage[:n]
+            view.flags.writeable = False
+            setattr(self, name, view)
+        self.count = n
+        self.sim_time = sim_time
+
+class SnapshotBuffer:
+    """Triple buffer handing the newest StateSnapshot from one writer thread to one reader without locks.
+    
+    The writer fills a slot that is neither the newest nor the one being read, then publishes it by
+    swapping an index; the reader marks the slot it takes, so it stays intact until its next acquire().
+    """
+    
+    def __init__(self):
+        self.slots = [StateSnapshot() for _ in range(3)]
+        self.latest = None
+        self.reading = None
+    
+    def publish(self, state, positions, sim_time):
+        index = next(i for i in range(3) if i != self.latest and i != self.reading)
+        self.slots[index].capture(state, positions, sim_time)
+        self.latest = index
+    
+    def has_newer(self, snapshot):
+        """Whether a snapshot other than the given one has been published since"""
+        return self.latest is not None and self.slots[self.latest] is not snapshot
+    
+    def acquire(self):
+        """Newest published snapshot, or None before the first one"""
+        while True:
+            index = self.latest
+            if index is None:
+                return None
+            self.reading = index
+            # A publish between reading latest and marking it may already be refilling that slot
+            if self.latest == index:
+                return self.slots[index]
+
+class Simulation:
+    """Advances a BodyState at a fixed rate and publishes snapshots of it for rendering.
+    
+    Started, it ticks on its own thread, so slow ticks (editor IPC) do not add to
+    frame time and NumPy's stepping overlaps with rendering. Otherwise the main loop calls tick()
+    itself. Code that changes body state from other threads goes through call(), which runs it
+    between ticks.
+    """
+    
+    # Longest step one tick takes; time lost to a longer stall is dropped instead of jumping the orbits
+    MAX_TICK_DT = 0.1
+    
+    def __init__(self, state, star_mask=0, rate_hz=120.0):
+        self.state = state
+        self.star_mask = star_mask
+        self.interval = 1.0 / rate_hz
+        self.sim_time = 0.0
+        self.paused = False
+        self.snapshots = SnapshotBuffer()
+        
+        # Called on the simulation thread after each step; a callback returns True when it changed state
+        self.on_tick = []
+        
+        self._commands = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @property
+    def running(self):
+        return self._thread is not None
+    
+    def call(self, function):
+        """Run function on the simulation thread before its next step (immediately when not started)"""
+        if self.running:
+            self._commands.put(function)
+        else:
+            function()
+    
+    def publish(self):
+        self.snapshots.publish(self.state, self.state.positions(self.star_mask), self.sim_time)
+    
+    def tick(self, dt):
+        """Run queued commands, step unless paused and call on_tick; publishes a snapshot only if anything changed"""
+        changed = not self.paused
+        while True:
+            try:
+                command = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+            try:
+                command()
+            except Exception as e:
+                print(f"Simulation command failed: {e}")
+        
+        if not self.paused:
+            self.sim_time += dt
+            self.state.step(dt)
+        
+        for callback in self.on_tick:
+            try:
+                if callback():
+                    changed = True
+            except Exception as e:
+                print(f"Simulation tick callback failed: {e}")
+        
+        if changed:
+            self.publish()
+    
+    def start(self):
+        if self.running:
+            return
+        self.publish()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+    
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.is_set():
+            now = time.perf_counter()
+            dt = min(now - last, self.MAX_TICK_DT)
+            last = now
+            
+            with tracer.span("simulation_tick", "simulation"):
+                self.tick(dt)
+            
+            self._stop.wait(max(0.0, self.interval - (time.perf_counter() - now)))
@@ -0,0 +1,371 @@
+import argparse
+import itertools
+import json
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from pathlib import Path
+from body_catalog import BodyCatalog, DEFAULT_CATALOG, BODY_STAR, stacked_orbit_radii
+from body_state import BodyState
+
+# PlanetConfig fields (and the visual scale) a sweep can vary
+SWEPT_FIELDS = ('distance', 'diameter', 'mass', 'orbit_speed', 'rotation_period', 'scale')
+
+class SharedCatalog:
+    """Catalog columns placed once in shared memory, which every sweep worker maps read-only"""
+    
+    COLUMNS = ('diameter', 'distance', 'mass', 'orbit_speed', 'rotation_period', 'visual_size')
+    
+    def __init__(self, memory, layout, names, max_distance):
+        self.memory = memory
+        self.layout = layout
+        self.names = tuple(names)
+        self.index = {name: row for row, name in enumerate(self.names)}
+        self.max_distance = max_distance
+        self.columns = {}
+        for name, (offset, dtype) in layout.items():
+            column = np.ndarray(len(self.names), dtype=dtype, buffer=memory.buf, offset=offset)
+            column.flags.writeable = False
+            self.columns[name] = column
+        self.stars = (self.columns['flags'] & BODY_STAR) != 0
+    
+    @classmethod
+    def create(cls, catalog):
+        arrays = {name: np.asarray(catalog.columns[name], dtype=np.float64) for name in cls.COLUMNS}
+        arrays['flags'] = np.asarray(catalog.flags, dtype=np.uint32)
+        
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = (offset, array.dtype.str)
+            offset += array.nbytes
+        memory = shared_memory.SharedMemory(create=True, size=max(1, offset))
+        for name, array in arrays.items():
+            start = layout[name][0]
+            memory.buf[start:start + array.nbytes] = array.tobytes()
+        return cls(memory, layout, catalog.names, catalog.max_distance)
+    
+    @property
+    def descriptor(self):
+        """Picklable handle a worker passes to attach()"""
+        return (self.memory.name, self.layout, self.names, self.max_distance)
+    
+    @classmethod
+    def attach(cls, descriptor):
+        name, layout, names, max_distance = descriptor
+        return cls(shared_memory.SharedMemory(name=name), layout, names, max_distance)
+    
+    def close(self, unlink=False):
+        self.columns = {}
+        self.stars = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+class RunTrace:
+    """Sampled history of one run, which the metrics summarize"""
+    
+    def __init__(self, times, positions, orbit_angles, stars, columns, orbit_radius, angular_speed):
+        self.times = times
+        self.positions = positions
+        self.orbit_angles = orbit_angles
+        self.stars = stars
+        self.columns = columns
+        self.orbit_radius = orbit_radius
+        self.angular_speed = angular_speed
+
+def min_separation(trace):
+    """Closest approach between any two non-star bodies, in scene units"""
+    positions = trace.positions[:, ~trace.stars]
+    count = positions.shape[1]
+    if count < 2:
+        return float('nan')
+    first, second = np.triu_indices(count, 1)
+    return float(np.linalg.norm(positions[:, first] - positions[:, second], axis=-1).min())
+
+def max_alignment(trace):
+    """Peak alignment of the non-star bodies' orbital angles: 1 when all are in a line on one side of the star"""
+    angles = np.radians(trace.orbit_angles[:, ~trace.stars])
+    if angles.shape[1] == 0:
+        return float('nan')
+    return float(np.abs(np.exp(1j * angles).mean(axis=1)).max())
+
+def angular_momentum(trace):
+    """Total orbital angular momentum, mass x radius^2 x angular speed (catalog mass units, scene lengths)"""
+    return float((trace.columns['mass'] * trace.orbit_radius ** 2 * trace.angular_speed).sum())
+
+def max_speed(trace):
+    """Fastest orbital speed of any body, in scene units per second"""
+    return float(np.abs(trace.orbit_radius * trace.angular_speed).max())
+
+METRICS = {
+    'min_separation': min_separation,
+    'max_alignment': max_alignment,
+    'angular_momentum': angular_momentum,
+    'max_speed': max_speed,
+}
+
+def parse_parameter(text):
+    """'target.field=values' as (key, values).
+    
+    target is a body name, whose field is set to each value, or 'planets' / 'all', whose catalog values
+    are multiplied by it. values is a list 'a,b,c', a grid 'lo:hi:n' (n evenly spaced values) or, for
+    random sampling, a range 'lo:hi'.
+    """
+    key, _, values = text.partition('=')
+    target, _, field = key.rpartition('.')
+    if not target or field not in SWEPT_FIELDS:
+        raise ValueError(f"Parameters are target.field=values with a field among {', '.join(SWEPT_FIELDS)}: {text}")
+    try:
+        if ':' not in values:
+            return key, [float(value) for value in values.split(',')]
+        bounds = [float(value) for value in values.split(':')]
+    except ValueError as e:
+        raise ValueError(f"Parameter values must be numbers: {text}") from e
+    if len(bounds) == 3:
+        return key, (bounds[0], bounds[1], int(bounds[2]))
+    if len(bounds) == 2:
+        return key, (bounds[0], bounds[1])
+    raise ValueError(f"Ranges are lo:hi or lo:hi:n: {text}")
+
+def validate_sweep(catalog, parameters, samples=None, metrics=tuple(METRICS)):
+    """Raise ValueError for a sweep that cannot run, before any output is written"""
+    unknown = [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    targets = [key.rsplit('.', 1)[0] for key in parameters]
+    unknown = [target for target in targets if target not in ('planets', 'all') and target not in catalog]
+    if unknown:
+        raise ValueError(f"Unknown bodies: {', '.join(unknown)}")
+    if samples is None:
+        for key, values in parameters.items():
+            if isinstance(values, tuple) and len(values) != 3:
+                raise ValueError(f"Grid sweeps need a value count for {key} (lo:hi:n), or use --samples")
+
+def expand_runs(parameters, samples=None, seed=0):
+    """Parameter dicts of every run: the full grid, or samples random draws.
+    
+    Runs are generated lazily and always in the same order, so run numbers identify them across resumes.
+    Parameters are expected to have passed validate_sweep.
+    """
+    if samples is None:
+        axes = []
+        for key, values in parameters.items():
+            if isinstance(values, tuple):
+                values = np.linspace(*values).tolist()
+            axes.append([(key, value) for value in values])
+        for combination in itertools.product(*axes):
+            yield dict(combination)
+        return
+    
+    rng = np.random.default_rng(seed)
+    for _ in range(samples):
+        run = {}
+        for key, values in parameters.items():
+            if isinstance(values, tuple):
+                run[key] = float(rng.uniform(values[0], values[1]))
+            else:
+                run[key] = values[int(rng.integers(len(values)))]
+        yield run
+
+def build_state(catalog, params, rng):
+    """BodyState for one scenario: the catalog with params applied, set up as the simulator does at startup.
+    
+    Returns the state and the scenario's per-body columns.
+    """
+    columns = {field: np.array(catalog.columns[field]) for field in SharedCatalog.COLUMNS}
+    columns['scale'] = columns.pop('visual_size')
+    for key, value in params.items():
+        target, field = key.rsplit('.', 1)
+        if target == 'planets':
+            columns[field][~catalog.stars] *= value
+        elif target == 'all':
+            columns[field] *= value
+        else:
+            columns[field][catalog.index[target]] = value
+    
+    stars = catalog.stars
+    n = len(catalog.names)
+    state = BodyState(capacity=n)
+    for _ in range(n):
+        state.allocate()
+    state.flags[:n] = catalog.columns['flags']
+    state.catalog_row[:n] = np.arange(n)
+    state.diameter[:n] = columns['diameter']
+    state.distance[:n] = columns['distance']
+    state.mass[:n] = columns['mass']
+    state.rotation_period[:n] = columns['rotation_period']
+    state.orbit_radius[:n] = stacked_orbit_radii(columns['distance'], stars, catalog.max_distance)
+    state.orbit_speed[:n] = columns['orbit_speed'] * 0.02
+    
+    # Diameter changes rescale bodies as the property editor does, within the same limits
+    # Bodies without a catalog diameter keep their visual size
+    catalog_diameter = catalog.columns['diameter']
+    scale = np.divide(columns['scale'] * columns['diameter'], catalog_diameter, out=columns['scale'].copy(),
+                      where=catalog_diameter > 0)
+    state.scale[:n] = np.where(stars, np.clip(scale, 1.0, 500.0), np.clip(scale, 0.1, 100.0))
+    
+    period = columns['rotation_period']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spin = np.sign(period) * (360.0 / (np.abs(period) * 3600)) * 100
+    state.rotation_speed[:n] = np.where(stars, 2.0, np.nan_to_num(spin, posinf=0.0, neginf=0.0))
+    
+    state.orbit_angle[:n] = rng.uniform(0, 360, n)
+    return state, columns
+
+def run_scenario(catalog, run, params, duration, dt, sample_interval, metrics, seed):
+    """Step one scenario for duration seconds and summarize it with the named metrics"""
+    started = time.perf_counter()
+    state, columns = build_state(catalog, params, np.random.default_rng([seed, run]))
+    n = state.count
+    
+    steps = max(1, int(round(duration / dt)))
+    sample_every = max(1, int(round(sample_interval / dt))) if sample_interval else 1
+    times, positions, angles = [], [], []
+    for step in range(steps + 1):
+        if step % sample_every == 0 or step == steps:
+            times.append(step * dt)
+            positions.append(state.positions(BODY_STAR))
+            angles.append(state.orbit_angle[:n].copy())
+        if step < steps:
+            state.step(dt)
+    
+    trace = RunTrace(np.array(times), np.array(positions), np.array(angles), catalog.stars, columns,
+                     state.orbit_radius[:n].copy(), np.radians(state.orbit_speed[:n]))
+    return {
+        'run': run,
+        'params': params,
+        'metrics': {name: METRICS[name](trace) for name in metrics},
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+# The shared catalog a worker process attached to in its initializer
+_catalog = None
+
+def _attach_catalog(descriptor):
+    global _catalog
+    _catalog = SharedCatalog.attach(descriptor)
+
+def _run_batch(batch, duration, dt, sample_interval, metrics, seed):
+    results = []
+    for run, params in batch:
+        try:
+            results.append(run_scenario(_catalog, run, params, duration, dt, sample_interval, metrics, seed))
+        except Exception as e:
+            results.append({'run': run, 'params': params, 'error': f"{type(e).__name__}: {e}"})
+    return results
+
+def _completed_runs(path, spec):
+    """Run numbers already in a results file, after checking it belongs to the same sweep.
+    
+    A last line cut short by an interruption is truncated away, so appended results start on a new line.
+    """
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    completed = set()
+    end = 0
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f):
+            if not line.endswith(b'\n'):
+                break
+            end += len(line)
+            record = json.loads(line)
+            if number == 0:
+                if record.get('sweep') != spec:
+                    raise ValueError(f"{path} holds results of a different sweep; choose another output file")
+            elif 'error' not in record:
+                completed.add(record['run'])
+    os.truncate(path, end)
+    return completed if end else None
+
+def run_sweep(catalog, parameters, out_path, samples=None, seed=0, duration=600.0, dt=0.1, sample_interval=1.0,
+              metrics=tuple(METRICS), workers=None, batch_size=8):
+    """Run every scenario of a sweep across worker processes, appending each result to out_path as a JSON line.
+    
+    The first line records the sweep itself. Running the same sweep again with the same file resumes it:
+    runs already in the file are skipped, and runs that failed are retried.
+    """
+    out_path = Path(out_path)
+    workers = workers or os.cpu_count() or 1
+    metrics = list(metrics)
+    validate_sweep(catalog, parameters, samples, metrics)
+    
+    spec = {'parameters': {key: list(values) for key, values in parameters.items()}, 'samples': samples,
+            'seed': seed, 'duration': duration, 'dt': dt, 'sample_interval': sample_interval,
+            'metrics': metrics, 'bodies': list(catalog.names)}
+    completed = _completed_runs(out_path, spec)
+    runs = ((run, params) for run, params in enumerate(expand_runs(parameters, samples, seed))
+            if completed is None or run not in completed)
+    batches = iter(lambda: list(itertools.islice(runs, batch_size)), [])
+    
+    finished = failed = 0
+    shared = SharedCatalog.create(catalog)
+    try:
+        with open(out_path, 'a', encoding='utf-8') as out, \
+                ProcessPoolExecutor(workers, initializer=_attach_catalog, initargs=(shared.descriptor,)) as pool:
+            if completed is None:
+                out.write(json.dumps({'sweep': spec}) + '\n')
+            
+            # A bounded number of batches is in flight, so huge grids are never materialized at once
+            in_flight = set()
+            while True:
+                for batch in itertools.islice(batches, 2 * workers - len(in_flight)):
+                    in_flight.add(pool.submit(_run_batch, batch, duration, dt, sample_interval, metrics, seed))
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        out.write(json.dumps(result) + '\n')
+                        failed += 'error' in result
+                        finished += 1
+                    out.flush()
+    finally:
+        shared.close(unlink=True)
+    return finished, failed
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a headless parameter sweep of the solar system simulation")
+    parser.add_argument("--param", dest="parameters", metavar="TARGET.FIELD=VALUES", action="append", required=True,
+                        help="varied parameter, e.g. earth.distance=100:200:5 or planets.orbit_speed=0.5,1,2 "
+                             "(body targets set values, 'planets'/'all' multiply catalog values)")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="draw this many random scenarios instead of running the full grid")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for random scenarios and initial orbit angles")
+    parser.add_argument("--duration", type=float, default=600.0,
+                        help="simulated seconds per run")
+    parser.add_argument("--dt", type=float, default=0.1,
+                        help="simulation step in seconds")
+    parser.add_argument("--sample-interval", type=float, default=1.0,
+                        help="simulated seconds between the samples the metrics are computed from")
+    parser.add_argument("--metrics", default=",".join(METRICS),
+                        help=f"comma-separated metrics to compute (available: {', '.join(METRICS)})")
+    parser.add_argument("--catalog", metavar="PATH", default=str(DEFAULT_CATALOG),
+                        help="body catalog to load (.json, .csv or .npz)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--batch-size", type=int, default=8,
+                        help="runs sent to a worker at a time")
+    parser.add_argument("--out", metavar="PATH", required=True,
+                        help="JSON-lines results file; rerunning the same sweep resumes it")
+    return parser
+
+if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args()
+    catalog = BodyCatalog.load(args.catalog)
+    metrics = args.metrics.split(',')
+    try:
+        parameters = dict(parse_parameter(text) for text in args.parameters)
+        validate_sweep(catalog, parameters, args.samples, metrics)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    started = time.perf_counter()
+    finished, failed = run_sweep(catalog, parameters, args.out, samples=args.samples, seed=args.seed,
+                                 duration=args.duration, dt=args.dt, sample_interval=args.sample_interval,
+                                 metrics=metrics, workers=args.workers, batch_size=args.batch_size)
+    print(f"Finished {finished} runs ({failed} failed) in {time.perf_counter() - started:.1f} s; results in {args.out}")
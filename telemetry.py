@@ -0,0 +1,126 @@
+import socket
+import struct
+import time
+
+TELEMETRY_HOST = "127.0.0.1"
+
+# Fields streamed for the selected body, in mask bit order
+FIELDS = ('orbit_angle', 'rotation_angle', 'orbit_speed', 'rotation_speed', 'scale')
+
+# magic, sequence number, body id, mask of the fields that follow as float32
+HEADER = struct.Struct('<HIiB')
+MAGIC = 0x5354
+FULL_MASK = (1 << len(FIELDS)) - 1
+
+def free_port():
+    """A localhost UDP port that is free right now, for the receiving process to bind"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind((TELEMETRY_HOST, 0))
+        return probe.getsockname()[1]
+
+def encode(sequence, body_id, values, mask):
+    floats = [values[i] for i in range(len(FIELDS)) if mask & (1 << i)]
+    return HEADER.pack(MAGIC, sequence, body_id, mask) + struct.pack(f'<{len(floats)}f', *floats)
+
+def decode(packet):
+    """(sequence, body_id, {field: value}) for a packet, or None if it is not a telemetry packet"""
+    if len(packet) < HEADER.size:
+        return None
+    magic, sequence, body_id, mask = HEADER.unpack_from(packet)
+    names = [FIELDS[i] for i in range(len(FIELDS)) if mask & (1 << i)]
+    if magic != MAGIC or len(packet) != HEADER.size + 4 * len(names):
+        return None
+    return sequence, body_id, dict(zip(names, struct.unpack_from(f'<{len(names)}f', packet, HEADER.size)))
+
+class TelemetryPublisher:
+    """Rate-limited stream of one body's runtime values over localhost UDP.
+    
+    Packets carry only the fields that changed since the last one sent, with a full keyframe
+    whenever the body changes and at least every keyframe_interval seconds so a dropped packet
+    or a late-starting receiver catches up.
+    """
+    
+    def __init__(self, port, rate_hz=20.0, keyframe_interval=1.0):
+        self.address = (TELEMETRY_HOST, port)
+        self.interval = 1.0 / rate_hz
+        self.keyframe_interval = keyframe_interval
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.sequence = 0
+        self.last_send = 0.0
+        self.last_keyframe = 0.0
+        self.body_id = None
+        self.sent = [None] * len(FIELDS)
+    
+    def publish(self, body_id, values, now=None):
+        """Send values (in FIELDS order) for body_id if the rate allows; returns whether a packet went out"""
+        now = time.perf_counter() if now is None else now
+        if now - self.last_send < self.interval:
+            return False
+        
+        # Compare at float32 precision, so values that round to what was sent are not resent
+        values = struct.unpack(f'<{len(FIELDS)}f', struct.pack(f'<{len(FIELDS)}f', *values))
+        if body_id != self.body_id or now - self.last_keyframe >= self.keyframe_interval:
+            mask = FULL_MASK
+            self.last_keyframe = now
+        else:
+            mask = 0
+            for i, value in enumerate(values):
+                if value != self.sent[i]:
+                    mask |= 1 << i
+            if not mask:
+                return False
+        
+        try:
+            self.socket.sendto(encode(self.sequence, body_id, values, mask), self.address)
+        except OSError as e:
+            return False
+        
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        self.last_send = now
+        self.body_id = body_id
+        self.sent = list(values)
+        return True
+    
+    def close(self):
+        try:
+            self.socket.close()
+        except Exception as e:
+            pass
+
+class TelemetryReceiver:
+    """Non-blocking receiving end of a TelemetryPublisher, folding deltas into the latest state per body"""
+    
+    def __init__(self, port):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((TELEMETRY_HOST, port))
+        self.socket.setblocking(False)
+        self.sequence = None
+        self.states = {}
+    
+    def poll(self):
+        """Drain pending packets; returns the ids of bodies whose state changed"""
+        changed = set()
+        while True:
+            try:
+                packet = self.socket.recv(512)
+            except OSError as e:
+                break
+            
+            decoded = decode(packet)
+            if decoded is None:
+                continue
+            sequence, body_id, values = decoded
+            # Drop packets that arrive after a newer one (the sequence wraps at 2**32)
+            if self.sequence is not None and (sequence - self.sequence) & 0xFFFFFFFF >= 0x80000000:
+                continue
+            self.sequence = sequence
+            self.states.setdefault(body_id, {}).update(values)
+            changed.add(body_id)
+        return changed
+    
+    def close(self):
+        try:
+            self.socket.close()
+        except Exception as e:
+            pass
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The simulator is a set of top-level modules run from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from body_catalog import BodyCatalog
+
+@pytest.fixture
+def records():
+    """A small catalog: a star, two planets (one ringed, with a custom pivot) and a body without a diameter"""
+    return [
+        {'name': 'sun', 'is_star': True, 'diameter': 1392700, 'distance': 0, 'mass': 1988400.0,
+         'rotation_period': 587.28, 'color': [1.0, 1.0, 0.7], 'visual_size': 20.0},
+        {'name': 'earth', 'diameter': 12756, 'distance': 149.6, 'mass': 5.97, 'orbit_speed': 29.8,
+         'rotation_period': 23.9, 'color': [0.2, 0.4, 1.0], 'moons': 1, 'visual_size': 3.0},
+        {'name': 'saturn', 'model_file': 'rings.glb', 'diameter': 120536, 'distance': 1432.0, 'mass': 568.0,
+         'orbit_speed': 9.7, 'rotation_period': -10.7, 'color': [0.9, 0.8, 0.6], 'moons': 3, 'has_rings': True,
+         'visual_size': 9.0, 'ring_brightness': 0.5, 'pivot_offset': [0.0, 0.5, 0.0]},
+        {'name': 'dust', 'distance': 2000.0, 'rotation_period': 5.0},
+    ]
+
+@pytest.fixture
+def catalog(records):
+    return BodyCatalog.from_records(records)
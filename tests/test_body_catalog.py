@@ -0,0 +1,101 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from body_catalog import (BodyCatalog, NUMERIC_COLUMNS, DEFAULT_CATALOG, BODY_STAR, BODY_CUSTOM_PIVOT, BODY_RINGED)
+
+def write_csv(path, records):
+    fields = ['name', 'model_file', 'color_r', 'color_g', 'color_b', 'pivot_x', 'pivot_y', 'pivot_z'] + list(NUMERIC_COLUMNS)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for record in records:
+            color = record.get('color', (1.0, 1.0, 1.0))
+            row = {'name': record['name'], 'model_file': record.get('model_file', ''),
+                   'color_r': color[0], 'color_g': color[1], 'color_b': color[2]}
+            if 'pivot_offset' in record:
+                row['pivot_x'], row['pivot_y'], row['pivot_z'] = record['pivot_offset']
+            for field in NUMERIC_COLUMNS:
+                if field in record:
+                    row[field] = record[field]
+            writer.writerow(row)
+
+def assert_same_catalog(loaded, expected):
+    assert loaded.names == expected.names
+    assert loaded.model_files == expected.model_files
+    np.testing.assert_array_equal(loaded.colors, expected.colors)
+    np.testing.assert_array_equal(loaded.pivot_offsets, expected.pivot_offsets)
+    np.testing.assert_array_equal(loaded.flags, expected.flags)
+    for field, dtype in NUMERIC_COLUMNS.items():
+        assert loaded.columns[field].dtype == dtype
+        np.testing.assert_array_equal(loaded.columns[field], expected.columns[field])
+    assert loaded.max_distance == expected.max_distance
+
+def test_json_list_and_object(tmp_path, records, catalog):
+    listed = tmp_path / "list.json"
+    listed.write_text(json.dumps(records))
+    wrapped = tmp_path / "wrapped.json"
+    wrapped.write_text(json.dumps({'bodies': records}))
+    
+    assert_same_catalog(BodyCatalog.load(listed), catalog)
+    assert_same_catalog(BodyCatalog.load(wrapped), catalog)
+
+def test_csv_matches_json(tmp_path, records, catalog):
+    path = tmp_path / "bodies.csv"
+    write_csv(path, records)
+    assert_same_catalog(BodyCatalog.load(path), catalog)
+
+def test_npz_round_trip(tmp_path, catalog):
+    path = tmp_path / "bodies.npz"
+    catalog.save_npz(path)
+    assert_same_catalog(BodyCatalog.load(path), catalog)
+
+def test_npz_without_optional_columns(tmp_path, catalog):
+    path = tmp_path / "minimal.npz"
+    np.savez(path, name=np.array(catalog.names), model_file=np.array(catalog.model_files), color=catalog.colors,
+             diameter=catalog.columns['diameter'])
+    loaded = BodyCatalog.load(path)
+    
+    np.testing.assert_array_equal(loaded.columns['diameter'], catalog.columns['diameter'])
+    np.testing.assert_array_equal(loaded.columns['visual_size'], 1.0)
+    np.testing.assert_array_equal(loaded.columns['ring_brightness'], 1.0)
+    np.testing.assert_array_equal(loaded.pivot_offsets, 0.0)
+    assert not loaded.flags.any()
+
+def test_defaults_flags_and_lookups(catalog):
+    assert catalog.model_files[catalog.row('earth')] == 'earth.glb'
+    assert catalog.value('dust', 'diameter') == 0.0
+    assert catalog.visual_size('dust') == 1.0
+    assert catalog.value('earth', 'ring_brightness') == 1.0
+    
+    assert catalog.flags[catalog.row('sun')] == BODY_STAR
+    assert catalog.flags[catalog.row('saturn')] == BODY_RINGED | BODY_CUSTOM_PIVOT
+    assert catalog.flags[catalog.row('earth')] == 0
+    assert catalog.max_distance == 2000.0
+    
+    config = catalog.config('saturn')
+    assert (config.moons, config.has_rings, config.rotation_period) == (3, True, -10.7)
+    assert config.color == (0.9, 0.8, 0.6)
+
+def test_columns_are_read_only(catalog):
+    with pytest.raises(ValueError):
+        catalog.columns['diameter'][0] = 1.0
+    with pytest.raises(ValueError):
+        catalog.flags[0] = 0
+
+def test_duplicate_names_rejected(records):
+    with pytest.raises(ValueError):
+        BodyCatalog.from_records(records + [records[1]])
+
+def test_unsupported_format(tmp_path):
+    path = tmp_path / "bodies.yaml"
+    path.write_text("")
+    with pytest.raises(ValueError):
+        BodyCatalog.load(path)
+
+def test_default_catalog_loads():
+    catalog = BodyCatalog.load(DEFAULT_CATALOG)
+    assert catalog.names[0] == 'sun'
+    assert catalog.flags[0] & BODY_STAR
@@ -0,0 +1,152 @@
+import queue
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import checkpoint
+from body_catalog import BODY_STAR, BODY_MOON, stacked_orbit_radii
+from body_registry import BodyRegistry
+from body_state import BodyState
+from body_edits import BodyEditor
+from checkpoint import CheckpointWriter
+from main import SolarSystem, Planet, Camera
+from moons import MoonSystem
+from simulation import Simulation
+
+def make_system(catalog, names=None):
+    """The state-holding parts of a SolarSystem, without a window or GL context"""
+    system = SolarSystem.__new__(SolarSystem)
+    system.catalog = catalog
+    system.bodies = BodyRegistry(catalog)
+    system.body_editor = BodyEditor(system.bodies, catalog)
+    
+    radii = stacked_orbit_radii(catalog.columns['distance'], catalog.flags & BODY_STAR, catalog.max_distance)
+    system.planets = []
+    for name in names or catalog.names:
+        row = catalog.row(name)
+        planet = Planet(catalog.config_at(row), None, catalog.visual_size(name), float(radii[row]),
+                        flags=int(catalog.flags[row]), pivot_offset=catalog.pivot_offsets[row])
+        system.planets.append(planet)
+        system.bodies.add(planet)
+    
+    system.moons = MoonSystem.for_bodies(system.bodies, catalog)
+    system.moon_bodies = system.moons.register(system.bodies, partial(Planet, loader=None))
+    
+    system.simulation = Simulation(system.bodies.state, BODY_STAR)
+    system.camera = Camera(640, 480)
+    system.property_editor = SimpleNamespace(current_planet=None)
+    system.main_thread_calls = queue.SimpleQueue()
+    return system
+
+def run(system, steps, dt=0.05):
+    for _ in range(steps):
+        system.simulation.tick(dt)
+
+def state_columns(state):
+    n = state.count
+    columns = {field: getattr(state, field)[:n].copy() for field in BodyState.FIELDS}
+    columns['pivot_offset'] = state.pivot_offset[:n].copy()
+    columns['flags'] = state.flags[:n].copy()
+    return columns
+
+def assert_states_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for field in expected:
+        np.testing.assert_array_equal(actual[field], expected[field], err_msg=field)
+
+@pytest.fixture
+def system(catalog):
+    np.random.seed(1)
+    return make_system(catalog)
+
+def test_capture_apply_round_trip(tmp_path, system):
+    run(system, 10)
+    system.body_editor.apply('scale', 2.0, system.body_editor.select(exclude_flags=BODY_STAR), 'multiply')
+    system.bodies.state.flags[1] |= 1 << 8
+    system.camera.set_target(system.bodies.get('saturn'))
+    
+    path = tmp_path / "state.ckpt"
+    arrays, metadata = system.capture_checkpoint()
+    checkpoint.save(path, arrays, metadata)
+    saved = state_columns(system.bodies.state)
+    draws = np.random.random(3)
+    
+    run(system, 25)
+    system.simulation.paused = True
+    system.body_editor.apply('diameter', 1.0, system.body_editor.select(), 'set')
+    system.bodies.state.flags[1] = 0
+    
+    metadata, arrays = checkpoint.load(path)
+    system.apply_checkpoint(metadata, arrays)
+    
+    assert_states_equal(state_columns(system.bodies.state), saved)
+    assert system.simulation.sim_time == pytest.approx(0.5)
+    assert system.simulation.paused is False
+    np.testing.assert_array_equal(np.random.random(3), draws)
+    
+    # The camera is restored on the main thread
+    system.main_thread_calls.get_nowait()()
+    assert system.camera.target_planet is system.bodies.get('saturn')
+
+def test_moons_are_saved_and_restored(system):
+    moon = system.bodies.get('saturn 1')
+    assert moon.flags & BODY_MOON
+    assert moon.parent == system.bodies.id_of('saturn')
+    
+    run(system, 5)
+    arrays, metadata = system.capture_checkpoint()
+    angle, position = moon.orbit_angle, system.bodies.state.positions(BODY_STAR)[moon.body_id]
+    
+    run(system, 5)
+    system.apply_checkpoint(metadata, arrays)
+    assert moon.orbit_angle == angle
+    np.testing.assert_array_equal(system.bodies.state.positions(BODY_STAR)[moon.body_id], position)
+
+def test_rows_are_matched_by_name(catalog, system):
+    run(system, 10)
+    arrays, metadata = system.capture_checkpoint()
+    saved = {planet.config.name: planet.orbit_angle for planet in system.planets + system.moon_bodies}
+    
+    # A build with the bodies in another order and one of them missing
+    np.random.seed(2)
+    other = make_system(catalog, names=['saturn', 'sun', 'dust'])
+    unmatched = other.bodies.get('dust').orbit_angle
+    del saved['dust'], saved['earth'], saved['earth 1']
+    arrays = dict(arrays, names=np.array(['nothing' if name == 'dust' else name for name in arrays['names']]))
+    other.apply_checkpoint(metadata, arrays)
+    
+    for name, angle in saved.items():
+        assert other.bodies.get(name).orbit_angle == angle, name
+    assert other.bodies.get('dust').orbit_angle == unmatched
+
+def test_fields_missing_from_older_checkpoints_keep_current_values(system):
+    arrays, metadata = system.capture_checkpoint()
+    del arrays['mass']
+    system.bodies.state.mass[:system.bodies.state.count] = 7.0
+    
+    system.apply_checkpoint(metadata, arrays)
+    assert (system.bodies.state.mass[:system.bodies.state.count] == 7.0).all()
+
+def test_writer_keeps_newest_and_flushes(tmp_path, system):
+    writer = CheckpointWriter()
+    path = tmp_path / "autosave.ckpt"
+    try:
+        for sim_time in (1.0, 2.0, 3.0):
+            system.simulation.sim_time = sim_time
+            writer.submit(path, *system.capture_checkpoint())
+        assert writer.flush(timeout=10.0)
+    finally:
+        writer.shutdown()
+    
+    metadata, arrays = checkpoint.load(path)
+    assert metadata['sim_time'] == 3.0
+    assert metadata['count'] == system.bodies.state.count
+    assert not (tmp_path / "autosave.ckpt.tmp").exists()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.ckpt"
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        checkpoint.load(path)
@@ -0,0 +1,44 @@
+import numpy as np
+
+from body_catalog import BodyCatalog, DEFAULT_CATALOG, BODY_STAR, MIN_ORBIT_SEPARATION, stacked_orbit_radii
+
+def calculate_orbit_distances(planet_configs):
+    """The simulator's original per-planet loop, which assumed the sun comes first"""
+    max_real_distance = max(p.distance for p in planet_configs if p.name != "sun")
+    distance_scale = 4000.0 / max_real_distance
+    min_separation = 170.0
+    
+    orbit_distances = {"sun": 0}
+    last_position = min_separation
+    
+    for planet in planet_configs[1:]:
+        scaled_distance = planet.distance * distance_scale
+        orbit_distances[planet.name] = max(scaled_distance, last_position + min_separation)
+        last_position = orbit_distances[planet.name]
+    
+    return orbit_distances
+
+def stacked(catalog):
+    return stacked_orbit_radii(catalog.columns['distance'], catalog.flags & BODY_STAR, catalog.max_distance)
+
+def test_matches_original_loop_on_default_catalog():
+    catalog = BodyCatalog.load(DEFAULT_CATALOG)
+    expected = calculate_orbit_distances(catalog.configs())
+    np.testing.assert_array_equal(stacked(catalog), [expected[name] for name in catalog.names])
+
+def test_matches_original_loop_when_orbits_are_pushed_out():
+    # Inner orbits closer together than the minimum separation are stacked outwards
+    records = [{'name': 'sun', 'is_star': True}] + [
+        {'name': f'body{i}', 'distance': distance} for i, distance in enumerate([1.0, 2.0, 2.5, 400.0, 401.0, 4000.0])
+    ]
+    catalog = BodyCatalog.from_records(records)
+    expected = calculate_orbit_distances(catalog.configs())
+    radii = stacked(catalog)
+    
+    np.testing.assert_array_equal(radii, [expected[name] for name in catalog.names])
+    assert (np.diff(radii[1:]) >= MIN_ORBIT_SEPARATION).all()
+
+def test_stars_stay_at_origin_anywhere_in_order():
+    radii = stacked_orbit_radii([100.0, 0.0, 200.0], [False, True, False], 200.0)
+    assert radii[1] == 0.0
+    assert radii.tolist() == [2000.0, 0.0, 4000.0]
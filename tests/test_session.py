@@ -0,0 +1,118 @@
+import gzip
+
+import numpy as np
+import pygame
+import pytest
+
+from body_catalog import BODY_STAR
+from body_edits import BodyEditor
+from body_registry import BodyRegistry
+from main import Planet
+from session import SessionRecorder, SessionReplay, state_digest
+from simulation import Simulation
+
+def make_simulation(catalog, seed):
+    np.random.seed(seed)
+    registry = BodyRegistry(catalog)
+    for row in range(len(catalog)):
+        registry.add(Planet(catalog.config_at(row), None, catalog.visual_size(catalog.names[row]), 200.0 * row,
+                            flags=int(catalog.flags[row])))
+    return Simulation(registry.state, BODY_STAR), BodyEditor(registry, catalog)
+
+def play(simulation, editor, frames):
+    """Step through (dt, changes) frames as the simulator does, applying each frame's editor changes"""
+    for dt, changes in frames:
+        for change in changes:
+            editor.apply(change['property'], change['value'], [change['body_id']], change.get('operation', 'set'))
+        simulation.tick(dt)
+    return state_digest(simulation.state, simulation.sim_time)
+
+# Motion events keep the first two mouse buttons, which is all the simulator reads
+FRAMES = [
+    (0.016, [], [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_6, mod=0)]),
+    (0.017, [{'property': 'scale', 'value': 2.0, 'body_id': 1, 'operation': 'multiply'}], []),
+    (0.0, [], [pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=-2)]),
+    (0.033, [], [pygame.event.Event(pygame.MOUSEMOTION, pos=(120, 80), rel=(5, -1), buttons=(1, 0))]),
+    (0.016, [{'property': 'orbit_speed', 'value': 3.5, 'body_id': 2}], [pygame.event.Event(pygame.QUIT)]),
+]
+
+def record(path, catalog, seed=7):
+    simulation, editor = make_simulation(catalog, seed)
+    recorder = SessionRecorder(path, seed)
+    for wall, (dt, changes, events) in enumerate(FRAMES):
+        play(simulation, editor, [(dt, changes)])
+        recorder.frame(dt, float(wall), True, events, changes)
+    # An idle frame with nothing to replay is not logged
+    recorder.frame(0.0, 9.0, False, [], [])
+    digest = state_digest(simulation.state, simulation.sim_time)
+    recorder.close(digest)
+    return digest
+
+def test_log_round_trip(tmp_path, catalog):
+    path = tmp_path / "session.log"
+    digest = record(path, catalog)
+    
+    replay = SessionReplay(path)
+    try:
+        frames = list(replay.frames())
+        assert replay.seed == 7
+        assert replay.digest == digest
+    finally:
+        replay.close()
+    
+    assert len(frames) == len(FRAMES)
+    for frame, (dt, changes, events) in zip(frames, FRAMES):
+        assert frame.dt == dt
+        assert frame.drawn
+        assert frame.changes == changes
+        assert [(event.type, event.dict) for event in frame.events] == [(event.type, event.dict) for event in events]
+
+def test_replay_reproduces_digest(tmp_path, catalog):
+    path = tmp_path / "session.log"
+    record(path, catalog)
+    
+    replay = SessionReplay(path)
+    try:
+        frames = [(frame.dt, frame.changes) for frame in replay.frames()]
+        simulation, editor = make_simulation(catalog, replay.seed)
+        assert play(simulation, editor, frames) == replay.digest
+    finally:
+        replay.close()
+
+def test_digest_detects_divergence(tmp_path, catalog):
+    path = tmp_path / "session.log"
+    digest = record(path, catalog)
+    
+    replay = SessionReplay(path)
+    try:
+        frames = [(frame.dt, frame.changes) for frame in replay.frames()]
+    finally:
+        replay.close()
+    
+    perturbed = [(dt * 1.01 if i == 1 else dt, changes) for i, (dt, changes) in enumerate(frames)]
+    assert play(*make_simulation(catalog, 7), perturbed) != digest
+    assert play(*make_simulation(catalog, 8), frames) != digest
+
+def test_truncated_log_ends_at_last_whole_frame(tmp_path, catalog):
+    path = tmp_path / "session.log"
+    record(path, catalog)
+    with gzip.open(path, 'rb') as f:
+        data = f.read()
+    truncated = tmp_path / "crashed.log"
+    with gzip.open(truncated, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    
+    replay = SessionReplay(truncated)
+    try:
+        frames = list(replay.frames())
+        assert 0 < len(frames) < len(FRAMES)
+        assert replay.digest is None
+    finally:
+        replay.close()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.log"
+    with gzip.open(path, 'wb') as f:
+        f.write(b'\0' * 64)
+    with pytest.raises(ValueError):
+        SessionReplay(path)
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from body_state import BodyState
+from trajectory import TrajectoryRecorder, TrajectoryReader
+
+STAR = 1
+
+NAMES = ['sun', 'planet', 'moon', 'far']
+
+def make_state():
+    """A star, a planet with an inclined moon and a retrograde outer body"""
+    state = BodyState()
+    for _ in NAMES:
+        state.allocate()
+    state.flags[0] = STAR
+    state.orbit_radius[:4] = [50.0, 300.0, 12.0, 900.0]
+    state.orbit_speed[:4] = [0.0, 20.0, 90.0, -5.0]
+    state.orbit_angle[:4] = [0.0, 10.0, 200.0, 45.0]
+    state.rotation_speed[:4] = [2.0, 30.0, 90.0, 1.0]
+    state.orbit_inclination[2] = 25.0
+    state.set_parents([2], [1])
+    return state
+
+def record(path, state, samples, dt=0.05, **options):
+    """Step and record state; returns the sample times and the positions and angles the state had"""
+    recorder = TrajectoryRecorder(path, NAMES, STAR, **options)
+    times, positions, angles = [], [], []
+    for i in range(samples):
+        state.step(dt)
+        recorder.record(state, i * dt)
+        times.append(i * dt)
+        positions.append(state.positions(STAR))
+        angles.append(state.orbit_angle[:state.count].copy())
+    recorder.close()
+    return np.array(times), np.array(positions), np.array(angles)
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "run.traj"
+    state = make_state()
+    times, positions, angles = record(path, state, 40, max_samples=16)
+    
+    reader = TrajectoryReader(path)
+    try:
+        assert reader.names == NAMES
+        assert len(reader.chunks) == 3
+        assert reader.time_range == pytest.approx((times[0], times[-1]))
+        
+        data = reader.read()
+        np.testing.assert_allclose(data['time'], times)
+        np.testing.assert_allclose(data['position'], positions, rtol=1e-5, atol=1e-3)
+        np.testing.assert_allclose(data['orbit_angle'], angles, rtol=1e-5)
+        assert data['position'].dtype == np.float32
+    finally:
+        reader.close()
+
+def test_moon_positions_and_velocities_follow_parent(tmp_path):
+    path = tmp_path / "moon.traj"
+    dt = 0.01
+    times, positions, angles = record(path, make_state(), 50, dt=dt)
+    
+    reader = TrajectoryReader(path)
+    try:
+        data = reader.read(bodies=['moon'])
+    finally:
+        reader.close()
+    
+    # The moon's orbit is inclined, so it leaves the xz plane, and its velocity includes its parent's
+    moon = positions[:, 2]
+    assert np.abs(moon[:, 1]).max() > 1.0
+    np.testing.assert_allclose(data['position'][:, 0], moon, rtol=1e-5, atol=1e-3)
+    velocity = np.gradient(moon, dt, axis=0)
+    np.testing.assert_allclose(data['velocity'][1:-1, 0], velocity[1:-1], rtol=1e-3, atol=0.05)
+
+def test_time_range_and_body_selection(tmp_path):
+    path = tmp_path / "range.traj"
+    # Enough queued chunks that none are dropped however slowly the writer thread gets to them
+    times, positions, angles = record(path, make_state(), 64, max_samples=8, max_pending=8)
+    
+    reader = TrajectoryReader(path)
+    try:
+        data = reader.read(start=1.0, end=2.0, bodies=['far', 1], columns=['orbit_angle'])
+    finally:
+        reader.close()
+    
+    selected = (times >= 1.0) & (times <= 2.0)
+    assert set(data) == {'time', 'orbit_angle'}
+    np.testing.assert_allclose(data['time'], times[selected])
+    np.testing.assert_allclose(data['orbit_angle'], angles[selected][:, [3, 1]], rtol=1e-5)
+
+def test_sampling_interval(tmp_path):
+    path = tmp_path / "interval.traj"
+    recorder = TrajectoryRecorder(path, NAMES, STAR, interval=0.25)
+    state = make_state()
+    for i in range(9):
+        recorder.record(state, i * 0.125)
+    # A paused tick repeats the time and is not sampled again; time running backwards is
+    recorder.record(state, 1.0)
+    recorder.record(state, 0.5)
+    recorder.close()
+    
+    reader = TrajectoryReader(path)
+    try:
+        np.testing.assert_array_equal(reader.read()['time'], [0.0, 0.25, 0.5, 0.75, 1.0, 0.5])
+    finally:
+        reader.close()
+
+def test_unclosed_recording_is_indexed_by_scanning(tmp_path):
+    path = tmp_path / "crashed.traj"
+    recorder = TrajectoryRecorder(path, NAMES, STAR, max_samples=4)
+    state = make_state()
+    for i in range(10):
+        state.step(0.05)
+        recorder.record(state, i * 0.05)
+    
+    # Stop the writer after the full chunks, without writing the index
+    recorder._chunks.put(None)
+    recorder._thread.join()
+    recorder.file.flush()
+    
+    reader = TrajectoryReader(path)
+    try:
+        assert len(reader.chunks) == 2
+        np.testing.assert_allclose(reader.read()['time'], np.arange(8) * 0.05)
+    finally:
+        reader.close()
+        recorder.file.close()
@@ -0,0 +1,124 @@
+import os
+import numpy as np
+from pathlib import Path
+from PIL import Image
+from OpenGL.GL import *
+from tracing import tracer
+from render_state import gl_state
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / "cache" / "textures"
+
+class TextureArray:
+    """Planet textures resampled to one size and packed as layers of a single GL_TEXTURE_2D_ARRAY.
+    
+    Layers are keyed by the source texture's content hash. The resampled pixels are cached on disk,
+    so later runs upload them directly instead of reading back and resizing the original texture.
+    """
+    
+    def __init__(self, width=2048, height=1024, capacity=8, cache_dir=DEFAULT_CACHE_DIR):
+        self.width = width
+        self.height = height
+        self.capacity = 0
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.layers = {}
+        self.texture = None
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity):
+        """(Re)create the array with room for capacity layers, copying existing layers on the GPU"""
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, texture)
+        glTexImage3D(GL_TEXTURE_2D_ARRAY, 0, GL_RGBA8, self.width, self.height, capacity, 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, None)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_REPEAT)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_REPEAT)
+        
+        if self.texture is not None:
+            framebuffer = glGenFramebuffers(1)
+            glBindFramebuffer(GL_READ_FRAMEBUFFER, framebuffer)
+            for layer in range(len(self.layers)):
+                glFramebufferTextureLayer(GL_READ_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, self.texture, 0, layer)
+                glCopyTexSubImage3D(GL_TEXTURE_2D_ARRAY, 0, 0, 0, layer, 0, 0, self.width, self.height)
+            glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+            glDeleteFramebuffers(1, [framebuffer])
+            glDeleteTextures([self.texture])
+        
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        self.texture = texture
+        self.capacity = capacity
+    
+    def _cache_path(self, key):
+        return self.cache_dir / f"{key}_{self.width}x{self.height}.npy"
+    
+    def _load_cached(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            pixels = np.load(self._cache_path(key))
+            if pixels.shape == (self.height, self.width, 4) and pixels.dtype == np.uint8:
+                return pixels
+        except Exception as e:
+            pass
+        return None
+    
+    def _store_cached(self, key, pixels):
+        if self.cache_dir is None:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._cache_path(key)
+            temporary = path.with_suffix(".tmp")
+            with open(temporary, "wb") as f:
+                np.save(f, pixels)
+            os.replace(temporary, path)
+        except Exception as e:
+            pass
+    
+    def _resample(self, texture_id):
+        """Read a 2D texture back from the GPU and resize it to the layer size"""
+        glBindTexture(GL_TEXTURE_2D, texture_id)
+        width = glGetTexLevelParameteriv(GL_TEXTURE_2D, 0, GL_TEXTURE_WIDTH)
+        height = glGetTexLevelParameteriv(GL_TEXTURE_2D, 0, GL_TEXTURE_HEIGHT)
+        data = glGetTexImage(GL_TEXTURE_2D, 0, GL_RGBA, GL_UNSIGNED_BYTE)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 4)
+        if (width, height) != (self.width, self.height):
+            image = Image.fromarray(pixels, "RGBA").resize((self.width, self.height), Image.LANCZOS)
+            pixels = np.asarray(image)
+        return np.ascontiguousarray(pixels, dtype=np.uint8)
+    
+    def layer(self, texture_id, key):
+        """Layer holding the texture with content hash key, packing it from texture_id on first use"""
+        if key in self.layers:
+            return self.layers[key]
+        
+        with tracer.span("pack_texture", "loader"):
+            pixels = self._load_cached(key)
+            if pixels is None:
+                pixels = self._resample(texture_id)
+                self._store_cached(key, pixels)
+            
+            if len(self.layers) == self.capacity:
+                self._allocate(self.capacity * 2)
+            
+            layer = len(self.layers)
+            glBindTexture(GL_TEXTURE_2D_ARRAY, self.texture)
+            glTexSubImage3D(GL_TEXTURE_2D_ARRAY, 0, 0, 0, layer, self.width, self.height, 1,
+                            GL_RGBA, GL_UNSIGNED_BYTE, pixels)
+            glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        
+        self.layers[key] = layer
+        return layer
+    
+    def bind(self, unit):
+        gl_state.bind_texture(unit, GL_TEXTURE_2D_ARRAY, self.texture)
+    
+    def cleanup(self):
+        try:
+            if self.texture:
+                glDeleteTextures([self.texture])
+        except Exception as e:
+            pass
@@ -0,0 +1,232 @@
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+PHASE_BEGIN = 0
+PHASE_END = 1
+PHASE_COUNTER = 2
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ('tracer', 'name_id', 'category_id')
+    
+    def __init__(self, tracer, name_id, category_id):
+        self.tracer = tracer
+        self.name_id = name_id
+        self.category_id = category_id
+    
+    def __enter__(self):
+        self.tracer._record(self.name_id, self.category_id, PHASE_BEGIN)
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._record(self.name_id, self.category_id, PHASE_END)
+        return False
+
+class Tracer:
+    """Records begin/end events into a preallocated ring and dumps them as Chrome trace JSON"""
+    
+    def __init__(self, capacity=1 << 16):
+        self.enabled = False
+        self.capacity = capacity
+        self._strings = {}
+        self._string_table = []
+        self._spans = {}
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._name_ids = [0] * capacity
+        self._category_ids = [0] * capacity
+        self._phases = [0] * capacity
+        self._timestamps = [0] * capacity
+        self._thread_ids = [0] * capacity
+        self._values = [0] * capacity
+        self._recorded = 0
+        self._thread_names = {}
+    
+    def enable(self, capacity=None):
+        if capacity and capacity != self.capacity:
+            self._allocate(capacity)
+        self.enabled = True
+    
+    def disable(self):
+        self.enabled = False
+    
+    def _intern(self, text):
+        string_id = self._strings.get(text)
+        if string_id is None:
+            with self._lock:
+                string_id = self._strings.get(text)
+                if string_id is None:
+                    string_id = len(self._string_table)
+                    self._string_table.append(text)
+                    self._strings[text] = string_id
+        return string_id
+    
+    def _record(self, name_id, category_id, phase, value=0):
+        # Slots are reserved under the lock, so the recorded count only ever grows with them
+        with self._lock:
+            index = self._recorded
+            self._recorded = index + 1
+        slot = index % self.capacity
+        thread_id = threading.get_ident()
+        self._name_ids[slot] = name_id
+        self._category_ids[slot] = category_id
+        self._phases[slot] = phase
+        self._timestamps[slot] = time.perf_counter_ns()
+        self._thread_ids[slot] = thread_id
+        self._values[slot] = value
+        if thread_id not in self._thread_names:
+            self._thread_names[thread_id] = threading.current_thread().name
+    
+    def span(self, name, category="main"):
+        """Context manager recording a begin/end pair around a block"""
+        if not self.enabled:
+            return _NULL_SPAN
+        key = (name, category)
+        span = self._spans.get(key)
+        if span is None:
+            span = _Span(self, self._intern(name), self._intern(category))
+            self._spans[key] = span
+        return span
+    
+    def begin(self, name, category="main"):
+        if self.enabled:
+            self._record(self._intern(name), self._intern(category), PHASE_BEGIN)
+    
+    def end(self, name, category="main"):
+        if self.enabled:
+            self._record(self._intern(name), self._intern(category), PHASE_END)
+    
+    def counter(self, name, value, category="main"):
+        """Record the current value of a counter, shown as a track in the trace viewer"""
+        if self.enabled:
+            self._record(self._intern(name), self._intern(category), PHASE_COUNTER, value)
+    
+    def _ordered_slots(self):
+        recorded = self._recorded
+        if recorded <= self.capacity:
+            return range(recorded)
+        start = recorded % self.capacity
+        return itertools.chain(range(start, self.capacity), range(start))
+    
+    def events(self):
+        """Return buffered events as Chrome trace-event dictionaries, oldest first"""
+        pid = os.getpid()
+        events = []
+        depth = {}
+        
+        for slot in self._ordered_slots():
+            thread_id = self._thread_ids[slot]
+            phase = self._phases[slot]
+            name = self._string_table[self._name_ids[slot]]
+            
+            if phase == PHASE_COUNTER:
+                events.append({
+                    'name': name,
+                    'cat': self._string_table[self._category_ids[slot]],
+                    'ph': 'C',
+                    'ts': self._timestamps[slot] / 1000.0,
+                    'pid': pid,
+                    'tid': thread_id,
+                    'args': {name: self._values[slot]}
+                })
+                continue
+            
+            # Ring wrap-around can leave end events whose begin was overwritten
+            if phase == PHASE_END:
+                if depth.get(thread_id, 0) == 0:
+                    continue
+                depth[thread_id] -= 1
+            else:
+                depth[thread_id] = depth.get(thread_id, 0) + 1
+            
+            events.append({
+                'name': name,
+                'cat': self._string_table[self._category_ids[slot]],
+                'ph': 'B' if phase == PHASE_BEGIN else 'E',
+                'ts': self._timestamps[slot] / 1000.0,
+                'pid': pid,
+                'tid': thread_id
+            })
+        
+        for thread_id, thread_name in self._thread_names.items():
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': thread_id,
+                'args': {'name': thread_name}
+            })
+        return events
+    
+    def dump(self, path):
+        """Write the buffered events to a Chrome trace JSON file (open in Perfetto or chrome://tracing)"""
+        trace = {
+            'traceEvents': self.events(),
+            'displayTimeUnit': 'ms'
+        }
+        with open(Path(path), 'w') as f:
+            json.dump(trace, f)
+    
+    def clear(self):
+        self._allocate(self.capacity)
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'span', 'start')
+    
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.span = tracer.span(name, "startup")
+    
+    def __enter__(self):
+        self.span.__enter__()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.phases.append((self.name, time.perf_counter() - self.start))
+        self.span.__exit__(exc_type, exc, tb)
+        return False
+
+class PhaseTimer:
+    """Accumulates wall-clock durations of named startup phases and milestones"""
+    
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.phases = []
+        self.milestones = []
+    
+    def phase(self, name):
+        return _Phase(self, name)
+    
+    def add(self, name, duration):
+        self.phases.append((name, duration))
+    
+    def mark(self, name):
+        """Record the time elapsed since the timer origin"""
+        self.milestones.append((name, time.perf_counter() - self.origin))
+    
+    def report(self):
+        lines = ["Startup time breakdown:"]
+        for name, duration in self.phases:
+            lines.append(f"  {name:<28} {duration * 1000.0:8.1f} ms")
+        for name, elapsed in self.milestones:
+            lines.append(f"  {'@ ' + name:<28} {elapsed * 1000.0:8.1f} ms")
+        return "\n".join(lines)
+
+tracer = Tracer()
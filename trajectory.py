@@ -0,0 +1,295 @@
+import json
+import mmap
+import queue
+import struct
+import threading
+import zlib
+import numpy as np
+from body_state import incline
+from tracing import tracer
+
+TRAJECTORY_MAGIC = b'SSTRAJ\0\0'
+TRAJECTORY_VERSION = 1
+
+# magic, format version, length of the JSON file header that follows
+PREAMBLE = struct.Struct('<8sII')
+
+# Each chunk: marker and length of its JSON descriptor, then the descriptor and its compressed columns
+CHUNK_HEADER = struct.Struct('<4sI')
+CHUNK_MARKER = b'CHNK'
+
+# Written on close: offset and length of the JSON chunk index, and a marker
+FOOTER = struct.Struct('<QI4s')
+FOOTER_MARKER = b'TIDX'
+
+# Sampled columns and values per body; positions and velocities are world-space x, y, z
+COLUMNS = {'position': 3, 'velocity': 3, 'orbit_angle': 1, 'rotation_angle': 1}
+
+def _compress(array, level):
+    """zlib over the array's bytes grouped by significance, which compresses floats far better"""
+    raw = array.reshape(-1).view(np.uint8).reshape(-1, array.itemsize)
+    return zlib.compress(np.ascontiguousarray(raw.T), level)
+
+def _decompress(data, dtype, shape):
+    dtype = np.dtype(dtype)
+    raw = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(dtype.itemsize, -1)
+    return np.ascontiguousarray(raw.T).view(dtype).reshape(shape)
+
+class TrajectoryRecorder:
+    """Appends sampled body positions, velocities and angles to a chunked, compressed columnar file.
+    
+    Samples are copied into the current chunk's arrays on the simulation thread; full chunks are
+    compressed and written by a background thread. At most max_pending chunks wait for it, so
+    memory stays bounded: when the disk cannot keep up, chunks are dropped (and counted) rather
+    than stalling the simulation.
+    """
+    
+    def __init__(self, path, names, star_mask=0, interval=0.0, chunk_bytes=8 << 20, max_samples=256,
+                 max_pending=4, level=1):
+        self.path = path
+        self.names = list(names)
+        self.star_mask = star_mask
+        self.interval = interval
+        self.chunk_bytes = chunk_bytes
+        self.max_samples = max_samples
+        self.level = level
+        self.last_sample = None
+        self.dropped_chunks = 0
+        
+        self.chunk = None
+        self.samples = 0
+        self.index = []
+        
+        self.file = open(path, 'wb')
+        header = json.dumps({'names': self.names, 'columns': COLUMNS}).encode('utf-8')
+        self.file.write(PREAMBLE.pack(TRAJECTORY_MAGIC, TRAJECTORY_VERSION, len(header)))
+        self.file.write(header)
+        
+        self._chunks = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="trajectory_writer", daemon=True)
+        self._thread.start()
+    
+    def _new_chunk(self, count):
+        bytes_per_sample = 8 + count * 4 * sum(COLUMNS.values())
+        capacity = max(1, min(self.max_samples, self.chunk_bytes // bytes_per_sample))
+        self.chunk = {'time': np.zeros(capacity, dtype=np.float64)}
+        for name, width in COLUMNS.items():
+            shape = (capacity, count) if width == 1 else (capacity, count, width)
+            self.chunk[name] = np.zeros(shape, dtype=np.float32)
+        self.samples = 0
+    
+    def record(self, state, sim_time):
+        """Sample state at sim_time, if the sampling interval has passed since the last sample"""
+        # Paused ticks repeat the last time; time running backwards (a restored checkpoint) is sampled
+        if self.last_sample is not None:
+            elapsed = sim_time - self.last_sample
+            if elapsed == 0 or 0 < elapsed < self.interval:
+                return
+        self.last_sample = sim_time
+        
+        n = state.count
+        if self.chunk is not None and self.chunk['position'].shape[1] != n:
+            self.flush()
+        if self.chunk is None:
+            self._new_chunk(n)
+        
+        # Orbits are circles around the parent (the origin for most bodies), so velocity follows from
+        # the angle and angular speed, and both are composed with the parent's like BodyState.positions.
+        # Samples are stored as float32, so they are computed in float32, where trig is far cheaper.
+        angles = np.radians(state.orbit_angle[:n], dtype=np.float32)
+        radii = np.where(state.flags[:n] & self.star_mask, 0.0, state.orbit_radius[:n]).astype(np.float32)
+        speed = radii * np.radians(state.orbit_speed[:n], dtype=np.float32)
+        cos, sin = np.cos(angles), np.sin(angles)
+        
+        i = self.samples
+        chunk = self.chunk
+        chunk['time'][i] = sim_time
+        position = chunk['position'][i]
+        velocity = chunk['velocity'][i]
+        position[:, 0] = radii * cos
+        position[:, 2] = radii * sin
+        velocity[:, 0] = -speed * sin
+        velocity[:, 2] = speed * cos
+        for vectors in (position, velocity):
+            incline(vectors, state.orbit_inclination[:n])
+            state.compose(vectors)
+        chunk['orbit_angle'][i] = state.orbit_angle[:n]
+        chunk['rotation_angle'][i] = state.rotation_angle[:n]
+        self.samples += 1
+        
+        if self.samples == len(chunk['time']):
+            self.flush()
+    
+    def flush(self):
+        """Hand the current chunk to the writer thread"""
+        if self.chunk is None or self.samples == 0:
+            return
+        chunk = {name: column[:self.samples] for name, column in self.chunk.items()}
+        self.chunk = None
+        try:
+            self._chunks.put_nowait(chunk)
+        except queue.Full as e:
+            self.dropped_chunks += 1
+    
+    def _run(self):
+        while True:
+            chunk = self._chunks.get()
+            if chunk is None:
+                return
+            try:
+                with tracer.span("write_trajectory_chunk", "trajectory"):
+                    self._write_chunk(chunk)
+            except Exception as e:
+                print(f"Failed to write trajectory chunk: {e}")
+    
+    def _write_chunk(self, chunk):
+        columns = {}
+        blobs = []
+        offset = 0
+        for name, array in chunk.items():
+            blob = _compress(array, self.level)
+            columns[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset, 'length': len(blob)}
+            blobs.append(blob)
+            offset += len(blob)
+        
+        times = chunk['time']
+        descriptor = {'t0': float(times[0]), 't1': float(times[-1]), 'samples': len(times),
+                      'count': chunk['position'].shape[1], 'columns': columns}
+        encoded = json.dumps(descriptor).encode('utf-8')
+        
+        chunk_offset = self.file.tell()
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MARKER, len(encoded)))
+        self.file.write(encoded)
+        descriptor['data'] = self.file.tell()
+        for blob in blobs:
+            self.file.write(blob)
+        descriptor['offset'] = chunk_offset
+        self.index.append(descriptor)
+    
+    def close(self):
+        """Write the remaining samples and the chunk index"""
+        if self.file is None:
+            return
+        self.flush()
+        self._chunks.put(None)
+        self._thread.join()
+        
+        index = json.dumps({'names': self.names, 'chunks': self.index}).encode('utf-8')
+        index_offset = self.file.tell()
+        self.file.write(index)
+        self.file.write(FOOTER.pack(index_offset, len(index), FOOTER_MARKER))
+        self.file.close()
+        self.file = None
+        if self.dropped_chunks:
+            print(f"Trajectory recorder dropped {self.dropped_chunks} chunks the disk could not keep up with")
+
+class TrajectoryReader:
+    """Reads time ranges of selected bodies from a recorded trajectory file.
+    
+    Only the chunks overlapping the requested range are decompressed. Files without an index
+    (a recording that was not closed) are indexed by walking the chunk headers.
+    """
+    
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, header_length = PREAMBLE.unpack_from(self.data, 0)
+        if magic != TRAJECTORY_MAGIC:
+            raise ValueError(f"Not a trajectory file: {path}")
+        if version != TRAJECTORY_VERSION:
+            raise ValueError(f"Unsupported trajectory version {version}: {path}")
+        header = json.loads(self.data[PREAMBLE.size:PREAMBLE.size + header_length])
+        self.names = header['names']
+        self.columns = header['columns']
+        
+        self.chunks = self._read_index()
+        if self.chunks is None:
+            self.chunks = self._scan(PREAMBLE.size + header_length)
+    
+    def _read_index(self):
+        if len(self.data) < FOOTER.size:
+            return None
+        index_offset, index_length, marker = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+        if marker != FOOTER_MARKER:
+            return None
+        index = json.loads(self.data[index_offset:index_offset + index_length])
+        self.names = index['names']
+        return index['chunks']
+    
+    def _scan(self, offset):
+        chunks = []
+        while offset + CHUNK_HEADER.size <= len(self.data):
+            marker, length = CHUNK_HEADER.unpack_from(self.data, offset)
+            if marker != CHUNK_MARKER:
+                break
+            descriptor = json.loads(self.data[offset + CHUNK_HEADER.size:offset + CHUNK_HEADER.size + length])
+            descriptor['offset'] = offset
+            descriptor['data'] = offset + CHUNK_HEADER.size + length
+            end = descriptor['data'] + sum(column['length'] for column in descriptor['columns'].values())
+            if end > len(self.data):
+                break
+            chunks.append(descriptor)
+            offset = end
+        return chunks
+    
+    @property
+    def time_range(self):
+        if not self.chunks:
+            return (0.0, 0.0)
+        return (min(chunk['t0'] for chunk in self.chunks), max(chunk['t1'] for chunk in self.chunks))
+    
+    def body_ids(self, bodies):
+        """Ids for a list of body names or ids"""
+        return np.array([self.names.index(body) if isinstance(body, str) else body for body in bodies], dtype=np.intp)
+    
+    def _column(self, chunk, name):
+        column = chunk['columns'][name]
+        start = chunk['data'] + column['offset']
+        return _decompress(self.data[start:start + column['length']], column['dtype'], column['shape'])
+    
+    def iter_chunks(self, start=None, end=None, bodies=None, columns=None):
+        """Yield one dict per overlapping chunk: 'time' and the requested columns for the selected bodies.
+        
+        bodies is a list of names or ids (all recorded bodies by default); bodies a chunk has no
+        row for read as NaN.
+        """
+        columns = list(self.columns) if columns is None else list(columns)
+        ids = None if bodies is None else self.body_ids(bodies)
+        
+        # Chunks are in recording order, which is only time order if time never ran backwards
+        for chunk in self.chunks:
+            if (end is not None and chunk['t0'] > end) or (start is not None and chunk['t1'] < start):
+                continue
+            
+            times = self._column(chunk, 'time')
+            rows = np.ones(len(times), dtype=np.bool_)
+            if start is not None:
+                rows &= times >= start
+            if end is not None:
+                rows &= times <= end
+            
+            result = {'time': times[rows]}
+            for name in columns:
+                values = self._column(chunk, name)[rows]
+                if ids is not None:
+                    present = ids < chunk['count']
+                    selected = np.full((len(values), len(ids)) + values.shape[2:], np.nan, dtype=values.dtype)
+                    selected[:, present] = values[:, ids[present]]
+                    values = selected
+                result[name] = values
+            yield result
+    
+    def read(self, start=None, end=None, bodies=None, columns=None):
+        """Like iter_chunks, with the chunks concatenated into one array per column"""
+        parts = list(self.iter_chunks(start, end, bodies, columns))
+        if not parts:
+            return {}
+        try:
+            return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        except ValueError as e:
+            raise ValueError("Body count changed within the range; select bodies to read it") from e
+    
+    def close(self):
+        self.data.close()
+        self.file.close()
@@ -0,0 +1,160 @@
+import numpy as np
+from OpenGL.GL import *
+from render_state import gl_state
+
+def identity_matrices(count):
+    matrices = np.zeros((count, 4, 4), dtype=np.float32)
+    matrices[:, [0, 1, 2, 3], [0, 1, 2, 3]] = 1.0
+    return matrices
+
+def translation_matrices(translations):
+    """(N, 3) translations to (N, 4, 4) matrices"""
+    translations = np.asarray(translations, dtype=np.float32)
+    matrices = identity_matrices(len(translations))
+    matrices[:, :3, 3] = translations
+    return matrices
+
+def rotation_matrices_x(angles):
+    """Rotations about the x axis by (N,) angles in radians, matching glm.rotate"""
+    cos, sin = np.cos(angles), np.sin(angles)
+    matrices = identity_matrices(len(cos))
+    matrices[:, 1, 1] = cos
+    matrices[:, 1, 2] = -sin
+    matrices[:, 2, 1] = sin
+    matrices[:, 2, 2] = cos
+    return matrices
+
+def rotation_matrices_y(angles):
+    """Rotations about the y axis by (N,) angles in radians, matching glm.rotate"""
+    cos, sin = np.cos(angles), np.sin(angles)
+    matrices = identity_matrices(len(cos))
+    matrices[:, 0, 0] = cos
+    matrices[:, 0, 2] = sin
+    matrices[:, 2, 0] = -sin
+    matrices[:, 2, 2] = cos
+    return matrices
+
+def scale_matrices(scales):
+    """Uniform (N,) or per-axis (N, 3) scales to (N, 4, 4) matrices"""
+    scales = np.asarray(scales, dtype=np.float32)
+    if scales.ndim == 1:
+        scales = np.repeat(scales[:, None], 3, axis=1)
+    matrices = identity_matrices(len(scales))
+    matrices[:, [0, 1, 2], [0, 1, 2]] = scales
+    return matrices
+
+def to_gl_layout(matrices):
+    """Column-major float32 copy of (N, 4, 4) matrices, ready for a single buffer upload"""
+    return np.ascontiguousarray(np.asarray(matrices, dtype=np.float32).transpose(0, 2, 1))
+
+def model_matrices(positions, rotation_angles, scales, pivot_offsets):
+    """Body model matrices T(position) * T(pivot) * Ry(angle) * T(-pivot) * S(scale), built directly as (N, 4, 4) float32
+    
+    Angles are in degrees. The pivot offset moves a model's rotation axis to its true center;
+    it is zero for most bodies.
+    """
+    cos = np.cos(np.radians(rotation_angles))
+    sin = np.sin(np.radians(rotation_angles))
+    scales = np.asarray(scales)
+    pivot_offsets = np.asarray(pivot_offsets)
+    
+    matrices = np.zeros((len(cos), 4, 4), dtype=np.float32)
+    matrices[:, 0, 0] = cos * scales
+    matrices[:, 0, 2] = sin * scales
+    matrices[:, 1, 1] = scales
+    matrices[:, 2, 0] = -sin * scales
+    matrices[:, 2, 2] = cos * scales
+    matrices[:, 3, 3] = 1.0
+    
+    px, py, pz = pivot_offsets[:, 0], pivot_offsets[:, 1], pivot_offsets[:, 2]
+    rotated_pivot = np.stack([cos * px + sin * pz, py, -sin * px + cos * pz], axis=1)
+    matrices[:, :3, 3] = np.asarray(positions) + pivot_offsets - rotated_pivot
+    return matrices
+
+def normal_matrices(matrices):
+    """Inverse transposes of the upper 3x3 blocks of (N, 4, 4) matrices, built from cofactors as (N, 3, 3)
+    
+    Singular matrices (a zero scale) give zero normal matrices instead of raising.
+    """
+    linear = np.asarray(matrices, dtype=np.float64)[:, :3, :3]
+    c0, c1, c2 = linear[:, :, 0], linear[:, :, 1], linear[:, :, 2]
+    cofactors = np.stack([np.cross(c1, c2), np.cross(c2, c0), np.cross(c0, c1)], axis=2)
+    det = np.einsum('ij,ij->i', c0, cofactors[:, :, 0])
+    inverse_det = np.divide(1.0, det, out=np.zeros_like(det), where=det != 0)
+    return (cofactors * inverse_det[:, None, None]).astype(np.float32)
+
+class TextureBuffer:
+    """Growable buffer texture of RGBA32F texels, refilled with one write per update"""
+    
+    def __init__(self):
+        self.TBO = None
+        self.texture = None
+        self.capacity = 0
+    
+    def upload(self, data):
+        if self.TBO is None:
+            self.TBO = glGenBuffers(1)
+            self.texture = glGenTextures(1)
+        
+        glBindBuffer(GL_TEXTURE_BUFFER, self.TBO)
+        if data.nbytes > self.capacity:
+            self.capacity = data.nbytes
+            glBufferData(GL_TEXTURE_BUFFER, data.nbytes, data, GL_STREAM_DRAW)
+            glBindTexture(GL_TEXTURE_BUFFER, self.texture)
+            glTexBuffer(GL_TEXTURE_BUFFER, GL_RGBA32F, self.TBO)
+            glBindTexture(GL_TEXTURE_BUFFER, 0)
+        elif data.nbytes:
+            glBufferSubData(GL_TEXTURE_BUFFER, 0, data.nbytes, data)
+        glBindBuffer(GL_TEXTURE_BUFFER, 0)
+    
+    def bind(self, unit):
+        gl_state.bind_texture(unit, GL_TEXTURE_BUFFER, self.texture)
+    
+    def cleanup(self):
+        try:
+            if self.texture:
+                glDeleteTextures([self.texture])
+            if self.TBO:
+                glDeleteBuffers(1, [self.TBO])
+        except Exception as e:
+            pass
+
+class TransformStage:
+    """Computes every body's model and normal matrices in one batch and uploads each set in one write.
+    
+    Shaders fetch a body's matrices with texelFetch on samplerBuffers: four RGBA32F texels per
+    model matrix and three per normal matrix (columns padded to vec4), so drawing a body only
+    needs its index.
+    """
+    
+    def __init__(self):
+        self.matrices = None
+        self.normal_matrices = None
+        self.model_buffer = TextureBuffer()
+        self.normal_buffer = TextureBuffer()
+    
+    def update(self, state, positions):
+        """Rebuild and upload the model and normal matrices of all bodies in a BodyState at this frame's positions"""
+        n = state.count
+        self.matrices = model_matrices(
+            positions,
+            state.rotation_angle[:n],
+            state.scale[:n],
+            state.pivot_offset[:n]
+        )
+        self.normal_matrices = normal_matrices(self.matrices)
+        
+        padded = np.zeros((n, 3, 4), dtype=np.float32)
+        padded[:, :, :3] = self.normal_matrices.transpose(0, 2, 1)
+        self.model_buffer.upload(to_gl_layout(self.matrices))
+        self.normal_buffer.upload(padded)
+        return self.matrices
+    
+    def bind(self, model_unit, normal_unit=None):
+        self.model_buffer.bind(model_unit)
+        if normal_unit is not None:
+            self.normal_buffer.bind(normal_unit)
+    
+    def cleanup(self):
+        self.model_buffer.cleanup()
+        self.normal_buffer.cleanup()